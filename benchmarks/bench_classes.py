@@ -0,0 +1,99 @@
+#!/usr/bin/env python
+"""
+Benchmark construction and serialisation of CSL items.
+
+Run from the repository root with ``python benchmarks/bench_classes.py``.
+"""
+
+import argparse
+import datetime as dt
+import sys
+import tracemalloc
+from timeit import Timer
+
+from citepy.classes import CslItem, CslType, ValidationPolicy, validation_policy
+
+
+def make_item(idx: int) -> CslItem:
+    return CslItem(
+        type=CslType.WEBPAGE,
+        id=f"package-{idx}",
+        author=[f"Author {idx}", "Another Author"],
+        URL=f"https://github.com/someone/package-{idx}",
+        abstract="A package which does something useful",
+        version="1.2.3",
+        issued=dt.date(2021, 1, 2),
+        original_date=dt.date(2019, 3, 4),
+        accessed=dt.date(2021, 5, 6),
+        categories=["software", "python", "libraries", "pypi"],
+        publisher="GitHub",
+        title=f"package-{idx}",
+    )
+
+
+def bench_construct(n, repeat):
+    print(f"Constructing {n} items (best of {repeat})")
+    for policy in ValidationPolicy:
+        with validation_policy(policy):
+            timer = Timer(lambda: [make_item(idx) for idx in range(n)])
+            best = min(timer.repeat(repeat, 1))
+        print(f"  validation={policy.value:<10} {best:.3f}s")
+
+
+def bench_serialise(n, repeat):
+    print(f"Serialising and parsing {n} items (best of {repeat})")
+    items = [make_item(idx) for idx in range(n)]
+    best = min(Timer(lambda: [item.to_jso() for item in items]).repeat(repeat, 1))
+    print(f"  to_jso    {best:.3f}s ({n / best:.0f} items/s)")
+    jsos = [item.to_jso() for item in items]
+    best = min(Timer(lambda: [CslItem.from_jso(j) for j in jsos]).repeat(repeat, 1))
+    print(f"  from_jso  {best:.3f}s ({n / best:.0f} items/s)")
+
+
+def bench_dedup(n, repeat):
+    print(f"Deduplicating {n} items (best of {repeat})")
+    items = [make_item(idx % (n // 2)) for idx in range(n)]
+    best = min(Timer(lambda: set(items)).repeat(repeat, 1))
+    print(f"  mutable   {best:.3f}s")
+    for item in items:
+        item.freeze()
+    best = min(Timer(lambda: set(items)).repeat(repeat, 1))
+    print(f"  frozen    {best:.3f}s")
+
+
+class DenseItem:
+    """Every field of an item in a per-instance ``__dict__``, as CslItem used to."""
+
+    def __init__(self, item: CslItem):
+        for name in item._fields:
+            setattr(self, name, getattr(item, name))
+
+
+def bench_memory(n):
+    print(f"Memory for {n} items")
+    tracemalloc.start()
+    items = [make_item(idx) for idx in range(n)]
+    current, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    print(f"  total allocated    {current / n:.0f} B/item (peak {peak / n:.0f})")
+
+    sparse = sys.getsizeof(items[0]) + sys.getsizeof(items[0]._data)
+    dense_item = DenseItem(items[0])
+    dense = sys.getsizeof(dense_item) + sys.getsizeof(dense_item.__dict__)
+    print(f"  item container     {sparse} B/item (dense __dict__ {dense})")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--n-items", "-n", type=int, default=10_000)
+    parser.add_argument("--repeat", "-r", type=int, default=3)
+    parsed = parser.parse_args()
+
+    bench_construct(parsed.n_items, parsed.repeat)
+    bench_memory(parsed.n_items)
+    bench_serialise(parsed.n_items, parsed.repeat)
+    bench_dedup(parsed.n_items, parsed.repeat)
+
+
+if __name__ == "__main__":
+    main()
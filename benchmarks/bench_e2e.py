@@ -0,0 +1,259 @@
+#!/usr/bin/env python
+"""
+End-to-end benchmark of fetching many packages from a local mock repository.
+
+Starts ``mock_repo.py`` in a subprocess, then for each number of packages
+runs the fetch pipeline both through the python API (``iter_specs``,
+which ``get_info`` wraps) and through the CLI, each in a fresh process.
+Packages are split evenly between PyPI, crates.io and CRAN.
+The ``warm`` mode runs the CLI with a response cache filled by an
+identical earlier run, so every response is revalidated (mock responses
+have ``max-age=0``).
+Reports throughput, per-package latency (API only) and peak memory
+(maximum resident set size of the process).
+
+Run from the repository root with ``python benchmarks/bench_e2e.py``.
+"""
+
+import argparse
+import asyncio
+import json
+import math
+import os
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+here = Path(__file__).absolute().parent
+sys.path.insert(0, str(here))
+sys.path.insert(0, str(here.parent))
+
+from mock_repo import repo_urls  # noqa: E402
+
+REPOS = ["pypi", "crates", "cran"]
+
+
+def make_specs(n, releases):
+    for idx in range(n):
+        repo = REPOS[idx % len(REPOS)]
+        if repo == "cran":
+            yield repo, f"bench{idx}", None
+        else:
+            # pinned to releases throughout the history, not just the latest
+            yield repo, f"bench{idx}", f"1.{idx % releases}.0"
+
+
+def percentile(values, q):
+    """Nearest-rank percentile."""
+    if not values:
+        return float("nan")
+    values = sorted(values)
+    return values[min(len(values) - 1, max(0, math.ceil(q / 100 * len(values)) - 1))]
+
+
+def run_api(parsed):
+    """Run in a child process: fetch through the API and print timings as JSON."""
+    from citepy.api import Citer
+    from citepy.cli import iter_specs
+    from citepy.limits import HostLimiter
+
+    latencies = []
+    cite = Citer.cite
+
+    async def timed_cite(self, *args, **kwargs):
+        started = time.perf_counter()
+        try:
+            return await cite(self, *args, **kwargs)
+        finally:
+            latencies.append(time.perf_counter() - started)
+
+    Citer.cite = timed_cite
+
+    fetcher_kwargs = {
+        repo: {"base_url": url} for repo, url in repo_urls(port=parsed.port).items()
+    }
+    failures = []
+
+    async def fetch():
+        count = 0
+        items = iter_specs(
+            make_specs(parsed.child, parsed.releases),
+            limiter=HostLimiter(parsed.jobs, parsed.jobs),
+            failures=failures,
+            fetcher_kwargs=fetcher_kwargs,
+        )
+        async for _ in items:
+            count += 1
+        return count
+
+    started = time.perf_counter()
+    count = asyncio.run(fetch())
+    elapsed = time.perf_counter() - started
+    json.dump(
+        {
+            "seconds": elapsed,
+            "items": count,
+            "failures": len(failures),
+            "p50": percentile(latencies, 50),
+            "p99": percentile(latencies, 99),
+        },
+        sys.stdout,
+    )
+
+
+def run_child(args):
+    """Run a command, returning its elapsed time, stdout and peak RSS in MiB."""
+    started = time.perf_counter()
+    proc = subprocess.Popen(
+        args, stdout=subprocess.PIPE, stderr=subprocess.DEVNULL, cwd=here.parent
+    )
+    out = proc.stdout.read()
+    _, _, rusage = os.wait4(proc.pid, 0)
+    elapsed = time.perf_counter() - started
+    # ru_maxrss is in KiB on linux
+    return elapsed, out, rusage.ru_maxrss / 1024
+
+
+def bench_api(n, parsed):
+    _, out, rss = run_child(
+        [
+            sys.executable,
+            __file__,
+            "--child",
+            str(n),
+            "--port",
+            str(parsed.port),
+            "--jobs",
+            str(parsed.jobs),
+            "--releases",
+            str(parsed.releases),
+        ]
+    )
+    result = json.loads(out)
+    result["rss"] = rss
+    return result
+
+
+def bench_cli(n, parsed, cache_dir=None):
+    with tempfile.NamedTemporaryFile("w", suffix=".txt", delete=False) as f:
+        for repo, name, version in make_specs(n, parsed.releases):
+            f.write(f"{repo}:{name}" + (f"=={version}" if version else "") + "\n")
+    args = [
+        sys.executable,
+        "-m",
+        "citepy.cli",
+        *(["--no-cache"] if cache_dir is None else ["--cache-dir", cache_dir]),
+        "--keep-going",
+        "--format",
+        "csl-json/lines",
+        "--jobs",
+        str(parsed.jobs),
+        "--per-host",
+        str(parsed.jobs),
+        "--infile",
+        f.name,
+    ]
+    for repo, url in repo_urls(port=parsed.port).items():
+        args.extend(["--repo-url", f"{repo}={url}"])
+    try:
+        elapsed, out, rss = run_child(args)
+    finally:
+        os.unlink(f.name)
+    return {
+        "seconds": elapsed,
+        "items": out.count(b"\n"),
+        "failures": n - out.count(b"\n"),
+        "p50": None,
+        "p99": None,
+        "rss": rss,
+    }
+
+
+def bench_warm(n, parsed):
+    """The CLI with a response cache warmed by an identical earlier run."""
+    from citepy.store import default_store_path
+
+    with tempfile.TemporaryDirectory() as cache_dir:
+        bench_cli(n, parsed, cache_dir)
+        # measure the response cache, rather than the store of finished items
+        default_store_path(cache_dir).unlink()
+        return bench_cli(n, parsed, cache_dir)
+
+
+def free_port():
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def fmt_ms(seconds):
+    return "-" if seconds is None else f"{seconds * 1000:.1f}"
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument(
+        "--sizes",
+        type=lambda s: [int(n) for n in s.split(",")],
+        default=[10, 1000, 10000],
+        help="comma-separated numbers of packages (default 10,1000,10000)",
+    )
+    parser.add_argument("--jobs", "-j", type=int, default=16)
+    parser.add_argument(
+        "--latency", type=float, default=0.02, help="mock response latency, seconds"
+    )
+    parser.add_argument(
+        "--error-rate", type=float, default=0.0, help="mock rate of 503 responses"
+    )
+    parser.add_argument("--releases", type=int, default=20)
+    parser.add_argument("--modes", default="api,cli,warm")
+    parser.add_argument("--port", type=int, help=argparse.SUPPRESS)
+    parser.add_argument("--child", type=int, help=argparse.SUPPRESS)
+    parsed = parser.parse_args()
+
+    if parsed.child is not None:
+        return run_api(parsed)
+
+    parsed.port = free_port()
+    mock = subprocess.Popen(
+        [
+            sys.executable,
+            str(here / "mock_repo.py"),
+            "--port",
+            str(parsed.port),
+            "--latency",
+            str(parsed.latency),
+            "--error-rate",
+            str(parsed.error_rate),
+            "--releases",
+            str(parsed.releases),
+        ],
+        stdout=subprocess.PIPE,
+    )
+    mock.stdout.readline()
+
+    benches = {"api": bench_api, "cli": bench_cli, "warm": bench_warm}
+    print(
+        f"{'mode':>4} {'packages':>8} {'seconds':>8} {'pkg/s':>8} "
+        f"{'p50 ms':>8} {'p99 ms':>8} {'peak MiB':>8} {'failed':>6}"
+    )
+    try:
+        for n in parsed.sizes:
+            for mode in parsed.modes.split(","):
+                r = benches[mode](n, parsed)
+                print(
+                    f"{mode:>4} {n:>8} {r['seconds']:>8.2f} "
+                    f"{n / r['seconds']:>8.1f} {fmt_ms(r['p50']):>8} "
+                    f"{fmt_ms(r['p99']):>8} {r['rss']:>8.1f} {r['failures']:>6}",
+                    flush=True,
+                )
+    finally:
+        mock.terminate()
+        mock.wait()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,109 @@
+#!/usr/bin/env python
+"""
+Benchmark parsing large PyPI JSON documents.
+
+Run from the repository root with ``python benchmarks/bench_pypi.py``,
+optionally giving paths to recorded responses
+(e.g. ``curl https://pypi.org/pypi/botocore/json > botocore.json``);
+otherwise a synthetic document with thousands of releases is used.
+"""
+
+import argparse
+import datetime as dt
+import json
+import tracemalloc
+from pathlib import Path
+from timeit import Timer
+
+from citepy.repos import pypi
+
+
+def synthetic_document(n_releases=5000, uploads_per_release=2) -> bytes:
+    start = dt.datetime(2010, 1, 1)
+    releases = dict()
+    for idx in range(n_releases):
+        time = start + dt.timedelta(hours=idx)
+        releases[f"1.{idx}.0"] = [
+            {
+                "filename": f"package-1.{idx}.0-{n}.whl",
+                "size": 12345,
+                "upload_time": time.isoformat(),
+                "upload_time_iso_8601": time.isoformat() + "Z",
+                "url": f"https://files.pythonhosted.org/package-1.{idx}.0-{n}.whl",
+                "digests": {"md5": "0" * 32, "sha256": "0" * 64},
+            }
+            for n in range(uploads_per_release)
+        ]
+    version = f"1.{n_releases - 1}.0"
+    info = {
+        "name": "package",
+        "version": version,
+        "author": "Someone",
+        "maintainer": None,
+        "home_page": "https://github.com/someone/package",
+        "project_url": "https://pypi.org/project/package/",
+        "summary": "A package with a lot of releases",
+        "classifiers": ["Programming Language :: Python :: 3"],
+    }
+    doc = {"info": info, "releases": releases, "urls": releases[version]}
+    return json.dumps(doc).encode()
+
+
+def full_parse(content: bytes):
+    """Build the whole document and parse every upload time."""
+    data = json.loads(content)
+    first = None
+    for release in data["releases"].values():
+        for upload in release:
+            t = dt.datetime.fromisoformat(upload["upload_time"])
+            first = t if first is None else min(first, t)
+    return data["info"], first
+
+
+def measure(name, fn, repeat):
+    best = min(Timer(fn).repeat(repeat, 1))
+    tracemalloc.start()
+    fn()
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    print(f"  {name:<32} {best * 1000:8.1f}ms  peak {peak / 1024 ** 2:7.1f}MiB")
+
+
+def bench(label, content: bytes, repeat):
+    print(f"{label} ({len(content) / 1024 ** 2:.1f}MiB, best of {repeat})")
+    measure("json + fromisoformat scan", lambda: full_parse(content), repeat)
+
+    for scan, label in [(True, ""), (False, ", indexed")]:
+        measure(
+            f"summarise_json (json{label})",
+            lambda: pypi.summarise_json(content, scan, stream=False),
+            repeat,
+        )
+        if pypi.ijson is None:
+            continue
+        measure(
+            f"summarise_json (ijson{label})",
+            lambda: pypi.summarise_json(content, scan, stream=True),
+            repeat,
+        )
+    if pypi.ijson is None:
+        print("  (install ijson to benchmark incremental parsing)")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("path", nargs="*", type=Path, help="recorded PyPI JSON")
+    parser.add_argument("--n-releases", "-n", type=int, default=5000)
+    parser.add_argument("--repeat", "-r", type=int, default=3)
+    parsed = parser.parse_args()
+
+    if parsed.path:
+        for path in parsed.path:
+            bench(path.name, path.read_bytes(), parsed.repeat)
+    else:
+        content = synthetic_document(parsed.n_releases)
+        bench(f"synthetic, {parsed.n_releases} releases", content, parsed.repeat)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,84 @@
+#!/usr/bin/env python
+"""
+Measure the import time of the CLI with ``python -X importtime``.
+
+Exits with status 1 if any heavy module which should be imported lazily
+is imported at startup, or if startup takes longer than ``--max-ms``.
+Run from the repository root with ``python benchmarks/bench_startup.py``.
+"""
+
+import argparse
+import os
+import subprocess
+import sys
+from pathlib import Path
+
+# only needed once a repository is actually used
+LAZY_MODULES = [
+    "pip",
+    "httpx",
+    "bs4",
+    "ijson",
+    "importlib.metadata",
+    "concurrent.futures.process",
+    "citepy.repos.common",
+]
+
+here = Path(__file__).absolute().parent
+
+
+def import_times(module):
+    """Cumulative import time in microseconds of each module imported."""
+    env = os.environ.copy()
+    env["PYTHONPATH"] = os.pathsep.join(
+        [str(here.parent)]
+        + [p for p in env.get("PYTHONPATH", "").split(os.pathsep) if p]
+    )
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        capture_output=True,
+        text=True,
+        env=env,
+        check=True,
+    )
+    out = dict()
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "|" not in line:
+            continue
+        _, cumulative, name = line.split("|")
+        try:
+            out[name.strip()] = int(cumulative)
+        except ValueError:
+            continue
+    return out
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--module", default="citepy.cli")
+    parser.add_argument("--repeat", "-r", type=int, default=5)
+    parser.add_argument(
+        "--max-ms", type=float, help="fail if startup takes longer than this"
+    )
+    parsed = parser.parse_args()
+
+    runs = [import_times(parsed.module) for _ in range(parsed.repeat)]
+    best = min(run[parsed.module] for run in runs) / 1000
+    print(f"import {parsed.module}: {best:.1f}ms (best of {parsed.repeat})")
+
+    failed = False
+    imported = set(runs[0])
+    for name in LAZY_MODULES:
+        if name in imported:
+            print(f"  {name} should not be imported at startup")
+            failed = True
+
+    if parsed.max_ms is not None and best > parsed.max_ms:
+        print(f"  slower than {parsed.max_ms}ms")
+        failed = True
+
+    sys.exit(1 if failed else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,294 @@
+#!/usr/bin/env python
+"""
+Local stand-in for PyPI, crates.io and CRAN, for benchmarking without a network.
+
+Serves synthetic responses for any package name
+(or recorded ones, from ``--record-dir``),
+with configurable latency and rate of transient errors.
+Package names starting with ``missing`` are not found.
+
+- PyPI: ``/pypi/{name}/json``, and ``/pypi/{name}/{version}/json``
+  which, like PyPI's, describes only that version and lists no releases
+- crates.io: ``/api/v1/crates/{name}``,
+  ``/api/v1/crates/{name}/{version}/authors``
+- CRAN: ``/package={name}``
+
+Successful responses have an ETag and ``Cache-Control: max-age``
+(``--max-age``, default 0 so that every cached response is revalidated),
+and requests whose If-None-Match matches are answered with 304.
+
+Recorded responses are read from ``{record_dir}/pypi/{name}.json``,
+``{record_dir}/crates/{name}.json`` and ``{record_dir}/cran/{name}.html``.
+
+Point citepy at it with e.g.
+``--repo-url pypi=http://127.0.0.1:8470/pypi --repo-url crates=http://127.0.0.1:8470
+--repo-url cran=http://127.0.0.1:8470``.
+"""
+
+import argparse
+import asyncio
+import datetime as dt
+import hashlib
+import json
+import random
+from pathlib import Path
+from typing import Optional, Tuple
+
+DEFAULT_PORT = 8470
+REASONS = {200: "OK", 304: "Not Modified", 404: "Not Found", 503: "Unavailable"}
+
+
+def pypi_document(name, n_releases=20) -> bytes:
+    start = dt.datetime(2010, 1, 1)
+    releases = dict()
+    for idx in range(n_releases):
+        time = (start + dt.timedelta(days=idx)).isoformat()
+        releases[f"1.{idx}.0"] = [
+            {
+                "filename": f"{name}-1.{idx}.0-py3-none-any.whl",
+                "upload_time": time,
+                "upload_time_iso_8601": time + "Z",
+            }
+        ]
+    version = f"1.{n_releases - 1}.0"
+    info = {
+        "name": name,
+        "version": version,
+        "author": "Some One",
+        "maintainer": None,
+        "home_page": f"https://github.com/someone/{name}",
+        "project_url": f"https://pypi.org/project/{name}/",
+        "summary": f"The {name} package",
+        "classifiers": ["Programming Language :: Python :: 3"],
+    }
+    return json.dumps(
+        {"info": info, "releases": releases, "urls": releases[version]}
+    ).encode()
+
+
+def pypi_version_document(document: bytes, version: str) -> Optional[bytes]:
+    """The versioned document for one release of a package, if it has one."""
+    data = json.loads(document)
+    if version not in data["releases"]:
+        return None
+    info = dict(data["info"], version=version)
+    return json.dumps({"info": info, "urls": data["releases"][version]}).encode()
+
+
+def etag(body: bytes) -> str:
+    return '"' + hashlib.sha256(body).hexdigest()[:16] + '"'
+
+
+def crates_document(name, n_releases=20) -> bytes:
+    start = dt.datetime(2015, 1, 1, tzinfo=dt.timezone.utc)
+    versions = []
+    for idx in reversed(range(n_releases)):
+        num = f"1.{idx}.0"
+        time = (start + dt.timedelta(days=idx)).isoformat()
+        versions.append(
+            {
+                "num": num,
+                "created_at": time,
+                "updated_at": time,
+                "links": {"authors": f"/api/v1/crates/{name}/{num}/authors"},
+            }
+        )
+    crate = {
+        "id": name,
+        "name": name,
+        "description": f"The {name} crate",
+        "homepage": None,
+        "documentation": None,
+        "repository": f"https://github.com/someone/{name}",
+        "max_version": versions[0]["num"],
+        "created_at": versions[-1]["created_at"],
+        "keywords": [],
+        "categories": [],
+    }
+    return json.dumps({"crate": crate, "versions": versions}).encode()
+
+
+def crates_authors(name) -> bytes:
+    return json.dumps({"users": [], "meta": {"names": ["Some One"]}}).encode()
+
+
+def cran_page(name) -> bytes:
+    return f"""<html><body>
+<h2>{name}: The {name} Package</h2>
+<p>Does {name} things.</p>
+<table summary="Package {name} summary">
+<tr><td>Version:</td><td>1.0.0</td></tr>
+<tr><td>Author:</td><td>Some One [aut, cre]</td></tr>
+<tr><td>Maintainer:</td><td>Some One &lt;someone at example.org&gt;</td></tr>
+<tr><td>Published:</td><td>2020-01-01</td></tr>
+<tr><td>URL:</td><td>https://github.com/someone/{name}</td></tr>
+</table></body></html>""".encode()
+
+
+class MockRepo:
+    def __init__(
+        self,
+        latency: float = 0.02,
+        error_rate: float = 0.0,
+        releases: int = 20,
+        record_dir: Optional[Path] = None,
+        max_age: int = 0,
+    ) -> None:
+        self.latency = latency
+        self.error_rate = error_rate
+        self.releases = releases
+        self.record_dir = record_dir
+        self.max_age = max_age
+        self.requests = 0
+        self.not_modified = 0
+
+    def _recorded(self, repo, name, suffix) -> Optional[bytes]:
+        if self.record_dir is None:
+            return None
+        path = self.record_dir / repo / (name + suffix)
+        return path.read_bytes() if path.is_file() else None
+
+    def route(self, path: str) -> Tuple[int, str, bytes]:
+        """Status, content type and body for a path."""
+        parts = path.strip("/").split("/")
+        name = None
+        body = None
+        content_type = "application/json"
+        if path == "/health":
+            return 200, content_type, b'{"status": "ok"}'
+        elif parts[0] == "pypi" and len(parts) in (3, 4) and parts[-1] == "json":
+            name = parts[1]
+            body = self._recorded("pypi", name, ".json") or pypi_document(
+                name, self.releases
+            )
+            if len(parts) == 4:
+                body = pypi_version_document(body, parts[2])
+        elif parts[:3] == ["api", "v1", "crates"] and len(parts) == 4:
+            name = parts[3]
+            body = self._recorded("crates", name, ".json") or crates_document(
+                name, self.releases
+            )
+        elif parts[:3] == ["api", "v1", "crates"] and parts[-1] == "authors":
+            name = parts[3]
+            body = crates_authors(name)
+        elif len(parts) == 1 and parts[0].startswith("package="):
+            name = parts[0][len("package=") :]
+            content_type = "text/html"
+            body = self._recorded("cran", name, ".html") or cran_page(name)
+
+        if body is None or name.startswith("missing"):
+            return 404, content_type, b'{"errors": [{"detail": "Not Found"}]}'
+        return 200, content_type, body
+
+    async def handle(self, reader, writer) -> None:
+        try:
+            while True:
+                request_line = await reader.readline()
+                if not request_line.strip():
+                    break
+                _, target, _ = request_line.decode("latin-1").split()
+                headers = dict()
+                while True:
+                    line = await reader.readline()
+                    if line in (b"\r\n", b"\n", b""):
+                        break
+                    key, _, value = line.decode("latin-1").partition(":")
+                    headers[key.strip().lower()] = value.strip()
+                self.requests += 1
+
+                if self.latency:
+                    await asyncio.sleep(self.latency * random.uniform(0.5, 1.5))
+                if target != "/health" and random.random() < self.error_rate:
+                    status, content_type, body = 503, "text/plain", b"Unavailable"
+                    extra = "Retry-After: 0\r\n"
+                else:
+                    status, content_type, body = self.route(target.split("?")[0])
+                    extra = ""
+                    if status == 200:
+                        tag = etag(body)
+                        extra = (
+                            f"ETag: {tag}\r\n"
+                            f"Cache-Control: max-age={self.max_age}\r\n"
+                        )
+                        if headers.get("if-none-match") == tag:
+                            status, body = 304, b""
+                            self.not_modified += 1
+
+                writer.write(
+                    (
+                        f"HTTP/1.1 {status} {REASONS.get(status, 'Error')}\r\n"
+                        f"Content-Type: {content_type}\r\n"
+                        f"Content-Length: {len(body)}\r\n"
+                        f"{extra}\r\n"
+                    ).encode("latin-1")
+                    + body
+                )
+                await writer.drain()
+        except (ConnectionError, ValueError):
+            pass
+        finally:
+            writer.close()
+
+    async def serve(self, host="127.0.0.1", port=DEFAULT_PORT) -> None:
+        server = await asyncio.start_server(self.handle, host, port, backlog=1024)
+        print(f"Serving mock repositories on http://{host}:{port}", flush=True)
+        async with server:
+            await server.serve_forever()
+
+
+def repo_urls(host="127.0.0.1", port=DEFAULT_PORT):
+    """``--repo-url`` arguments pointing citepy at a mock server."""
+    root = f"http://{host}:{port}"
+    return {"pypi": root + "/pypi", "crates": root, "cran": root}
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter
+    )
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", "-p", type=int, default=DEFAULT_PORT)
+    parser.add_argument(
+        "--latency",
+        type=float,
+        default=0.02,
+        help="mean seconds to wait before each response (default %(default)s)",
+    )
+    parser.add_argument(
+        "--error-rate",
+        type=float,
+        default=0.0,
+        help="fraction of requests answered with 503 (default %(default)s)",
+    )
+    parser.add_argument(
+        "--releases",
+        type=int,
+        default=20,
+        help="number of releases of each synthetic package (default %(default)s)",
+    )
+    parser.add_argument(
+        "--record-dir", type=Path, help="directory of recorded responses"
+    )
+    parser.add_argument(
+        "--max-age",
+        type=int,
+        default=0,
+        help="Cache-Control max-age of successful responses (default %(default)s)",
+    )
+    parsed = parser.parse_args()
+
+    repo = MockRepo(
+        parsed.latency,
+        parsed.error_rate,
+        parsed.releases,
+        parsed.record_dir,
+        parsed.max_age,
+    )
+    try:
+        asyncio.run(repo.serve(parsed.host, parsed.port))
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
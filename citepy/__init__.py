@@ -1,3 +1,6 @@
 from .version import version
+from .api import Citer
 
 __version__ = version
+
+__all__ = ["Citer"]
@@ -0,0 +1,310 @@
+"""Asynchronous API for citing packages from within other programs."""
+
+from __future__ import annotations
+
+import asyncio
+import datetime as dt
+import logging
+import time
+from concurrent.futures import Executor
+from typing import (
+    TYPE_CHECKING,
+    Any,
+    AsyncIterator,
+    Callable,
+    Dict,
+    Iterable,
+    List,
+    Optional,
+    Tuple,
+    Union,
+)
+
+from .cache import ResponseCache
+from .classes import CslItem
+from .limits import HostLimiter
+from .lockfiles import PackageSpec
+from .repos import KNOWN_FETCHERS
+from .retry import FetchFailure, RetryPolicy
+from .singleflight import SingleFlight
+from .phases import PhaseProfiler
+from .stats import RunStats
+from .store import ResultStore, with_accessed
+
+if TYPE_CHECKING:
+    import httpx
+
+    from .repos.common import DataFetcher
+
+logger = logging.getLogger(__name__)
+
+
+def respell(jso: Dict[str, Any], built_for: Any, package: str) -> Dict[str, Any]:
+    """A serialised item built for one spelling of a package's name, for another.
+
+    Package names are case-insensitive, so concurrent requests for
+    differently-spelt names share one fetch, and stored items are shared by
+    every spelling.
+    Fields which were given the spelling the item was built for
+    (its id, and for some repositories its title) take the requested one.
+    """
+    if built_for == package:
+        return jso
+    jso = dict(jso)
+    for key in ("id", "title"):
+        if jso.get(key) == built_for:
+            jso[key] = package
+    return jso
+
+
+class Citer:
+    """Cite packages from any known repository, reusing one HTTP client.
+
+    Use as an async context manager, which opens a pooled client
+    (unless one is given) and closes it on exit;
+    the client, response cache and repository fetchers are shared by every call
+    until then.
+
+    ``fetcher_kwargs`` maps repository names to keyword arguments for that
+    repository's ``DataFetcher``, which is created on first use;
+    ``executor``, ``stats`` and ``profiler`` are given to all of them.
+    ``transport`` is given to the client which the object opens,
+    e.g. to answer requests from a snapshot.
+    Items for pinned versions are looked up in, and added to, the ``store``.
+
+    .. code-block:: python
+
+        async with Citer() as citer:
+            item = await citer.cite("pypi", "numpy", "1.16.3")
+            async for item in citer.cite_many([("crates", "serde", None)]):
+                ...
+    """
+
+    def __init__(
+        self,
+        cache: Optional[ResponseCache] = None,
+        limiter: Optional[HostLimiter] = None,
+        retry: Optional[RetryPolicy] = None,
+        executor: Optional[Executor] = None,
+        fetcher_kwargs: Optional[Dict[str, Dict[str, Any]]] = None,
+        date_accessed: Optional[dt.date] = None,
+        client: Optional[httpx.AsyncClient] = None,
+        stats: Optional[RunStats] = None,
+        profiler: Optional[PhaseProfiler] = None,
+        transport: Optional[httpx.AsyncBaseTransport] = None,
+        store: Optional[ResultStore] = None,
+    ) -> None:
+        self.cache = cache
+        if limiter is None:
+            limiter = HostLimiter()
+        self.limiter = limiter
+        self.retry = retry
+        self.executor = executor
+        if fetcher_kwargs is None:
+            fetcher_kwargs = dict()
+        self.fetcher_kwargs = fetcher_kwargs
+        self.date_accessed = date_accessed
+        self.stats = stats
+        self.profiler = profiler
+
+        self.client = client
+        self.transport = transport
+        self.store = store
+        self._owns_client = client is None
+        self._fetchers: Dict[str, DataFetcher] = dict()
+        self.flights = SingleFlight()
+
+    async def __aenter__(self) -> Citer:
+        if self.client is None:
+            import httpx
+
+            limits = httpx.Limits(max_connections=self.limiter.jobs)
+            self.client = httpx.AsyncClient(limits=limits, transport=self.transport)
+            self._owns_client = True
+        return self
+
+    async def __aexit__(self, exc_type, exc_val, exc_tb) -> None:
+        await self.aclose()
+
+    async def aclose(self) -> None:
+        """Close the client, if it was opened by this object."""
+        if self._owns_client and self.client is not None:
+            await self.client.aclose()
+            self.client = None
+        self._fetchers.clear()
+
+    def fetcher(self, repo: str) -> DataFetcher:
+        """The shared ``DataFetcher`` for a repository."""
+        try:
+            return self._fetchers[repo]
+        except KeyError:
+            pass
+        if self.client is None:
+            raise RuntimeError("Citer must be entered with `async with` before use")
+        kwargs = dict(self.fetcher_kwargs.get(repo, {}))
+        kwargs.setdefault("executor", self.executor)
+        kwargs.setdefault("stats", self.stats)
+        kwargs.setdefault("profiler", self.profiler)
+        fetcher = KNOWN_FETCHERS[repo](
+            self.client, self.cache, self.limiter, self.retry, **kwargs
+        )
+        self._fetchers[repo] = fetcher
+        return fetcher
+
+    async def cite(
+        self,
+        repo: str,
+        package: str,
+        version: Optional[str] = None,
+        date_accessed: Optional[dt.date] = None,
+        check_store: bool = True,
+    ) -> CslItem:
+        """Fetch information for one package.
+
+        ``date_accessed`` defaults to that given to the constructor.
+        Concurrent calls for the same package share one fetch,
+        and so return the same item
+        (or a copy, if the name was spelt differently; see ``respell``).
+        Pinned versions are taken from the store if they are in it,
+        and added to it otherwise,
+        for repositories whose fetchers resolve versions;
+        unset ``check_store`` if the caller has already looked in the store.
+        """
+        if date_accessed is None:
+            date_accessed = self.date_accessed
+        fetcher = self.fetcher(repo)
+        key = (repo, package.lower(), version, date_accessed)
+        started = time.perf_counter()
+        ok = False
+        try:
+            built_for, item = await self.flights.do(
+                key, self._cite, fetcher, package, version, date_accessed, check_store
+            )
+            if built_for != package:
+                jso = respell(item.to_jso(validate=False), built_for, package)
+                item = CslItem.from_jso(jso, validate=False)
+            ok = True
+        finally:
+            if self.stats is not None:
+                seconds = time.perf_counter() - started
+                self.stats.record_package(repo, seconds, ok)
+        return item
+
+    async def _cite(
+        self,
+        fetcher: DataFetcher,
+        package: str,
+        version: Optional[str],
+        date_accessed: Optional[dt.date],
+        check_store: bool = True,
+    ) -> Tuple[str, CslItem]:
+        """The spelling of the package name the item was built for, and the item."""
+        if self.store is None or not version or not fetcher.resolves_versions:
+            return package, await fetcher.get(package, version, date_accessed)
+        if check_store:
+            jso = self.store.get(fetcher.repo, package, version)
+            if jso is not None:
+                jso = respell(with_accessed(jso, date_accessed), jso.get("id"), package)
+                return package, CslItem.from_jso(jso)
+        item = await fetcher.get(package, version, date_accessed)
+        self.store.put(fetcher.repo, package, version, item.to_jso())
+        return package, item
+
+    async def cite_many(
+        self,
+        specs: Iterable[PackageSpec],
+        ordered: bool = False,
+        window: Optional[int] = None,
+        failures: Optional[List[FetchFailure]] = None,
+        lookup: Optional[Callable[[str, str, Optional[str]], Any]] = None,
+        check_store: bool = True,
+    ) -> AsyncIterator[Union[CslItem, Any]]:
+        """Fetch information for many packages.
+
+        ``specs`` are ``(repo, package, version)`` tuples,
+        which are taken one at a time by ``limiter.jobs`` workers
+        (so may be lazily generated);
+        individual requests are further limited per host by the ``limiter``.
+        Items are yielded as soon as they are fetched, or in input order
+        if ``ordered`` is set.
+        At most ``window`` (default twice the number of jobs) packages are
+        in flight or waiting to be yielded at once,
+        which bounds the size of the reorder buffer.
+
+        By default, the first package which fails to be fetched raises an
+        exception.
+        If a ``failures`` list is given, failures are appended to it instead,
+        and the remaining packages are still yielded.
+
+        If ``lookup`` is given, it is called with each spec first;
+        anything it returns other than ``None`` is yielded (in place, if
+        ``ordered``) instead of fetching the package.
+        ``check_store`` is passed to ``cite``, e.g. unset if ``lookup`` has
+        already looked every package up in the store.
+        """
+        if window is None:
+            window = 2 * self.limiter.jobs
+
+        numbered = enumerate(specs)
+        done: asyncio.Queue = asyncio.Queue()
+        slots = asyncio.Semaphore(window)
+
+        async def worker():
+            while True:
+                await slots.acquire()
+                try:
+                    idx, (repo, k, v) = next(numbered)
+                except StopIteration:
+                    slots.release()
+                    done.put_nowait(None)
+                    return
+                except Exception as e:
+                    done.put_nowait((None, None, e))
+                    return
+                if lookup is not None:
+                    found = lookup(repo, k, v)
+                    if found is not None:
+                        if self.stats is not None:
+                            self.stats.record_reused(repo)
+                        done.put_nowait((idx, found, None))
+                        continue
+                try:
+                    item = await self.cite(repo, k, v, check_store=check_store)
+                except Exception as e:
+                    if failures is None:
+                        done.put_nowait((idx, None, e))
+                        return
+                    logger.warning("Failed to fetch %s from %s: %r", k, repo, e)
+                    failures.append(FetchFailure(repo, k, v, e))
+                    item = None
+                done.put_nowait((idx, item, None))
+
+        tasks = [asyncio.ensure_future(worker()) for _ in range(self.limiter.jobs)]
+        try:
+            buffer: Dict[int, Any] = dict()
+            next_idx = 0
+            running = len(tasks)
+            while running:
+                result = await done.get()
+                if result is None:
+                    running -= 1
+                    continue
+                idx, item, exc = result
+                if exc is not None:
+                    raise exc
+                if not ordered:
+                    slots.release()
+                    if item is not None:
+                        yield item
+                    continue
+                buffer[idx] = item
+                while next_idx in buffer:
+                    slots.release()
+                    item = buffer.pop(next_idx)
+                    next_idx += 1
+                    if item is not None:
+                        yield item
+        finally:
+            for task in tasks:
+                task.cancel()
+            await asyncio.gather(*tasks, return_exceptions=True)
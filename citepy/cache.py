@@ -0,0 +1,237 @@
+"""Persistent on-disk cache of HTTP responses from package repositories."""
+
+from __future__ import annotations
+
+import hashlib
+import json
+import logging
+import os
+import re
+import time
+from pathlib import Path
+from typing import TYPE_CHECKING, Any, Dict, Optional, Union
+
+if TYPE_CHECKING:
+    import httpx
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_MAX_SIZE = 256 * 1024**2
+STORED_HEADERS = ("content-type", "etag", "last-modified")
+
+max_age_re = re.compile(r"max-age=(?P<age>\d+)")
+
+
+def default_cache_dir() -> Path:
+    """``$XDG_CACHE_HOME/citepy``, falling back to ``~/.cache/citepy``."""
+    root = os.environ.get("XDG_CACHE_HOME") or Path.home() / ".cache"
+    return Path(root) / "citepy"
+
+
+def parse_max_age(cache_control: Optional[str]) -> Optional[int]:
+    if not cache_control or "no-store" in cache_control:
+        return None
+    if "no-cache" in cache_control:
+        return 0
+    m = max_age_re.search(cache_control)
+    if m is None:
+        return None
+    return int(m.group("age"))
+
+
+def normalise_url(url: str) -> str:
+    """A URL as httpx sends it (e.g. with a lowercase host),
+    so that it matches the URL of the request which fetched it.
+    """
+    import httpx
+
+    return str(httpx.URL(url))
+
+
+class CacheEntry:
+    def __init__(
+        self,
+        url: str,
+        content: bytes,
+        headers: Dict[str, str],
+        expires: Optional[float] = None,
+    ):
+        self.url = url
+        self.content = content
+        self.headers = headers
+        self.expires = expires
+
+    def is_fresh(self) -> bool:
+        return self.expires is not None and self.expires > time.time()
+
+    def validators(self) -> Dict[str, str]:
+        """Headers for a conditional request revalidating this entry."""
+        out = dict()
+        if "etag" in self.headers:
+            out["If-None-Match"] = self.headers["etag"]
+        if "last-modified" in self.headers:
+            out["If-Modified-Since"] = self.headers["last-modified"]
+        return out
+
+    def to_response(self, request: Optional[httpx.Request] = None) -> httpx.Response:
+        import httpx
+
+        if request is None:
+            request = httpx.Request("GET", self.url)
+        return httpx.Response(
+            200, content=self.content, headers=self.headers, request=request
+        )
+
+
+class ResponseCache:
+    """Size-bounded cache of response bodies keyed by URL.
+
+    Each entry is a body file and a JSON metadata file named after the hash of
+    the URL; the body's modification time records its last use, so that the
+    least recently used entries are evicted first once ``max_size`` bytes
+    of bodies are stored.
+    """
+
+    def __init__(
+        self, directory: Union[str, Path], max_size: int = DEFAULT_MAX_SIZE
+    ) -> None:
+        self.directory = Path(directory)
+        self.max_size = max_size
+        self._size: Optional[int] = None
+
+    def _paths(self, url: str):
+        """Paths of the metadata and body files for a normalised URL."""
+        key = hashlib.sha256(url.encode()).hexdigest()
+        return self.directory / (key + ".json"), self.directory / (key + ".body")
+
+    def get(self, url: str) -> Optional[CacheEntry]:
+        url = normalise_url(url)
+        meta_path, body_path = self._paths(url)
+        try:
+            with open(meta_path) as f:
+                meta = json.load(f)
+            content = body_path.read_bytes()
+        except (OSError, ValueError):
+            return None
+        if meta.get("url") != url:
+            return None
+        return CacheEntry(url, content, meta["headers"], meta.get("expires"))
+
+    def touch(self, url: str, expires: Optional[float] = None) -> None:
+        """Mark an entry as recently used, optionally extending its freshness."""
+        url = normalise_url(url)
+        meta_path, body_path = self._paths(url)
+        if expires is not None:
+            entry = self.get(url)
+            if entry is not None:
+                self._write_meta(meta_path, url, entry.headers, expires)
+        try:
+            os.utime(body_path)
+        except OSError:
+            pass
+
+    def put(self, response: httpx.Response) -> None:
+        url = str(response.request.url)
+        headers = {
+            k: response.headers[k] for k in STORED_HEADERS if k in response.headers
+        }
+        max_age = parse_max_age(response.headers.get("cache-control"))
+        if max_age is None and not {"etag", "last-modified"}.intersection(headers):
+            # nothing would let us reuse this safely
+            return
+        expires = None if max_age is None else time.time() + max_age
+
+        self.directory.mkdir(parents=True, exist_ok=True)
+        meta_path, body_path = self._paths(url)
+        content = response.content
+
+        old_size = body_path.stat().st_size if body_path.exists() else 0
+        tmp_path = body_path.with_suffix(f".{os.getpid()}.tmp")
+        tmp_path.write_bytes(content)
+        os.replace(tmp_path, body_path)
+        self._write_meta(meta_path, url, headers, expires)
+
+        if self._size is not None:
+            self._size += len(content) - old_size
+        self.evict()
+
+    def _write_meta(self, meta_path: Path, url, headers, expires) -> None:
+        tmp_path = meta_path.with_suffix(f".{os.getpid()}.tmp")
+        with open(tmp_path, "w") as f:
+            json.dump({"url": url, "headers": headers, "expires": expires}, f)
+        os.replace(tmp_path, meta_path)
+
+    def size(self) -> int:
+        if self._size is None:
+            self._size = sum(p.stat().st_size for p in self.directory.glob("*.body"))
+        return self._size
+
+    def evict(self) -> None:
+        """Remove least recently used entries until within ``max_size``."""
+        if self.size() <= self.max_size:
+            return
+
+        bodies = sorted(
+            ((p.stat(), p) for p in self.directory.glob("*.body")),
+            key=lambda sp: sp[0].st_mtime,
+        )
+        for stat, body_path in bodies:
+            if self._size <= self.max_size:
+                break
+            logger.debug("Evicting %s from cache", body_path.stem)
+            for path in (body_path, body_path.with_suffix(".json")):
+                try:
+                    path.unlink()
+                except OSError:
+                    pass
+            self._size -= stat.st_size
+
+    def clear(self) -> None:
+        for path in self.directory.glob("*.*"):
+            path.unlink()
+        self._size = 0
+
+
+class JsonLinesIndex:
+    """Persistent string-keyed store of facts which never change.
+
+    Entries are appended to a JSON-lines file as they are added,
+    so that concurrent runs can share the file; later lines win.
+    """
+
+    def __init__(self, path: Union[str, Path]) -> None:
+        self.path = Path(path)
+        self._data: Optional[Dict[str, Any]] = None
+
+    def _load(self) -> Dict[str, Any]:
+        if self._data is None:
+            self._data = dict()
+            try:
+                with open(self.path) as f:
+                    for line in f:
+                        try:
+                            key, value = json.loads(line)
+                        except ValueError:
+                            continue
+                        self._data[key] = value
+            except OSError:
+                pass
+        return self._data
+
+    def get(self, key: str, default=None):
+        return self._load().get(key, default)
+
+    def set(self, key: str, value) -> None:
+        data = self._load()
+        if data.get(key) == value:
+            return
+        data[key] = value
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        with open(self.path, "a") as f:
+            f.write(json.dumps([key, value]) + "\n")
+
+    def __contains__(self, key) -> bool:
+        return key in self._load()
+
+    def __len__(self) -> int:
+        return len(self._load())
@@ -1,12 +1,26 @@
 from __future__ import annotations
 from abc import ABC
 
+import inspect
 import json
+import warnings
+from contextlib import contextmanager
+from contextvars import ContextVar
 from datetime import date
 from enum import Enum
 from json import JSONDecodeError
 from numbers import Number
-from typing import Union, Optional, List, Any, Iterable, Dict
+from typing import (
+    Union,
+    Optional,
+    List,
+    Any,
+    Iterable,
+    Dict,
+    FrozenSet,
+    Tuple,
+    Callable,
+)
 
 from citepy.validate import (
     Validator,
@@ -20,24 +34,254 @@ StrNum = Union[str, Number]
 StrNumBool = Union[str, Number, bool]
 
 
+class ValidationPolicy(Enum):
+    """When CSL objects are validated against the CSL-data schema.
+
+    - ``OFF``: never
+    - ``CONSTRUCT``: every object, including nested names and dates,
+      as soon as it is constructed, and again when serialised
+    - ``OUTPUT``: once, when the outermost object is serialised
+    """
+
+    OFF = "off"
+    CONSTRUCT = "construct"
+    OUTPUT = "output"
+
+
+_validation_policy: ContextVar[ValidationPolicy] = ContextVar(
+    "validation_policy", default=ValidationPolicy.OUTPUT
+)
+
+
+def get_validation_policy() -> ValidationPolicy:
+    return _validation_policy.get()
+
+
+def set_validation_policy(policy: Union[str, ValidationPolicy]):
+    """Set the validation policy for the current context."""
+    _validation_policy.set(ValidationPolicy(policy))
+
+
+@contextmanager
+def validation_policy(policy: Union[str, ValidationPolicy]):
+    """Temporarily use a different validation policy."""
+    token = _validation_policy.set(ValidationPolicy(policy))
+    try:
+        yield
+    finally:
+        _validation_policy.reset(token)
+
+
+def _should_validate(validate: Optional[bool]) -> bool:
+    if validate is None:
+        return get_validation_policy() is not ValidationPolicy.OFF
+    return validate
+
+
+def _plain_to_jso(value):
+    if isinstance(value, (list, tuple)):
+        return [_plain_to_jso(item) for item in value]
+    return value
+
+
+def _plain_from_jso(value):
+    return value
+
+
+def _type_to_jso(value: CslType):
+    return value.value
+
+
+def _type_from_jso(value) -> CslType:
+    return CslType(value)
+
+
+def _names_to_jso(value: Iterable[CslName]):
+    return [name.to_jso(validate=False) for name in value]
+
+
+def _names_from_jso(value) -> List[CslName]:
+    return [CslName.from_jso(name, validate=False) for name in value]
+
+
+def _date_to_jso(value: CslDate):
+    return value.to_jso(validate=False)
+
+
+def _date_from_jso(value) -> CslDate:
+    return CslDate.from_jso(value, validate=False)
+
+
+class FieldKind(Enum):
+    """How a field is converted to and from its JSON-compatible form."""
+
+    PLAIN = (_plain_to_jso, _plain_from_jso)
+    TYPE = (_type_to_jso, _type_from_jso)
+    NAMES = (_names_to_jso, _names_from_jso)
+    DATE = (_date_to_jso, _date_from_jso)
+
+    def __init__(self, to_jso, from_jso):
+        self.to_jso = to_jso
+        self.from_jso = from_jso
+
+
 class CslObject(ABC):
+    """Base class for CSL objects.
+
+    Fields are the arguments to the subclass' ``__init__``.
+    Only fields which are set (i.e. not ``None``) are stored,
+    in a sparse dict rather than a per-instance ``__dict__``;
+    unset fields read as ``None``, and setting a field to ``None`` unsets it.
+
+    Objects can be frozen, after which they cannot be modified
+    and their canonical serialised form is cached for hashing and comparison.
+    """
+
+    __slots__ = ("_data", "_key")
     _validator: Validator
+    _fields: Tuple[str, ...] = ()
+    _field_set: FrozenSet[str] = frozenset()
+    _required: FrozenSet[str] = frozenset()
+
+    # CSL keys which are not simply the field name with - instead of _
+    _jso_keys: Dict[str, str] = dict()
+    # fields which are not plain JSON values
+    _field_kinds: Dict[str, FieldKind] = dict()
+
+    # converter tables built for each subclass
+    _to_jso_table: Dict[str, Tuple[str, Callable]] = dict()
+    _from_jso_table: Dict[str, Tuple[str, Callable]] = dict()
+
+    def __init_subclass__(cls, **kwargs):
+        super().__init_subclass__(**kwargs)
+        params = inspect.signature(cls.__init__).parameters
+        cls._fields = tuple(name for name in params if name != "self")
+        cls._field_set = frozenset(cls._fields)
+        cls._required = frozenset(
+            name
+            for name, param in params.items()
+            if name != "self" and param.default is inspect.Parameter.empty
+        )
 
-    def __init__(self, **kwargs):
-        self._check_types()
+        cls._to_jso_table = dict()
+        cls._from_jso_table = dict()
+        for name in cls._fields:
+            key = cls._jso_keys.get(name, name.replace("_", "-"))
+            kind = cls._field_kinds.get(name, FieldKind.PLAIN)
+            cls._to_jso_table[name] = (key, kind.to_jso)
+            cls._from_jso_table[key] = (name, kind.from_jso)
+
+    def __new__(cls, *args, **kwargs):
+        self = super().__new__(cls)
+        object.__setattr__(self, "_data", dict())
+        object.__setattr__(self, "_key", None)
+        return self
 
-    def to_jso(self):
-        out = py_to_jso(self.__dict__)
-        self._validator.validate(out)
+    def __init__(self, **kwargs):
+        if get_validation_policy() is ValidationPolicy.CONSTRUCT:
+            self._check_types()
+
+    def __getattr__(self, name):
+        # only called for names which are not found normally
+        if name in self._field_set:
+            return self._data.get(name)
+        raise AttributeError(f"{type(self).__name__} has no attribute '{name}'")
+
+    def __setattr__(self, name, value):
+        if self._key is not None:
+            raise AttributeError(f"Cannot set '{name}' of frozen {type(self).__name__}")
+        if name not in self._field_set:
+            raise AttributeError(f"{type(self).__name__} has no field '{name}'")
+        if value is None:
+            self._data.pop(name, None)
+        else:
+            self._data[name] = value
+
+    def __delattr__(self, name):
+        self.__setattr__(name, None)
+
+    def __getstate__(self):
+        return self._data, self._key
+
+    def __setstate__(self, state):
+        data, key = state
+        object.__setattr__(self, "_data", dict(data))
+        object.__setattr__(self, "_key", key)
+
+    @property
+    def frozen(self) -> bool:
+        return self._key is not None
+
+    def freeze(self):
+        """Make this object (and any nested objects) immutable, returning it.
+
+        Lists are converted to tuples.
+        """
+        if self._key is None:
+            for name, value in self._data.items():
+                self._data[name] = _freeze(value)
+            object.__setattr__(self, "_key", self._canonical_key())
+        return self
+
+    def _canonical_key(self) -> str:
+        return json.dumps(self.to_jso(validate=False), sort_keys=True)
+
+    def canonical_key(self) -> str:
+        """Serialised form used for hashing and comparison; cached if frozen."""
+        if self._key is None:
+            return self._canonical_key()
+        return self._key
+
+    def fields(self) -> Dict[str, Any]:
+        """Fields which are set, by python name."""
+        return self._data.copy()
+
+    def to_jso(self, validate: Optional[bool] = None):
+        """Serialise to a JSON-compatible object.
+
+        ``validate`` overrides the validation policy for this call.
+        Nested objects are not validated separately.
+        """
+        table = self._to_jso_table
+        out = dict()
+        for name, value in self._data.items():
+            key, convert = table[name]
+            out[key] = convert(value)
+        if _should_validate(validate):
+            self._validator.validate(out)
         return out
 
     @classmethod
-    def from_jso(cls, jso) -> CslObject:
-        cls._validator.validate(jso)
-        return cls(**jso_to_py(jso))
+    def from_jso(cls, jso, validate: Optional[bool] = None) -> CslObject:
+        if _should_validate(validate):
+            cls._validator.validate(jso)
+        table = cls._from_jso_table
+        # converted values need no further normalisation,
+        # so bypass the constructor and fill in the fields directly
+        obj = cls.__new__(cls)
+        data = obj._data
+        for key, value in jso.items():
+            try:
+                name, convert = table[key]
+            except KeyError:
+                raise ValueError(f"Unknown key for {cls.__name__}: '{key}'")
+            if value is not None:
+                data[name] = convert(value)
+
+        missing = cls._required.difference(data)
+        if missing:
+            raise ValueError(
+                f"Missing required keys for {cls.__name__}: {sorted(missing)}"
+            )
+        if get_validation_policy() is ValidationPolicy.CONSTRUCT:
+            obj._check_types()
+        return obj
+
+    def validate(self):
+        self._validator.validate(self.to_jso(validate=False))
 
     def _check_types(self):
-        self.to_jso()
+        self.validate()
         # type_hints = get_type_hints(self)
         # for attr_name, type_hint in type_hints.items():
         #     with suppress(KeyError):  # Assume un-annotated parameters can be any type
@@ -65,6 +309,9 @@ class CslObject(ABC):
         return json.dumps(self.to_jso())
 
     def __eq__(self, other):
+        if isinstance(other, CslObject) and self.frozen and other.frozen:
+            return self._key == other._key
+
         if isinstance(other, str):
             try:
                 other_jso = json.loads(other)
@@ -78,7 +325,16 @@ class CslObject(ABC):
         return self.to_jso() == other_jso
 
     def __hash__(self) -> int:
-        return hash(json.dumps(self.to_jso(), sort_keys=True))
+        # N.B. the hash of an unfrozen object changes if it is modified
+        return hash(self.canonical_key())
+
+
+def _freeze(value):
+    if isinstance(value, CslObject):
+        return value.freeze()
+    if isinstance(value, (list, tuple)):
+        return tuple(_freeze(item) for item in value)
+    return value
 
 
 class CslType(Enum):
@@ -118,18 +374,21 @@ class CslType(Enum):
     TREATY = "treaty"
     WEBPAGE = "webpage"
 
-    def to_jso(self):
+    def to_jso(self, validate: Optional[bool] = None):
         out = self.value
-        type_validator.validate(out)
+        if _should_validate(validate):
+            type_validator.validate(out)
         return out
 
     @classmethod
-    def from_jso(cls, value) -> CslType:
-        type_validator.validate(value)
+    def from_jso(cls, value, validate: Optional[bool] = None) -> CslType:
+        if _should_validate(validate):
+            type_validator.validate(value)
         return CslType(value)
 
 
 class CslName(CslObject):
+    __slots__ = ()
     _validator = name_validator
 
     def __init__(
@@ -158,6 +417,7 @@ class CslName(CslObject):
 
 
 class CslDate(CslObject):
+    __slots__ = ()
     _validator = date_validator
 
     def __init__(
@@ -239,7 +499,45 @@ def normalise_date(obj: Optional[ValidDate]) -> Optional[CslDate]:
 
 
 class CslItem(CslObject):
+    __slots__ = ()
     _validator = item_validator
+    _jso_keys = {
+        "journal_abbreviation": "journalAbbreviation",
+        "short_title": "shortTitle",
+        "archive_location": "archive_location",
+    }
+    _field_kinds = {
+        "type": FieldKind.TYPE,
+        **{
+            name: FieldKind.NAMES
+            for name in [
+                "author",
+                "collection_editor",
+                "composer",
+                "container_author",
+                "director",
+                "editor",
+                "editorial_director",
+                "interviewer",
+                "illustrator",
+                "original_author",
+                "recipient",
+                "reviewed_author",
+                "translator",
+            ]
+        },
+        **{
+            name: FieldKind.DATE
+            for name in [
+                "accessed",
+                "container",
+                "event_date",
+                "issued",
+                "original_date",
+                "submitted",
+            ]
+        },
+    }
 
     def __init__(
         self,
@@ -417,135 +715,60 @@ class CslItem(CslObject):
         super().__init__()
 
 
-jso_to_py_names = {
-    "article-journal": "article_journal",
-    "article-magazine": "article_magazine",
-    "article-newspaper": "article_newspaper",
-    "entry-dictionary": "entry_dictionary",
-    "entry-encyclopedia": "entry_encyclopedia",
-    "post-weblog": "post_weblog",
-    "review-book": "review_book",
-    "dropping-particle": "dropping_particle",
-    "non-dropping-particle": "non_dropping_particle",
-    "comma-suffix": "comma_suffix",
-    "static-ordering": "static_ordering",
-    "parse-names": "parse_names",
-    "journalAbbreviation": "journal_abbreviation",
-    "shortTitle": "short_title",
-    "collection-editor": "collection_editor",
-    "container-author": "container_author",
-    "editorial-director": "editorial_director",
-    "original-author": "original_author",
-    "reviewed-author": "reviewed_author",
-    "event-date": "event_date",
-    "original-date": "original_date",
-    "archive-location": "archive_location",
-    "archive-place": "archive_place",
-    "call-number": "call_number",
-    "chapter-number": "chapter_number",
-    "citation-number": "citation_number",
-    "citation-label": "citation_label",
-    "collection-number": "collection_number",
-    "collection-title": "collection_title",
-    "container-title": "container_title_short",
-    "date-parts": "date_parts",
-    "event-place": "event_place",
-    "first-reference-note-number": "first_reference_note_number",
-    "number-of-pages": "number_of_pages",
-    "number-of-volumes": "number_of_volumes",
-    "original-publisher": "original_publisher",
-    "original-place": "original_place",
-    "original-title": "original_title",
-    "page-first": "page_first",
-    "publisher-place": "publisher_place",
-    "reviewed-title": "reviewed_title",
-    "title-short": "title_short",
-    "year-suffix": "year_suffix",
-}
-py_to_jso_names = {v: k for k, v in jso_to_py_names.items()}
-
-
-class CslNameList:
-    @classmethod
-    def from_jso(cls, lst):
-        return [CslName.from_jso(item) for item in lst]
-
-
-name_to_class: Dict[str, Any] = {
-    "type": CslType,
-    "author": CslNameList,
-    "collection-editor": CslNameList,
-    "composer": CslNameList,
-    "container-author": CslNameList,
-    "director": CslNameList,
-    "editor": CslNameList,
-    "editorial-director": CslNameList,
-    "interviewer": CslNameList,
-    "illustrator": CslNameList,
-    "original-author": CslNameList,
-    "recipient": CslNameList,
-    "reviewed-author": CslNameList,
-    "translator": CslNameList,
-    "container": CslDate,
-    "event-date": CslDate,
-    "issued": CslDate,
-    "original-date": CslDate,
-    "submitted": CslDate,
-}
-
-
 def py_to_jso(obj: Any):
-    if obj is None:
-        return obj
-
-    if isinstance(obj, (bool, Number)):
-        return obj
-
-    if isinstance(obj, str):
-        return py_to_jso_names.get(obj, obj)
-
-    if isinstance(obj, list):
-        return [py_to_jso(item) for item in obj]
-
+    """Deprecated: use ``CslObject.to_jso``.
+
+    Convert a CSL object, or a dict of item fields by python name
+    (dropping unset ones), to a JSON-compatible object.
+    """
+    warnings.warn(
+        "py_to_jso is deprecated; use CslObject.to_jso",
+        DeprecationWarning,
+        stacklevel=2,
+    )
+    return _py_to_jso(obj)
+
+
+def _py_to_jso(obj: Any):
+    if isinstance(obj, (CslObject, CslType)):
+        return obj.to_jso()
+    if isinstance(obj, (list, tuple)):
+        return [_py_to_jso(item) for item in obj]
     if isinstance(obj, dict):
-        d = dict()
-        for k, v in obj.items():
-            if v is None:
-                continue
-            key = py_to_jso(k)
-            if isinstance(key, Number):
-                key = str(Number)
-            if not isinstance(key, str):
-                raise TypeError("Key of dict is not a string: cannot convert to JSO")
-            d[key] = py_to_jso(v)
-
-        return {str(py_to_jso(k)): py_to_jso(v) for k, v in d.items()}
-
-    return obj.to_jso()
+        table = CslItem._to_jso_table
+        return {
+            table[k][0] if k in table else k: _py_to_jso(v)
+            for k, v in obj.items()
+            if v is not None
+        }
+    return obj
 
 
 def jso_to_py(jso: Any):
-    if jso is None:
-        return jso
+    """Deprecated: use ``CslItem.from_jso``.
 
-    if isinstance(jso, (bool, Number)):
-        return jso
+    Convert a JSON-compatible item to a dict of fields by python name,
+    with names, dates and the type converted to CSL objects.
+    """
+    warnings.warn(
+        "jso_to_py is deprecated; use CslItem.from_jso",
+        DeprecationWarning,
+        stacklevel=2,
+    )
+    return _jso_to_py(jso)
 
-    if isinstance(jso, str):
-        return jso_to_py_names.get(jso, jso)
 
+def _jso_to_py(jso: Any):
     if isinstance(jso, list):
-        return [jso_to_py(item) for item in jso]
-
+        return [_jso_to_py(item) for item in jso]
     if isinstance(jso, dict):
-        d = dict()
-        for k, v in jso.items():
-            key = jso_to_py_names.get(k, k)
-            try:
-                val = name_to_class[k].from_jso(v)
-            except KeyError:
-                val = v
-            d[key] = val
-        return d
-
-    raise ValueError("Given object is not a valid CSL-JSON object")
+        table = CslItem._from_jso_table
+        out = dict()
+        for key, value in jso.items():
+            if key not in table:
+                out[key] = value
+                continue
+            name, convert = table[key]
+            out[name] = None if value is None else convert(value)
+        return out
+    return jso
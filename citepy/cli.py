@@ -6,111 +6,334 @@ import argparse
 import json
 import sys
 import logging
-from typing import Dict, Optional, Iterable
-import re
-from contextlib import contextmanager
-from pip._internal.operations.freeze import freeze as pip_freeze
+from typing import (
+    TYPE_CHECKING,
+    Any,
+    AsyncIterator,
+    Dict,
+    Iterable,
+    List,
+    Optional,
+    Tuple,
+    Union,
+)
+from contextlib import contextmanager, nullcontext
+from itertools import chain, islice
 import asyncio
 import datetime as dt
 import os
-
-import httpx
+import time
+from pathlib import Path
 
 from . import __version__
+from .cache import ResponseCache, JsonLinesIndex, DEFAULT_MAX_SIZE, default_cache_dir
 from .repos import KNOWN_FETCHERS
-from .classes import CslItem
+from .api import Citer, respell
+from .lockfiles import PackageSpec, check_lockfile, read_lockfiles
+from .options import parse_package_spec, parse_repo_url, parse_size, setup_logging
+from .classes import CslItem, ValidationPolicy, set_validation_policy
+from .dump import (  # noqa: F401
+    Dumper,
+    dumper_classes,
+    dumpers,
+    dump_csl_json_lines,
+    dump_csl_json_pretty,
+    dump_csl_json_min,
+)
+from .retry import (
+    RetryPolicy,
+    FetchFailure,
+    DEFAULT_RETRIES,
+    DEFAULT_MAX_RETRY_AFTER,
+)
+from .phases import PhaseProfiler
+from .previous import PreviousItems
+from .stats import RunStats
+from .store import ResultStore, default_store_path, store_key, with_accessed
+from .limits import (
+    HostLimiter,
+    DEFAULT_JOBS,
+    DEFAULT_PER_HOST,
+    DEFAULT_HOST_LIMITS,
+    parse_host_limit,
+)
+
+if TYPE_CHECKING:
+    import httpx
 
 logger = logging.getLogger(__name__)
 
 DATE_ACCESSED_VAR = "CITEPY_DATE_ACCESSED"
 DEFAULT_DATE_STR = os.environ.get(DATE_ACCESSED_VAR, dt.date.today().isoformat())
 DEFAULT_DUMPER = "csl-json/pretty"
+# number of packages looked up in the result store at once
+STORE_BATCH_SIZE = 256
 
 
 def get_pypi_versions() -> Dict[str, Optional[str]]:
-    """Get versions from ``pip freeze``"""
-    d = dict()
-    for line in pip_freeze():
-        try:
-            k, v = line.strip().split("==")
-        except ValueError:
-            continue
-        d[k] = v
+    """Get versions of installed distributions, like ``pip freeze``"""
+    try:
+        from importlib.metadata import distributions
+    except ImportError:  # python < 3.8
+        from importlib_metadata import distributions
+
+    d: Dict[str, Optional[str]] = dict()
+    for dist in distributions():
+        name = dist.metadata["Name"]
+        if name and name not in d:
+            d[name] = dist.version
     return d
 
 
-def setup_logging(verbosity):
-    verbosity = verbosity or 0
-    levels = [
-        logging.CRITICAL,
-        logging.WARNING,
-        logging.INFO,
-        logging.DEBUG,
-        logging.NOTSET,
+def split_package_specs(packages, default_repo: str) -> Iterable[PackageSpec]:
+    """Parse package strings with ``parse_package_spec``, skipping invalid ones.
+
+    ``-`` reads a newline-separated list of package strings from stdin.
+    """
+    for s in packages:
+        if s.strip() == "-":
+            yield from split_package_specs(sys.stdin.readlines(), default_repo)
+            continue
+        spec = parse_package_spec(s, default_repo)
+        if spec is not None:
+            yield spec
+
+
+def split_package_versions(packages):
+    for _, name, ver in split_package_specs(packages, "pypi"):
+        yield name, ver
+
+
+async def iter_specs(
+    specs: Iterable[PackageSpec],
+    date: dt.date = None,
+    cache: Optional[ResponseCache] = None,
+    limiter: Optional[HostLimiter] = None,
+    ordered: bool = False,
+    window: Optional[int] = None,
+    retry: Optional[RetryPolicy] = None,
+    failures: Optional[List[FetchFailure]] = None,
+    fetcher_kwargs: Optional[Dict[str, Dict[str, Any]]] = None,
+    stats: Optional[RunStats] = None,
+    profiler: Optional[PhaseProfiler] = None,
+    previous: Optional[PreviousItems] = None,
+    transport: Optional["httpx.AsyncBaseTransport"] = None,
+    store: Optional[ResultStore] = None,
+) -> AsyncIterator[Union[CslItem, Dict[str, Any]]]:
+    """Fetch information for many packages from any repositories.
+
+    See ``Citer.cite_many``; ``fetcher_kwargs`` maps repository names
+    to keyword arguments for that repository's ``DataFetcher``.
+    If ``stats`` is given, requests, parsing and packages are recorded in it;
+    if ``profiler`` is given, time spent parsing is.
+    Pinned packages found in ``previous`` are yielded as their previously
+    serialised items, without being fetched.
+    Requests are sent through ``transport``, if given.
+    If there is a ``store``, pinned packages are looked up in it
+    ``STORE_BATCH_SIZE`` at a time as they are read,
+    and stored items are yielded serialised;
+    other pinned packages are added to it.
+    """
+    stored: Dict[Tuple[str, str, str], Dict[str, Any]] = dict()
+    if store is not None:
+        specs = _look_up_batches(specs, store, stored)
+
+    def lookup(repo, package, version):
+        if previous is not None:
+            jso = previous.get(repo, package, version)
+            if jso is not None:
+                return jso
+        if version and stored:
+            jso = stored.get(store_key(repo, package, version))
+            if jso is not None:
+                return with_accessed(respell(jso, jso.get("id"), package), date)
+        return None
+
+    async with Citer(
+        cache,
+        limiter,
+        retry,
+        fetcher_kwargs=fetcher_kwargs,
+        date_accessed=date,
+        stats=stats,
+        profiler=profiler,
+        transport=transport,
+        store=store,
+    ) as citer:
+        # every pinned package was looked up in its batch, so misses are not
+        # looked up again one at a time
+        items = citer.cite_many(
+            specs, ordered, window, failures, lookup, check_store=False
+        )
+        async for item in items:
+            yield item
+
+
+def _look_up_batches(
+    specs: Iterable[PackageSpec],
+    store: ResultStore,
+    stored: Dict[Tuple[str, str, str], Dict[str, Any]],
+) -> Iterable[PackageSpec]:
+    """Yield specs, replacing the contents of ``stored`` with the stored items
+    for each batch before it is yielded.
+
+    Workers look up each spec as soon as they take it,
+    so the previous batch's items are no longer needed.
+    """
+    specs = iter(specs)
+    while True:
+        batch = list(islice(specs, STORE_BATCH_SIZE))
+        if not batch:
+            return
+        stored.clear()
+        stored.update(
+            store.get_many(
+                spec for spec in batch if KNOWN_FETCHERS[spec[0]].resolves_versions
+            )
+        )
+        yield from batch
+
+
+async def iter_info(
+    package_versions: Dict[str, Optional[str]],
+    repo: str,
+    date: dt.date = None,
+    cache: Optional[ResponseCache] = None,
+    limiter: Optional[HostLimiter] = None,
+    ordered: bool = False,
+    window: Optional[int] = None,
+    retry: Optional[RetryPolicy] = None,
+    failures: Optional[List[FetchFailure]] = None,
+    fetcher_kwargs: Optional[Dict[str, Any]] = None,
+    stats: Optional[RunStats] = None,
+) -> AsyncIterator[CslItem]:
+    """Fetch information for many packages from one repository.
+
+    See ``iter_specs``; ``fetcher_kwargs`` are passed to the repository's
+    ``DataFetcher``.
+    """
+    items = iter_specs(
+        ((repo, k, v) for k, v in package_versions.items()),
+        date,
+        cache,
+        limiter,
+        ordered,
+        window,
+        retry,
+        failures,
+        {repo: fetcher_kwargs or {}},
+        stats,
+    )
+    async for item in items:
+        yield item
+
+
+async def get_info(
+    package_versions: Dict[str, Optional[str]],
+    repo: str,
+    date: dt.date = None,
+    cache: Optional[ResponseCache] = None,
+    limiter: Optional[HostLimiter] = None,
+    retry: Optional[RetryPolicy] = None,
+    failures: Optional[List[FetchFailure]] = None,
+    fetcher_kwargs: Optional[Dict[str, Any]] = None,
+    stats: Optional[RunStats] = None,
+) -> List[CslItem]:
+    """Fetch information for many packages, returned in input order."""
+    return [
+        item
+        async for item in iter_info(
+            package_versions,
+            repo,
+            date,
+            cache,
+            limiter,
+            ordered=True,
+            retry=retry,
+            failures=failures,
+            fetcher_kwargs=fetcher_kwargs,
+            stats=stats,
+        )
     ]
-    logging.basicConfig(level=levels[min(verbosity + 1, len(levels) - 1)])
 
-    loud_level = levels[min(verbosity, len(levels) - 1)]
-    for name in ["pip", "urllib3", "websockets"]:
-        logging.getLogger(name).setLevel(loud_level)
+
+async def write_info(
+    items: AsyncIterator[Union[CslItem, Dict[str, Any]]],
+    dumper: Dumper,
+    stats: Optional[RunStats] = None,
+    profiler: Optional[PhaseProfiler] = None,
+):
+    """Write each item as it arrives, recording the time spent writing.
+
+    Items which are already serialised are written verbatim.
+    """
+    if profiler is None:
+        profiler = PhaseProfiler()
+    with dumper:
+        async for item in items:
+            started = time.perf_counter()
+            if isinstance(item, dict):
+                jso = item
+            else:
+                # serialising also validates, depending on the policy
+                with profiler.phase("serialise", cpu_bound=True):
+                    jso = item.to_jso()
+            with profiler.phase("dump", cpu_bound=True):
+                dumper.write_jso(jso)
+            if stats is not None:
+                stats.record_dump(time.perf_counter() - started)
 
 
-name_re = re.compile(
-    r"^(?P<name>(\w[\w\d\._-]*))\s*((?P<rel>[=><!~^]{1,2})\s*(?P<ver>[\d\.\*\w-]+))?$"
-)
+def parse_executor(workers: int, pool: str = "process"):
+    """Executor for CPU-bound parsing, or a null context if ``workers`` is 0."""
+    if not workers:
+        return nullcontext()
+    if pool == "thread":
+        from concurrent.futures import ThreadPoolExecutor
 
+        return ThreadPoolExecutor(workers)
 
-def split_package_versions(packages):
-    for s in packages:
-        s = s.strip()
-        if s == "-":
-            yield from split_package_versions(sys.stdin.readlines())
-            continue
+    from concurrent.futures import ProcessPoolExecutor
 
-        m = name_re.match(s)
-        if m is None:
-            logger.warning("Could not parse '%s'; skipping", s)
-            continue
+    return ProcessPoolExecutor(workers)
 
-        g = m.groupdict()
-        name = g["name"]
-        rel = g["rel"]
-        ver = g["ver"]
 
-        if rel:
-            if set(rel) == {"="} and len(rel) <= 2:
-                yield name, ver
-                continue
-            else:
-                logger.warning(
-                    f"Unsupported package-version relationship '{rel}'; "
-                    "ignoring version"
-                )
-        yield name, None
+def write_error_report(failures: List[FetchFailure], path):
+    write_json([failure.to_jso() for failure in failures], path)
 
 
-async def get_info(
-    package_versions: Dict[str, Optional[str]], repo: str, date: dt.date = None
-):
-    fetcher_cls = KNOWN_FETCHERS[repo]
-    # sem = asyncio.Semaphore(jobs)
-    futs = []
-    async with httpx.AsyncClient() as c:
-        fetcher = fetcher_cls(c)
-        for k, v in package_versions.items():
-            # async with sem:
-            futs.append(fetcher.get(k, v, date))
-        results = await asyncio.gather(*futs)
-    return results
+def write_json(jso, path):
+    """Write a JSON report to a path, or stderr if the path is ``-``."""
+    if path == "-":
+        json.dump(jso, sys.stderr, indent=2)
+        sys.stderr.write("\n")
+        return
+    with open(path, "w") as f:
+        json.dump(jso, f, indent=2)
+        f.write("\n")
 
 
 @contextmanager
 def outfile(obj):
+    """Stream to stdout, or write a path atomically.
+
+    A path is written to a temporary file beside it, which only replaces it
+    once the output is complete, so a failed run leaves any existing file
+    (e.g. the ``--previous`` output) untouched.
+    """
     if not obj or obj == "-":
         yield sys.stdout
-    else:
-        with open(obj, "w") as f:
+        return
+    path = Path(obj)
+    tmp_path = path.with_name(f".{path.name}.{os.getpid()}.tmp")
+    f = open(tmp_path, "w")
+    try:
+        with f:
             yield f
+    except BaseException:
+        tmp_path.unlink()
+        raise
+    os.replace(tmp_path, path)
 
 
 @contextmanager
@@ -145,39 +368,45 @@ def read_packages(args):
                 yield stripped
 
 
-def dump_csl_json_lines(items: Iterable[CslItem], f):
-    for item in items:
-        print(json.dumps(item.to_jso(), sort_keys=True), file=f)
+def main(args=None, export_snapshot=None):
+    """Run the CLI.
 
+    If ``export_snapshot`` is given, every response is recorded in a snapshot
+    at that path, and the response cache is not used.
+    """
+    if args is None:
+        args = sys.argv[1:]
+    if args[:1] == ["serve"]:
+        from .server import main as serve
 
-def dump_csl_json_pretty(items: Iterable[CslItem], f):
-    json.dump([item.to_jso() for item in items], f, sort_keys=True, indent=2)
-    f.write("\n")
-
-
-def dump_csl_json_min(items: Iterable[CslItem], f):
-    json.dump(
-        [item.to_jso() for item in items], f, sort_keys=True, separators=(",", ":")
-    )
-    f.write("\n")
-
+        return serve(args[1:])
+    if args[:1] == ["snapshot"]:
+        from .snapshot import main as snapshot
 
-dumpers = {
-    "csl-json/lines": dump_csl_json_lines,
-    "csl-json/pretty": dump_csl_json_pretty,
-    "csl-json/min": dump_csl_json_min,
-}
+        return snapshot(args[1:])
+    if args[:1] == ["store"]:
+        from .store import main as store
 
+        return store(args[1:])
 
-def main():
-    parser = argparse.ArgumentParser(description=__doc__)
+    parser = argparse.ArgumentParser(
+        description=__doc__,
+        epilog=(
+            "Run `citepy serve --help` for a long-running HTTP server, "
+            "`citepy snapshot --help` for snapshots to run --offline, "
+            "and `citepy store --help` to manage the store of finished items. "
+            "To cite a PyPI package called 'serve', 'snapshot' or 'store', "
+            "use e.g. 'pypi:serve'."
+        ),
+    )
     parser.add_argument(
         "package",
         nargs="*",
         help=(
             "names of packages you want to cite, "
-            "optionally with (full) version string. "
-            "e.g. 'numpy==1.16.3' 'beautifulsoup4==4.7.1' . "
+            "optionally with (full) version string, "
+            "and optionally prefixed with a repository and a colon. "
+            "e.g. 'numpy==1.16.3' 'beautifulsoup4==4.7.1' 'crates:serde==1.0.0' . "
             "Note that version strings are handled differently "
             "by different repositories, and may be ignored. "
             "In particular, any non-exact version constraint is ignored. "
@@ -198,7 +427,10 @@ def main():
         "-r",
         default="pypi",
         choices=sorted(KNOWN_FETCHERS),
-        help="which package repository to use (default pypi)",
+        help=(
+            "which package repository to use for packages not prefixed "
+            "with one (default pypi)"
+        ),
     )
     parser.add_argument(
         "--infile",
@@ -209,6 +441,61 @@ def main():
             "(can be given multiple times; - reads from stdin)"
         ),
     )
+    parser.add_argument(
+        "--lockfile",
+        "-l",
+        action="append",
+        default=[],
+        help=(
+            "path to a lockfile to read pinned packages from, "
+            "streamed straight into the fetch pipeline "
+            "(can be given multiple times; "
+            "requirements*.txt, poetry.lock, Pipfile.lock, Cargo.lock "
+            "and renv.lock are supported)"
+        ),
+    )
+    parser.add_argument(
+        "--cran-index",
+        metavar="PATH_OR_URL",
+        help=(
+            "look up CRAN packages in a DCF index (optionally gzipped) "
+            "downloaded or read once, only fetching package pages "
+            "for packages lacking a Title, Version or Published field; "
+            "e.g. written from R's tools::CRAN_package_db() with write.dcf "
+            "(CRAN's own PACKAGES file lacks these fields)"
+        ),
+    )
+    parser.add_argument(
+        "--local-metadata",
+        action="store_true",
+        help=(
+            "read metadata of PyPI packages from installed distributions "
+            "(where the installed version is the one requested) "
+            "rather than fetching it, only using PyPI for upload dates"
+        ),
+    )
+    parser.add_argument(
+        "--repo-url",
+        action="append",
+        type=parse_repo_url,
+        default=[],
+        metavar="REPO=URL",
+        help=(
+            "base URL of a repository's API, e.g. for a mirror "
+            "(can be given multiple times)"
+        ),
+    )
+    parser.add_argument(
+        "--previous",
+        metavar="PATH",
+        help=(
+            "path to an earlier CSL-JSON output (in any format); "
+            "packages with a pinned version matching an item's id and version "
+            "reuse that item verbatim rather than being fetched "
+            "(may be the same as --outfile, which is only replaced once the run "
+            "succeeds)"
+        ),
+    )
     parser.add_argument(
         "--outfile",
         "-o",
@@ -218,9 +505,27 @@ def main():
         "--format",
         "-f",
         default=DEFAULT_DUMPER,
-        choices=sorted(dumpers),
+        choices=sorted(dumper_classes),
         help=f"format to write out (default '{DEFAULT_DUMPER}')",
     )
+    parser.add_argument(
+        "--keep-order",
+        action="store_true",
+        help=(
+            "write items in the order packages were given, "
+            "rather than as soon as each is fetched"
+        ),
+    )
+    parser.add_argument(
+        "--validate",
+        default=ValidationPolicy.OUTPUT.value,
+        choices=[p.value for p in ValidationPolicy],
+        help=(
+            "when to validate items against the CSL-data schema: "
+            "never, as each object is constructed, "
+            "or once per item on output (default)"
+        ),
+    )
     parser.add_argument(
         "--verbose",
         "-v",
@@ -238,39 +543,321 @@ def main():
             "then today's date."
         ),
     )
+    parser.add_argument(
+        "--jobs",
+        "-j",
+        type=int,
+        default=DEFAULT_JOBS,
+        help=(
+            "maximum number of packages to fetch and requests to make "
+            f"concurrently (default {DEFAULT_JOBS})"
+        ),
+    )
+    parser.add_argument(
+        "--per-host",
+        type=int,
+        default=DEFAULT_PER_HOST,
+        help=(
+            "maximum number of concurrent requests to any one host "
+            f"(default {DEFAULT_PER_HOST})"
+        ),
+    )
+    parser.add_argument(
+        "--host-limit",
+        action="append",
+        type=parse_host_limit,
+        default=[],
+        metavar="HOST=N",
+        help=(
+            "maximum number of concurrent requests to the given host "
+            "and its subdomains (can be given multiple times; "
+            "crates.io=2 unless otherwise specified)"
+        ),
+    )
+    parser.add_argument(
+        "--parse-workers",
+        type=int,
+        default=0,
+        help=(
+            "number of workers with which to parse responses and build items "
+            "off the event loop (default 0, i.e. parse inline)"
+        ),
+    )
+    parser.add_argument(
+        "--parse-pool",
+        choices=["process", "thread"],
+        default="process",
+        help="kind of worker pool used by --parse-workers (default process)",
+    )
+    parser.add_argument(
+        "--retries",
+        type=int,
+        default=DEFAULT_RETRIES,
+        help=(
+            "how many times to retry a request after a transient error, "
+            "with exponential backoff respecting Retry-After "
+            f"(default {DEFAULT_RETRIES})"
+        ),
+    )
+    parser.add_argument(
+        "--retry-budget",
+        type=int,
+        help="maximum number of retries across the whole run (default unlimited)",
+    )
+    parser.add_argument(
+        "--max-retry-after",
+        type=float,
+        default=DEFAULT_MAX_RETRY_AFTER,
+        metavar="SECONDS",
+        help=(
+            "longest Retry-After to wait for; "
+            "requests asked to wait longer fail rather than retry early "
+            "(default %(default)s)"
+        ),
+    )
+    parser.add_argument(
+        "--keep-going",
+        "-k",
+        action="store_true",
+        help=(
+            "write out the packages which could be fetched even if others fail, "
+            "exiting with status 1 if any failed"
+        ),
+    )
+    parser.add_argument(
+        "--error-report",
+        help=(
+            "path to write a JSON list of packages which could not be fetched "
+            "(implies --keep-going; - writes to stderr)"
+        ),
+    )
+    parser.add_argument(
+        "--stats",
+        metavar="PATH",
+        help=(
+            "path to write a JSON summary of the run: per-repository requests, "
+            "statuses, bytes, retries, cache use, and percentiles of request, "
+            "parsing and package times (- writes to stderr)"
+        ),
+    )
+    parser.add_argument(
+        "--profile",
+        metavar="PATH",
+        help=(
+            "path to write JSON timings of the phases of the run: "
+            "reading input, finding installed versions, the whole fetch, "
+            "and within it parsing responses into items, "
+            "serialising (and validating) items, dumping them, "
+            "and the rest (HTTP client, event loop and waiting on the network) "
+            "(- writes to stderr)"
+        ),
+    )
+    parser.add_argument(
+        "--profile-cpu",
+        metavar="PATH",
+        help=(
+            "path to write cProfile statistics of the CPU-bound phases "
+            "(parsing, serialising and dumping; inline parsing only), "
+            "readable with `python -m pstats`"
+        ),
+    )
+    parser.add_argument(
+        "--cache-dir",
+        type=Path,
+        default=default_cache_dir(),
+        help=(
+            "directory in which to cache repository responses, "
+            "and store finished items for pinned versions "
+            "(default $XDG_CACHE_HOME/citepy or ~/.cache/citepy)"
+        ),
+    )
+    parser.add_argument(
+        "--cache-max-size",
+        type=parse_size,
+        default=DEFAULT_MAX_SIZE,
+        help="maximum size of the response cache, e.g. '500M' (default 256M)",
+    )
+    parser.add_argument(
+        "--no-cache",
+        action="store_true",
+        help=(
+            "neither read from nor write to the response cache "
+            "or the store of finished items"
+        ),
+    )
+    parser.add_argument(
+        "--offline",
+        action="store_true",
+        help=(
+            "answer every request from a snapshot (see `citepy snapshot`) "
+            "rather than the network; the response cache is not used"
+        ),
+    )
+    parser.add_argument(
+        "--snapshot",
+        type=Path,
+        metavar="PATH",
+        help=(
+            "snapshot to use with --offline "
+            "(default the one installed by `citepy snapshot import`)"
+        ),
+    )
     parser.add_argument(
         "--version", action="store_true", help="print version information and exit"
     )
 
-    parsed = parser.parse_args()
+    parsed = parser.parse_args(args)
 
     setup_logging(parsed.verbose)
+    set_validation_policy(parsed.validate)
 
     if parsed.version:
         print(__version__)
         sys.exit(0)
 
-    parsed.package.extend(read_packages(parsed.infile))
-
-    if parsed.repo == "pypi":
-        versions = get_pypi_versions()
-        if parsed.package:
-            package_versions = {
-                p: v or versions.get(p)
-                for p, v in split_package_versions(parsed.package)
+    # always time phases, as it is cheap
+    profiler = PhaseProfiler(cprofile=bool(parsed.profile_cpu))
+
+    with profiler.phase("input"):
+        # before the outfile, which may be the same file, is replaced
+        previous = None
+        if parsed.previous:
+            try:
+                previous = PreviousItems.from_path(parsed.previous)
+            except (OSError, ValueError) as e:
+                parser.error(f"could not read previous output: {e}")
+        # lockfiles are read lazily during the run, so fail early on bad paths
+        for path in parsed.lockfile:
+            try:
+                check_lockfile(path)
+            except (OSError, ValueError) as e:
+                parser.error(f"could not read lockfile: {e}")
+        parsed.package.extend(read_packages(parsed.infile))
+        specs: Dict[Tuple[str, str], Optional[str]] = {
+            (repo, name): ver
+            for repo, name, ver in split_package_specs(parsed.package, parsed.repo)
+        }
+
+    with profiler.phase("versions"):
+        if not parsed.package and not parsed.lockfile and parsed.repo == "pypi":
+            specs = {("pypi", p): v for p, v in get_pypi_versions().items()}
+        elif any(repo == "pypi" and not v for (repo, _), v in specs.items()):
+            versions = get_pypi_versions()
+            specs = {
+                (repo, p): v or (versions.get(p) if repo == "pypi" else None)
+                for (repo, p), v in specs.items()
             }
-        else:
-            package_versions = versions
+
+    transport = None
+    writer = None
+    if parsed.offline:
+        import zipfile
+
+        from .snapshot import Snapshot, SnapshotTransport, default_snapshot_path
+
+        path = parsed.snapshot or default_snapshot_path(parsed.cache_dir)
+        try:
+            transport = SnapshotTransport(Snapshot(path))
+        except (OSError, ValueError, zipfile.BadZipFile) as e:
+            parser.error(f"could not open snapshot: {e}")
+        parsed.no_cache = True
+    elif export_snapshot is not None:
+        import httpx
+
+        from .snapshot import RecordingTransport, SnapshotWriter
+
+        writer = SnapshotWriter(export_snapshot)
+        limits = httpx.Limits(max_connections=parsed.jobs)
+        transport = RecordingTransport(writer, httpx.AsyncHTTPTransport(limits=limits))
+        # everything the snapshot needs to answer must come from the network
+        parsed.no_cache = True
+        parsed.local_metadata = False
+
+    if parsed.no_cache:
+        cache = None
+        store = None
     else:
-        package_versions = dict(split_package_versions(parsed.package))
+        cache = ResponseCache(parsed.cache_dir / "responses", parsed.cache_max_size)
+        store = ResultStore(default_store_path(parsed.cache_dir))
 
-    csl_items = asyncio.run(
-        get_info(package_versions, parsed.repo, parsed.date_accessed)
-    )
-    with outfile(parsed.outfile) as f:
-        dumpers[parsed.format](csl_items, f)
+    host_limits = DEFAULT_HOST_LIMITS.copy()
+    host_limits.update(parsed.host_limit)
+    limiter = HostLimiter(parsed.jobs, parsed.per_host, host_limits)
 
-    parser.exit(0)
+    retry = RetryPolicy(
+        parsed.retries,
+        budget=parsed.retry_budget,
+        max_retry_after=parsed.max_retry_after,
+    )
+    fetcher_kwargs: Dict[str, Dict[str, Any]] = {
+        repo: dict() for repo in KNOWN_FETCHERS
+    }
+    for repo, url in parsed.repo_url:
+        fetcher_kwargs[repo]["base_url"] = url
+    if parsed.cran_index:
+        fetcher_kwargs["cran"]["index"] = parsed.cran_index
+    fetcher_kwargs["pypi"]["local_metadata"] = parsed.local_metadata
+    if not parsed.no_cache:
+        fetcher_kwargs["pypi"]["first_releases"] = JsonLinesIndex(
+            parsed.cache_dir / "pypi-first-release.jsonl"
+        )
+        fetcher_kwargs["pypi"]["upload_times"] = JsonLinesIndex(
+            parsed.cache_dir / "pypi-upload-times.jsonl"
+        )
+    stats = RunStats() if parsed.stats else None
+    if parsed.keep_going or parsed.error_report:
+        failures: Optional[List[FetchFailure]] = []
+    else:
+        failures = None
+
+    with parse_executor(parsed.parse_workers, parsed.parse_pool) as executor:
+        for kwargs in fetcher_kwargs.values():
+            kwargs["executor"] = executor
+        with outfile(parsed.outfile) as f:
+            csl_items = iter_specs(
+                chain(
+                    ((repo, p, v) for (repo, p), v in specs.items()),
+                    read_lockfiles(parsed.lockfile),
+                ),
+                parsed.date_accessed,
+                cache,
+                limiter,
+                ordered=parsed.keep_order,
+                retry=retry,
+                failures=failures,
+                fetcher_kwargs=fetcher_kwargs,
+                stats=stats,
+                profiler=profiler,
+                previous=previous,
+                transport=transport,
+                store=store,
+            )
+            dumper = dumper_classes[parsed.format](f)
+            with profiler.phase("run"):
+                try:
+                    asyncio.run(write_info(csl_items, dumper, stats, profiler))
+                except BaseException:
+                    if writer is not None:
+                        writer.abort()
+                    raise
+
+    if store is not None:
+        store.close()
+    if writer is not None:
+        writer.close()
+        logger.info("Wrote %s responses to %s", len(writer.entries), writer.path)
+
+    if parsed.error_report:
+        write_error_report(failures, parsed.error_report)
+    if stats is not None:
+        stats.finish()
+        write_json(stats.to_jso(), parsed.stats)
+    if parsed.profile:
+        write_json(profiler.to_jso(), parsed.profile)
+    if parsed.profile_cpu:
+        profiler.dump_profile(parsed.profile_cpu)
+
+    parser.exit(1 if failures else 0)
 
 
 if __name__ == "__main__":
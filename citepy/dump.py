@@ -0,0 +1,128 @@
+"""Incremental writers for CSL items."""
+
+from __future__ import annotations
+
+import json
+from abc import ABC, abstractmethod
+from typing import Callable, Dict, Iterable, Type, TextIO
+
+from .classes import CslItem
+
+
+class Dumper(ABC):
+    """Write CSL items to a file one at a time.
+
+    Items are written as soon as they are given to ``write``;
+    ``close`` finishes the output (but does not close the file),
+    and ``abort`` abandons it.
+    """
+
+    def __init__(self, f: TextIO) -> None:
+        self.f = f
+        self.count = 0
+
+    def write(self, item: CslItem) -> None:
+        self.write_jso(item.to_jso())
+
+    def write_jso(self, jso) -> None:
+        """Write an item which has already been serialised."""
+        self._write_jso(jso)
+        self.count += 1
+
+    @abstractmethod
+    def _write_jso(self, jso) -> None:
+        pass
+
+    def close(self) -> None:
+        pass
+
+    def abort(self) -> None:
+        """Give up after an error, leaving the output unfinished.
+
+        Nothing more is written, so that an incomplete output cannot be
+        mistaken for a complete one (e.g. a JSON array is left unclosed).
+        """
+        self.f.flush()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        if exc_type is None:
+            self.close()
+        else:
+            self.abort()
+
+    @classmethod
+    def dump(cls, items: Iterable[CslItem], f: TextIO) -> None:
+        with cls(f) as dumper:
+            for item in items:
+                dumper.write(item)
+
+
+class CslJsonLinesDumper(Dumper):
+    def _write_jso(self, jso) -> None:
+        print(json.dumps(jso, sort_keys=True), file=self.f)
+        self.f.flush()
+
+
+class CslJsonArrayDumper(Dumper):
+    """Write a JSON array, identical to ``json.dump``-ing a list of items."""
+
+    indent = None
+    separators = (",", ":")
+
+    def _write_jso(self, jso) -> None:
+        s = json.dumps(
+            jso, sort_keys=True, indent=self.indent, separators=self.separators
+        )
+        if self.indent is None:
+            self.f.write(("[" if not self.count else self.separators[0]) + s)
+        else:
+            prefix = "\n" + " " * self.indent
+            self.f.write(("[" if not self.count else ",") + prefix)
+            self.f.write(s.replace("\n", prefix))
+
+    def close(self) -> None:
+        if not self.count:
+            self.f.write("[]\n")
+        elif self.indent is None:
+            self.f.write("]\n")
+        else:
+            self.f.write("\n]\n")
+
+
+class CslJsonPrettyDumper(CslJsonArrayDumper):
+    indent = 2
+    separators = (",", ": ")
+
+
+class CslJsonMinDumper(CslJsonArrayDumper):
+    pass
+
+
+def dump_csl_json_lines(items: Iterable[CslItem], f):
+    CslJsonLinesDumper.dump(items, f)
+
+
+def dump_csl_json_pretty(items: Iterable[CslItem], f):
+    CslJsonPrettyDumper.dump(items, f)
+
+
+def dump_csl_json_min(items: Iterable[CslItem], f):
+    CslJsonMinDumper.dump(items, f)
+
+
+# incremental writers, by format
+dumper_classes: Dict[str, Type[Dumper]] = {
+    "csl-json/lines": CslJsonLinesDumper,
+    "csl-json/pretty": CslJsonPrettyDumper,
+    "csl-json/min": CslJsonMinDumper,
+}
+
+# functions writing a whole iterable of items, ``(items, f)``, by format
+dumpers: Dict[str, Callable[[Iterable[CslItem], TextIO], None]] = {
+    "csl-json/lines": dump_csl_json_lines,
+    "csl-json/pretty": dump_csl_json_pretty,
+    "csl-json/min": dump_csl_json_min,
+}
@@ -0,0 +1,72 @@
+"""Concurrency limits for requests to package repositories."""
+
+from __future__ import annotations
+
+import asyncio
+from contextlib import asynccontextmanager
+from typing import Dict, Optional
+from urllib.parse import urlparse
+
+DEFAULT_JOBS = 16
+DEFAULT_PER_HOST = 8
+
+# crates.io asks that crawlers be gentle
+DEFAULT_HOST_LIMITS = {"crates.io": 2}
+
+
+class HostLimiter:
+    """Limit concurrent requests, both in total and to each host.
+
+    Host limits apply to the named host and all of its subdomains;
+    hosts without a specific limit share the ``per_host`` default.
+    """
+
+    def __init__(
+        self,
+        jobs: int = DEFAULT_JOBS,
+        per_host: int = DEFAULT_PER_HOST,
+        host_limits: Optional[Dict[str, int]] = None,
+    ) -> None:
+        if host_limits is None:
+            host_limits = DEFAULT_HOST_LIMITS.copy()
+        self.jobs = jobs
+        self.per_host = per_host
+        self.host_limits = host_limits
+
+        self._semaphore: Optional[asyncio.Semaphore] = None
+        self._host_semaphores: Dict[str, asyncio.Semaphore] = dict()
+
+    def host_limit(self, host: str) -> int:
+        host = host.lower()
+        for key, val in self.host_limits.items():
+            if host == key or host.endswith("." + key):
+                return val
+        return self.per_host
+
+    def _get_semaphores(self, host: str):
+        # semaphores are created lazily so that they belong to the running loop
+        if self._semaphore is None:
+            self._semaphore = asyncio.Semaphore(self.jobs)
+        try:
+            host_sem = self._host_semaphores[host]
+        except KeyError:
+            host_sem = asyncio.Semaphore(self.host_limit(host))
+            self._host_semaphores[host] = host_sem
+        return self._semaphore, host_sem
+
+    @asynccontextmanager
+    async def limit(self, url: str):
+        """Hold a global slot and a slot for the URL's host."""
+        host = urlparse(url).hostname or ""
+        sem, host_sem = self._get_semaphores(host)
+        async with host_sem:
+            async with sem:
+                yield
+
+
+def parse_host_limit(s: str):
+    """Parse a ``HOST=N`` string into a (host, limit) tuple."""
+    host, _, limit = s.rpartition("=")
+    if not host:
+        raise ValueError(f"Expected HOST=N, got '{s}'")
+    return host.lower(), int(limit)
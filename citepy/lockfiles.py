@@ -0,0 +1,238 @@
+"""Read packages and their pinned versions from lockfiles.
+
+Each reader takes an open file and lazily yields
+``(repo, package, version)`` tuples, so that large lockfiles can be fed into
+the fetch pipeline without being held in memory.
+"""
+
+from __future__ import annotations
+
+import json
+import logging
+import re
+from pathlib import Path
+from typing import IO, Callable, Dict, Iterable, Iterator, Optional, TextIO, Tuple
+
+logger = logging.getLogger(__name__)
+
+# repository, package name, version
+PackageSpec = Tuple[str, str, Optional[str]]
+
+requirement_re = re.compile(
+    r"^(?P<name>[A-Za-z0-9][A-Za-z0-9._-]*)\s*(\[[^\]]*\])?\s*"
+    r"((?P<rel>===?|~=|!=|<=|>=|<|>)\s*(?P<ver>[^\s,;]+))?"
+)
+toml_header_re = re.compile(r"^\s*\[\[?\s*(?P<name>[^\]]+?)\s*\]\]?\s*$")
+toml_string_re = re.compile(r"""^\s*(?P<key>[\w-]+)\s*=\s*(['"])(?P<value>.*)\2\s*$""")
+
+
+def _logical_lines(f: TextIO) -> Iterator[str]:
+    """Lines of a requirements file, joining continuations and stripping comments."""
+    parts = []
+    for line in f:
+        line = line.rstrip("\n")
+        if line.endswith("\\"):
+            parts.append(line[:-1])
+            continue
+        parts.append(line)
+        joined = " ".join(parts)
+        parts = []
+        # comments must be preceded by whitespace, to allow URL fragments
+        joined = re.split(r"(^|\s)#", joined, maxsplit=1)[0].strip()
+        if joined:
+            yield joined
+    if parts:
+        joined = re.split(r"(^|\s)#", " ".join(parts), maxsplit=1)[0].strip()
+        if joined:
+            yield joined
+
+
+def read_requirements(f: TextIO, path: Optional[Path] = None) -> Iterator[PackageSpec]:
+    """Read a pip requirements file, such as one generated by ``pip-compile``.
+
+    Hashes and environment markers are ignored,
+    as are editable, URL and VCS requirements.
+    Nested ``-r``/``--requirement`` files are read relative to ``path``.
+    Only ``==`` and ``===`` pins give a version.
+    """
+    for line in _logical_lines(f):
+        if line.startswith("-"):
+            option, _, value = line.partition(" ")
+            if "=" in option and not value:
+                option, _, value = option.partition("=")
+            if option in ("-r", "--requirement") and value:
+                nested = Path(value.strip())
+                if path is not None and not nested.is_absolute():
+                    nested = path.parent / nested
+                with open(nested) as nested_f:
+                    yield from read_requirements(nested_f, nested)
+            else:
+                logger.debug("Ignoring requirements option '%s'", line)
+            continue
+
+        requirement = line.split(";", 1)[0].split(" --", 1)[0].strip()
+        if "@" in requirement or "://" in requirement:
+            logger.debug("Ignoring direct reference '%s'", requirement)
+            continue
+        m = requirement_re.match(requirement)
+        if m is None:
+            logger.warning("Could not parse requirement '%s'; skipping", line)
+            continue
+        version = m.group("ver") if m.group("rel") in ("==", "===") else None
+        yield "pypi", m.group("name"), version
+
+
+def _toml_packages(f: TextIO) -> Iterator[Dict[str, Dict[str, str]]]:
+    """Yield each ``[[package]]`` of a TOML lockfile as a dict of its tables.
+
+    Only the string values of the package table (under the key ``""``) and its
+    subtables (under their own names, e.g. ``"source"``) are kept.
+    This is just enough TOML for Cargo and Poetry lockfiles,
+    which put one key per line.
+    """
+    package: Optional[Dict[str, Dict[str, str]]] = None
+    table: Optional[Dict[str, str]] = None
+    for line in f:
+        m = toml_header_re.match(line)
+        if m is not None:
+            name = m.group("name")
+            if name == "package" and line.lstrip().startswith("[["):
+                if package is not None:
+                    yield package
+                table = dict()
+                package = {"": table}
+            elif package is not None and name.startswith("package."):
+                table = dict()
+                package[name[len("package.") :]] = table
+            else:
+                if package is not None:
+                    yield package
+                package = table = None
+            continue
+
+        if table is None:
+            continue
+        m = toml_string_re.match(line)
+        if m is not None:
+            table[m.group("key")] = m.group("value")
+
+    if package is not None:
+        yield package
+
+
+def read_cargo_lock(f: TextIO, path: Optional[Path] = None) -> Iterator[PackageSpec]:
+    """Read a ``Cargo.lock``, skipping crates not from the crates.io registry."""
+    for package in _toml_packages(f):
+        table = package[""]
+        source = table.get("source", "")
+        if not source.startswith("registry+"):
+            logger.debug("Ignoring non-registry crate %s", table.get("name"))
+            continue
+        yield "crates", table["name"], table.get("version")
+
+
+def read_poetry_lock(f: TextIO, path: Optional[Path] = None) -> Iterator[PackageSpec]:
+    """Read a ``poetry.lock``, skipping git, URL and local packages."""
+    for package in _toml_packages(f):
+        table = package[""]
+        source_type = package.get("source", {}).get("type")
+        if source_type not in (None, "legacy"):
+            logger.debug("Ignoring %s package %s", source_type, table.get("name"))
+            continue
+        yield "pypi", table["name"], table.get("version")
+
+
+def _json_items(f: IO[bytes], prefix: str):
+    """Key-value pairs of the object at ``prefix``, parsed incrementally if ijson
+    is installed.
+    """
+    try:
+        import ijson
+    except ImportError:
+        obj = json.load(f)
+        for key in prefix.split("."):
+            obj = obj.get(key) or dict()
+        yield from obj.items()
+        return
+    yield from ijson.kvitems(f, prefix, use_float=True)
+
+
+def read_pipfile_lock(
+    f: IO[bytes], path: Optional[Path] = None
+) -> Iterator[PackageSpec]:
+    """Read a ``Pipfile.lock``, including development packages.
+
+    Packages pinned by ``==`` are given their version;
+    git, path and editable packages are skipped.
+    """
+    sections = ["default", "develop"]
+    for idx, section in enumerate(sections):
+        if idx:
+            f.seek(0)
+        for name, details in _json_items(f, section):
+            version = details.get("version", "")
+            if version.startswith("=="):
+                yield "pypi", name, version[2:]
+            elif not {"git", "path", "file"}.intersection(details):
+                yield "pypi", name, None
+            else:
+                logger.debug("Ignoring non-index package %s", name)
+
+
+def read_renv_lock(f: IO[bytes], path: Optional[Path] = None) -> Iterator[PackageSpec]:
+    """Read an ``renv.lock``, skipping packages not from a package repository
+    (such as GitHub or Bioconductor packages).
+    """
+    for name, details in _json_items(f, "Packages"):
+        if details.get("Source") != "Repository":
+            logger.debug("Ignoring %s package %s", details.get("Source"), name)
+            continue
+        yield "cran", details.get("Package", name), details.get("Version")
+
+
+Reader = Callable[[IO, Optional[Path]], Iterator[PackageSpec]]
+
+readers: Dict[str, Reader] = {
+    "requirements": read_requirements,
+    "poetry.lock": read_poetry_lock,
+    "Pipfile.lock": read_pipfile_lock,
+    "Cargo.lock": read_cargo_lock,
+    "renv.lock": read_renv_lock,
+}
+# JSON lockfiles are read as bytes, for ijson
+binary_formats = {"Pipfile.lock", "renv.lock"}
+
+
+def detect_format(path: Path) -> str:
+    """Name of the reader for a lockfile, based on its file name."""
+    if path.name in readers:
+        return path.name
+    if path.suffix in (".txt", ".in"):
+        return "requirements"
+    raise ValueError(
+        f"Unknown lockfile format for '{path}'; "
+        "expected requirements*.txt, " + ", ".join(list(readers)[1:])
+    )
+
+
+def check_lockfile(path) -> str:
+    """Format of a lockfile, raising if it is unknown or the file is unreadable."""
+    path = Path(path)
+    fmt = detect_format(path)
+    with open(path, "rb"):
+        pass
+    return fmt
+
+
+def read_lockfile(path, fmt: Optional[str] = None) -> Iterator[PackageSpec]:
+    """Lazily read packages from a lockfile, inferring its format if not given."""
+    path = Path(path)
+    if fmt is None:
+        fmt = detect_format(path)
+    with open(path, "rb" if fmt in binary_formats else "r") as f:
+        yield from readers[fmt](f, path)
+
+
+def read_lockfiles(paths: Iterable) -> Iterator[PackageSpec]:
+    for path in paths:
+        yield from read_lockfile(path)
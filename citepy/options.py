@@ -0,0 +1,85 @@
+"""Parsing of options shared by citepy and ``citepy serve``."""
+
+import logging
+import re
+from typing import Optional
+
+from .lockfiles import PackageSpec
+from .repos import KNOWN_FETCHERS
+
+logger = logging.getLogger(__name__)
+
+
+def setup_logging(verbosity):
+    verbosity = verbosity or 0
+    levels = [
+        logging.CRITICAL,
+        logging.WARNING,
+        logging.INFO,
+        logging.DEBUG,
+        logging.NOTSET,
+    ]
+    logging.basicConfig(level=levels[min(verbosity + 1, len(levels) - 1)])
+
+    loud_level = levels[min(verbosity, len(levels) - 1)]
+    for name in ["pip", "urllib3", "websockets"]:
+        logging.getLogger(name).setLevel(loud_level)
+
+
+name_re = re.compile(
+    r"^((?P<repo>\w+):)?"
+    r"(?P<name>(\w[\w\d\._-]*))\s*((?P<rel>[=><!~^]{1,2})\s*(?P<ver>[\d\.\*\w-]+))?$"
+)
+
+
+def parse_package_spec(s: str, default_repo: str) -> Optional[PackageSpec]:
+    """Parse a package string like ``name``, ``name==version`` or ``repo:name``.
+
+    A package not tagged with a repository is assigned to ``default_repo``.
+    Returns ``None`` (with a warning) if the string cannot be parsed
+    or names an unknown repository.
+    """
+    s = s.strip()
+    m = name_re.match(s)
+    if m is None:
+        logger.warning("Could not parse '%s'; skipping", s)
+        return None
+
+    g = m.groupdict()
+    repo = g["repo"] or default_repo
+    name = g["name"]
+    rel = g["rel"]
+    ver = g["ver"]
+
+    if repo not in KNOWN_FETCHERS:
+        logger.warning("Unknown repository '%s' in '%s'; skipping", repo, s)
+        return None
+
+    if rel:
+        if set(rel) == {"="} and len(rel) <= 2:
+            return repo, name, ver
+        logger.warning(
+            f"Unsupported package-version relationship '{rel}'; ignoring version"
+        )
+    return repo, name, None
+
+
+size_re = re.compile(
+    r"^\s*(?P<n>\d+(\.\d*)?)\s*(?P<unit>[KMGT]?)i?B?\s*$", re.IGNORECASE
+)
+size_units = {"": 1, "K": 1024, "M": 1024**2, "G": 1024**3, "T": 1024**4}
+
+
+def parse_size(s: str) -> int:
+    m = size_re.match(s)
+    if m is None:
+        raise ValueError(f"Could not parse size '{s}'")
+    return int(float(m.group("n")) * size_units[m.group("unit").upper()])
+
+
+def parse_repo_url(s: str):
+    """Parse a ``REPO=URL`` string into a (repo, url) tuple."""
+    repo, _, url = s.partition("=")
+    if repo not in KNOWN_FETCHERS or not url:
+        raise ValueError(f"Expected REPO=URL for one of {sorted(KNOWN_FETCHERS)}")
+    return repo, url
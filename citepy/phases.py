@@ -0,0 +1,78 @@
+"""Timing the phases of a run, optionally profiling the CPU-bound ones."""
+
+from __future__ import annotations
+
+import time
+from collections import Counter, defaultdict
+from contextlib import contextmanager
+from typing import Any, DefaultDict, Dict, Optional
+
+# phases which happen while fetching, and so are part of the "run" phase
+NESTED_PHASES = ("parse", "serialise", "dump")
+
+
+class PhaseProfiler:
+    """Accumulate wall-clock and CPU time spent in named phases.
+
+    If ``cprofile`` is set, CPU-bound phases are also run under ``cProfile``,
+    so that time spent waiting on the network does not dilute the profile.
+    Phases are entered synchronously on the event loop,
+    so concurrent fetches do not overlap within a phase.
+    """
+
+    def __init__(self, cprofile: bool = False) -> None:
+        self.wall: DefaultDict[str, float] = defaultdict(float)
+        self.cpu: DefaultDict[str, float] = defaultdict(float)
+        self.calls: Counter = Counter()
+        self.profile = None
+        if cprofile:
+            import cProfile
+
+            self.profile = cProfile.Profile()
+        self._profiling = False
+
+    @contextmanager
+    def phase(self, name: str, cpu_bound: bool = False):
+        profiling = cpu_bound and self.profile is not None and not self._profiling
+        wall = time.perf_counter()
+        cpu = time.process_time()
+        if profiling:
+            self._profiling = True
+            self.profile.enable()
+        try:
+            yield
+        finally:
+            if profiling:
+                self.profile.disable()
+                self._profiling = False
+            self.wall[name] += time.perf_counter() - wall
+            self.cpu[name] += time.process_time() - cpu
+            self.calls[name] += 1
+
+    def to_jso(self) -> Dict[str, Any]:
+        phases: Dict[str, Any] = {
+            name: {
+                "wall_seconds": self.wall[name],
+                "cpu_seconds": self.cpu[name],
+                "calls": self.calls[name],
+            }
+            for name in self.wall
+        }
+        if "run" in phases:
+            # the rest of the run: the HTTP client, the event loop,
+            # and waiting on the network (which takes no CPU time)
+            phases["other"] = {
+                "wall_seconds": self.wall["run"]
+                - sum(self.wall.get(name, 0) for name in NESTED_PHASES),
+                "cpu_seconds": self.cpu["run"]
+                - sum(self.cpu.get(name, 0) for name in NESTED_PHASES),
+                "calls": 1,
+            }
+        return {"phases": phases}
+
+    def dump_profile(self, path) -> Optional[str]:
+        """Write ``cProfile`` statistics, readable with ``pstats``, if profiling."""
+        if self.profile is None:
+            return None
+        self.profile.dump_stats(str(path))
+        return str(path)
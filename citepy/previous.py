@@ -0,0 +1,75 @@
+"""Reuse of items from an earlier run's output."""
+
+from __future__ import annotations
+
+import json
+import logging
+from pathlib import Path
+from typing import Any, Dict, Iterator, Optional, Tuple, Union
+
+logger = logging.getLogger(__name__)
+
+# the category each fetcher gives its items, after "software"
+REPO_CATEGORIES = {"python": "pypi", "rust": "crates", "R": "cran"}
+
+
+def item_repo(jso: Dict[str, Any]) -> Optional[str]:
+    """The repository a serialised item was fetched from, if it can be told."""
+    for category in jso.get("categories") or ():
+        if category in REPO_CATEGORIES:
+            return REPO_CATEGORIES[category]
+    return None
+
+
+def iter_csl_json(path: Union[str, Path]) -> Iterator[Dict[str, Any]]:
+    """Items from a CSL-JSON file, either a JSON array or JSON lines."""
+    with open(path) as f:
+        start = f.read(64).lstrip()
+        f.seek(0)
+        if start.startswith("["):
+            yield from json.load(f)
+            return
+        for line in f:
+            line = line.strip()
+            if line:
+                yield json.loads(line)
+
+
+class PreviousItems:
+    """Serialised items from an earlier output, by repository, id and version.
+
+    Only items with a version can be matched,
+    and only packages with a pinned version reuse them.
+    """
+
+    def __init__(self) -> None:
+        self._items: Dict[Tuple[str, str, str], Dict[str, Any]] = dict()
+
+    def add(self, jso: Dict[str, Any]) -> bool:
+        repo = item_repo(jso)
+        if repo is None or not jso.get("id") or not jso.get("version"):
+            return False
+        self._items[(repo, str(jso["id"]).lower(), str(jso["version"]))] = jso
+        return True
+
+    @classmethod
+    def from_path(cls, path: Union[str, Path]) -> PreviousItems:
+        """Load items from a file; a missing file has none, e.g. on a first run."""
+        previous = cls()
+        if not Path(path).exists():
+            logger.info("No previous output at %s; fetching everything", path)
+            return previous
+        for jso in iter_csl_json(path):
+            previous.add(jso)
+        logger.info("Loaded %s previous items from %s", len(previous), path)
+        return previous
+
+    def get(
+        self, repo: str, package: str, version: Optional[str] = None
+    ) -> Optional[Dict[str, Any]]:
+        if not version:
+            return None
+        return self._items.get((repo, package.lower(), version))
+
+    def __len__(self) -> int:
+        return len(self._items)
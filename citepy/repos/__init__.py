@@ -1,16 +1,41 @@
-from typing import Dict, Type
+from importlib import import_module
+from typing import TYPE_CHECKING, Dict, Iterator, Mapping, Tuple, Type
 
-from .common import DataFetcher
-from .pypi import PypiDataFetcher
-from .crates import CratesDataFetcher
-from .cran import CranDataFetcher
+if TYPE_CHECKING:
+    from .common import DataFetcher
 
-
-KNOWN_FETCHERS: Dict[str, Type[DataFetcher]] = {
-    "pypi": PypiDataFetcher,
-    "crates": CratesDataFetcher,
-    "cran": CranDataFetcher,
+# fetchers are only imported when used, as they bring in heavy dependencies
+_FETCHER_PATHS: Dict[str, Tuple[str, str]] = {
+    "pypi": (".pypi", "PypiDataFetcher"),
+    "crates": (".crates", "CratesDataFetcher"),
+    "cran": (".cran", "CranDataFetcher"),
 }
+_LAZY_NAMES = {cls_name: path for path, cls_name in _FETCHER_PATHS.values()}
+_LAZY_NAMES["DataFetcher"] = ".common"
+
+
+class _LazyFetchers(Mapping[str, Type["DataFetcher"]]):
+    def __getitem__(self, key: str) -> Type["DataFetcher"]:
+        module_name, cls_name = _FETCHER_PATHS[key]
+        return getattr(import_module(module_name, __name__), cls_name)
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(_FETCHER_PATHS)
+
+    def __len__(self) -> int:
+        return len(_FETCHER_PATHS)
+
+
+KNOWN_FETCHERS: Mapping[str, Type["DataFetcher"]] = _LazyFetchers()
+
+
+def __getattr__(name):
+    try:
+        module_name = _LAZY_NAMES[name]
+    except KeyError:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    return getattr(import_module(module_name, __name__), name)
+
 
 __all__ = [
     "PypiDataFetcher",
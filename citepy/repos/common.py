@@ -1,10 +1,28 @@
 from abc import ABC, abstractmethod
+from concurrent.futures import Executor
+from typing import Any, Callable, Optional
 from urllib.parse import urlparse
+import asyncio
 import datetime as dt
+import logging
+import time
 
 import httpx
 
-from ..classes import CslItem
+from ..cache import ResponseCache, parse_max_age
+from ..classes import (
+    CslItem,
+    ValidationPolicy,
+    get_validation_policy,
+    validation_policy,
+)
+from ..limits import HostLimiter
+from ..retry import RetryPolicy
+from ..singleflight import SingleFlight
+from ..phases import PhaseProfiler
+from ..stats import RunStats
+
+logger = logging.getLogger(__name__)
 
 KNOWN_SITES = {
     "github": "GitHub",
@@ -31,11 +49,146 @@ def get_publisher(url, known_sites=None):
     return netloc
 
 
+def _call_with_policy(policy: ValidationPolicy, fn: Callable[..., Any], *args) -> Any:
+    # executors do not carry the caller's context into their workers
+    with validation_policy(policy):
+        return fn(*args)
+
+
 class DataFetcher(ABC):
+    # name in KNOWN_FETCHERS
+    repo: str
     base_url: str
+    # whether items are built from the metadata of the version requested,
+    # so that items for pinned versions can be stored
+    resolves_versions = True
 
-    def __init__(self, client: httpx.AsyncClient) -> None:
+    def __init__(
+        self,
+        client: httpx.AsyncClient,
+        cache: Optional[ResponseCache] = None,
+        limiter: Optional[HostLimiter] = None,
+        retry: Optional[RetryPolicy] = None,
+        executor: Optional[Executor] = None,
+        base_url: Optional[str] = None,
+        stats: Optional[RunStats] = None,
+        profiler: Optional[PhaseProfiler] = None,
+    ) -> None:
         self.client = client
+        if base_url is not None:
+            # e.g. a mirror, or a local stand-in for benchmarking
+            self.base_url = base_url.rstrip("/")
+        self.cache = cache
+        if limiter is None:
+            limiter = HostLimiter()
+        self.limiter = limiter
+        if retry is None:
+            retry = RetryPolicy()
+        self.retry = retry
+        self.executor = executor
+        self.flights = SingleFlight()
+        self.stats = stats
+        self.profiler = profiler
+
+    async def run_parser(self, fn: Callable[..., Any], *args) -> Any:
+        """Call a CPU-bound function in the executor, if there is one.
+
+        For process pools, ``fn`` and its arguments must be picklable.
+        The caller's validation policy applies in the worker too.
+        """
+        started = time.perf_counter()
+        try:
+            if self.executor is None:
+                if self.profiler is None:
+                    return fn(*args)
+                with self.profiler.phase("parse", cpu_bound=True):
+                    return fn(*args)
+            loop = asyncio.get_running_loop()
+            return await loop.run_in_executor(
+                self.executor, _call_with_policy, get_validation_policy(), fn, *args
+            )
+        finally:
+            if self.stats is not None:
+                self.stats.record_parse(self.repo, time.perf_counter() - started)
+
+    async def fetch(self, url: str) -> httpx.Response:
+        """GET the URL, going through the response cache if there is one.
+
+        Cached responses are reused without a request while fresh,
+        and revalidated with a conditional request otherwise.
+        Transport errors and transient error statuses are retried
+        according to the retry policy.
+        Concurrent fetches of the same URL share one request (and response).
+        Raises ``httpx.HTTPStatusError`` for unsuccessful responses.
+        """
+        if self.stats is not None and url in self.flights:
+            self.stats.record_coalesced(self.repo)
+        return await self.flights.do(url, self._fetch, url)
+
+    def _record_request(self, started: float, *args, **kwargs) -> None:
+        if self.stats is not None:
+            seconds = time.perf_counter() - started
+            self.stats.record_request(self.repo, seconds, *args, **kwargs)
+
+    async def _fetch(self, url: str) -> httpx.Response:
+        started = time.perf_counter()
+        entry = None if self.cache is None else self.cache.get(url)
+        if entry is not None and entry.is_fresh():
+            logger.debug("Using fresh cached response for %s", url)
+            self.cache.touch(url)
+            self._record_request(started, cache="hit")
+            return entry.to_response()
+
+        cache_state = None if self.cache is None else "miss"
+        headers = {} if entry is None else entry.validators()
+        try:
+            response = await self._get_with_retries(url, headers)
+        except Exception:
+            self._record_request(started, cache=cache_state, error=True)
+            raise
+
+        if entry is not None and response.status_code == 304:
+            logger.debug("Revalidated cached response for %s", url)
+            self._record_request(started, 304, cache="revalidated")
+            max_age = parse_max_age(response.headers.get("cache-control"))
+            expires = None if max_age is None else time.time() + max_age
+            self.cache.touch(url, expires)
+            return entry.to_response(response.request)
+
+        self._record_request(
+            started,
+            response.status_code,
+            len(response.content),
+            cache_state,
+            response.is_error,
+        )
+        response.raise_for_status()
+        if self.cache is not None:
+            self.cache.put(response)
+        return response
+
+    async def _get_with_retries(self, url: str, headers) -> httpx.Response:
+        attempt = 0
+        while True:
+            try:
+                async with self.limiter.limit(url):
+                    response = await self.client.get(url, headers=headers)
+            except httpx.TransportError as e:
+                if not self.retry.should_retry(attempt, exc=e):
+                    raise
+                response = None
+                reason = repr(e)
+            else:
+                if not self.retry.should_retry(attempt, response):
+                    return response
+                reason = f"status {response.status_code}"
+
+            if self.stats is not None:
+                self.stats.record_retry(self.repo)
+            delay = self.retry.delay(attempt, response)
+            logger.info("Retrying %s in %.2fs after %s", url, delay, reason)
+            await asyncio.sleep(delay)
+            attempt += 1
 
     @abstractmethod
     async def get(
@@ -1,19 +1,38 @@
+from __future__ import annotations
+
+import asyncio
 import datetime as dt
+import gzip
 import logging
-from typing import DefaultDict, Dict, Tuple, List
+from pathlib import Path
+from typing import (
+    TYPE_CHECKING,
+    DefaultDict,
+    Dict,
+    Iterable,
+    Iterator,
+    Tuple,
+    List,
+    Optional,
+)
 from collections import defaultdict
 
 import httpx
-from bs4 import BeautifulSoup
 
 from ..classes import CslItem, CslType, CslName
 from .common import KNOWN_SITES as common_known, get_publisher, DataFetcher
 
+if TYPE_CHECKING:
+    from bs4 import BeautifulSoup
+
 KNOWN_SITES = common_known.copy()
 KNOWN_SITES.update({"cran": "The Comprehensive R Archive Network"})
 
 logger = logging.getLogger(__name__)
 
+# fields needed to build an item without fetching the package's page
+INDEX_FIELDS = frozenset({"Version", "Title", "Published"})
+
 
 def remove_brackets(s):
     letters = []
@@ -36,23 +55,133 @@ def remove_brackets(s):
     return "".join(letters)
 
 
+def parse_dcf(lines: Iterable[str]) -> Iterator[Dict[str, str]]:
+    """Parse records from a Debian Control File, like CRAN's ``PACKAGES``.
+
+    Records are separated by blank lines;
+    continuation lines start with whitespace and are joined with a space.
+    """
+    record: Dict[str, str] = dict()
+    key = None
+    for line in lines:
+        if not line.strip():
+            if record:
+                yield record
+            record = dict()
+            key = None
+        elif line[0] in " \t":
+            if key is not None:
+                record[key] += " " + line.strip()
+        else:
+            key, _, value = line.partition(":")
+            key = key.strip()
+            record[key] = value.strip()
+    if record:
+        yield record
+
+
+class CranIndex:
+    """Package metadata from a DCF index, keyed by package name.
+
+    CRAN's ``src/contrib/PACKAGES`` only lists versions and dependencies;
+    fuller indices (e.g. from R's ``tools::CRAN_package_db()``
+    written out with ``write.dcf``) also have titles, authors and dates.
+    """
+
+    def __init__(self, records: Dict[str, Dict[str, str]]) -> None:
+        self.records = records
+
+    @classmethod
+    def from_lines(cls, lines: Iterable[str]) -> CranIndex:
+        records = dict()
+        for record in parse_dcf(lines):
+            try:
+                records[record["Package"]] = record
+            except KeyError:
+                continue
+        return cls(records)
+
+    @classmethod
+    def from_bytes(cls, b: bytes) -> CranIndex:
+        if b[:2] == b"\x1f\x8b":
+            b = gzip.decompress(b)
+        return cls.from_lines(b.decode("utf-8", errors="replace").splitlines())
+
+    @classmethod
+    def from_path(cls, path) -> CranIndex:
+        return cls.from_bytes(Path(path).read_bytes())
+
+    def get(self, package: str) -> Dict[str, str]:
+        return self.records.get(package, dict())
+
+    def is_complete(self) -> bool:
+        """Whether any record has every field needed to skip the package's page."""
+        return any(INDEX_FIELDS.issubset(r) for r in self.records.values())
+
+    def __len__(self):
+        return len(self.records)
+
+
 class CranDataFetcher(DataFetcher):
+    """Fetch package metadata from CRAN.
+
+    If an ``index`` (a ``CranIndex``, or a path or URL of a DCF file) is given,
+    it is loaded once and used for every package;
+    package pages are only fetched for packages lacking some fields in the index.
+    """
+
+    repo = "cran"
     base_url = "https://CRAN.R-project.org"
+    # only the current version's metadata is available
+    resolves_versions = False
 
-    def __init__(self, client: httpx.AsyncClient) -> None:
-        super().__init__(client)
+    def __init__(self, client: httpx.AsyncClient, *args, index=None, **kwargs):
+        super().__init__(client, *args, **kwargs)
+        self.index_source = index
+        self._index: Optional[CranIndex] = None
+        self._index_lock = asyncio.Lock()
 
-    def get_authors(self, info) -> List[CslName]:
+    async def get_index(self) -> Optional[CranIndex]:
+        if self.index_source is None:
+            return None
+        async with self._index_lock:
+            if self._index is not None:
+                return self._index
+            source = self.index_source
+            if isinstance(source, CranIndex):
+                self._index = source
+            elif str(source).startswith(("http://", "https://")):
+                logger.debug("Fetching CRAN index from %s", source)
+                response = await self.fetch(str(source))
+                self._index = await self.run_parser(
+                    CranIndex.from_bytes, response.content
+                )
+            else:
+                logger.debug("Reading CRAN index from %s", source)
+                self._index = await self.run_parser(CranIndex.from_path, source)
+            logger.info("Loaded CRAN index of %s packages", len(self._index))
+            if self._index and not self._index.is_complete():
+                logger.warning(
+                    "CRAN index from %s lacks %s fields, "
+                    "so every package's page will still be fetched",
+                    source,
+                    "/".join(sorted(INDEX_FIELDS)),
+                )
+        return self._index
+
+    @staticmethod
+    def get_authors(info) -> List[CslName]:
         authors: DefaultDict[CslName, int] = defaultdict(lambda: 0)
         for k in ("Author", "Maintainer"):
             val = info.get(k)
             if not val:
                 continue
             for s in remove_brackets(val).split(","):
-                authors[CslName(literal=s.strip())] += 1
+                authors[CslName(literal=s.strip()).freeze()] += 1
         return list(authors.keys())
 
-    def parse_metadata(self, soup: BeautifulSoup) -> Dict[str, str]:
+    @staticmethod
+    def parse_metadata(soup: BeautifulSoup) -> Dict[str, str]:
         out = dict()
 
         for table in soup.find_all("table"):
@@ -64,22 +193,43 @@ class CranDataFetcher(DataFetcher):
 
         return out
 
-    def parse_title_abstract(self, soup: BeautifulSoup) -> Tuple[str, str]:
+    @staticmethod
+    def parse_title_abstract(soup: BeautifulSoup) -> Tuple[str, str]:
         title = soup.find("h2").get_text(" ", strip=True)
         abstract = soup.find("p").get_text(" ", strip=True)
         return title.strip(), " ".join(abstract.strip().split())
 
-    async def get(self, package, version=None, date_accessed=None) -> CslItem:
-        url = self.base_url + "/package=" + package
+    def package_url(self, package) -> str:
+        return self.base_url + "/package=" + package
+
+    async def get_page_info(self, package) -> Dict[str, str]:
+        url = self.package_url(package)
 
         logger.debug("Fetching information from %s", url)
 
-        response = await self.client.get(url)
-        response.raise_for_status()
-        soup = BeautifulSoup(response.text, "html.parser")
+        response = await self.fetch(url)
+        return await self.run_parser(parse_package_page, response.text)
 
-        title, abstract = self.parse_title_abstract(soup)
-        info = self.parse_metadata(soup)
+    async def get_info(self, package) -> Dict[str, str]:
+        """Metadata from the index where possible, otherwise the package page."""
+        index = await self.get_index()
+        info = dict() if index is None else index.get(package)
+        if INDEX_FIELDS.issubset(info) and ("Author" in info or "Maintainer" in info):
+            logger.debug("Using indexed information for %s", package)
+            return info
+
+        page_info = await self.get_page_info(package)
+        page_info.update(info)
+        return page_info
+
+    async def get(self, package, version=None, date_accessed=None) -> CslItem:
+        url = self.package_url(package)
+        info = await self.get_info(package)
+
+        title = info["Title"]
+        if not title.startswith(package + ":"):
+            title = f"{package}: {title}"
+        abstract = " ".join(info.get("Description", "").split())
 
         info_version = info["Version"]
         if version and version != info["Version"]:
@@ -89,7 +239,7 @@ class CranDataFetcher(DataFetcher):
                 version,
             )
 
-        info_url = info.get("URL", url).split(" , ")[0]
+        info_url = info.get("URL", url).split(",")[0].strip()
 
         return CslItem(
             type=CslType.WEBPAGE,
@@ -104,3 +254,13 @@ class CranDataFetcher(DataFetcher):
             publisher=get_publisher(info_url),
             title=title,
         )
+
+
+def parse_package_page(text: str) -> Dict[str, str]:
+    """Metadata, title and description from a CRAN package's HTML page."""
+    from bs4 import BeautifulSoup
+
+    soup = BeautifulSoup(text, "html.parser")
+    info = CranDataFetcher.parse_metadata(soup)
+    info["Title"], info["Description"] = CranDataFetcher.parse_title_abstract(soup)
+    return info
@@ -1,5 +1,9 @@
+import asyncio
 from datetime import datetime
 import logging
+from typing import List, Optional
+
+import httpx
 
 from .common import DataFetcher, KNOWN_SITES as common_known, get_publisher
 from ..classes import CslItem, CslType, CslName
@@ -13,24 +17,38 @@ logger = logging.getLogger(__name__)
 
 
 class CratesDataFetcher(DataFetcher):
+    repo = "crates"
     base_url = "https://www.crates.io"
 
-    async def get_date_author(self, version_dict):
-        issued = datetime.fromisoformat(version_dict["created_at"])
-
-        authors_url = self.base_url + version_dict["links"]["authors"]
-        author_response = await self.client.get(authors_url)
-        author_response.raise_for_status()
+    async def get_authors(self, authors_path: str) -> List[CslName]:
+        author_response = await self.fetch(self.base_url + authors_path)
         names = author_response.json()["meta"]["names"]
-        return issued, [CslName(literal=name) for name in names]
+        return [CslName(literal=name) for name in names]
+
+    async def get_pinned_authors(self, package, version) -> Optional[List[CslName]]:
+        """Authors of a version which may not exist, without the crate document."""
+        try:
+            return await self.get_authors(f"/api/v1/crates/{package}/{version}/authors")
+        except httpx.HTTPStatusError as e:
+            if e.response.status_code != 404:
+                raise
+            return None
 
     async def get(self, package, version=None, date_accessed=None) -> CslItem:
         api_url = self.base_url + "/api/v1/crates/" + package
 
         logger.debug("Fetching information from %s", api_url)
 
-        response = await self.client.get(api_url)
-        response.raise_for_status()
+        # the crate document is needed for crate-level metadata and the first
+        # version, but a pinned version's authors can be fetched alongside it
+        if version:
+            response, authors = await asyncio.gather(
+                self.fetch(api_url),
+                self.get_pinned_authors(package, version),
+            )
+        else:
+            response = await self.fetch(api_url)
+            authors = None
         data = response.json()
         crate_data = data["crate"]
 
@@ -48,16 +66,27 @@ class CratesDataFetcher(DataFetcher):
         if not version:
             version = crate_data["max_version"]
 
-        original_authors = None
-        issued = None
-        authors = None
-
-        for idx, v_dict in enumerate(data["versions"]):
-            if idx == len(data["versions"]) - 1:
-                _, original_authors = await self.get_date_author(v_dict)
-
-            if v_dict["num"] == version:
-                issued, authors = await self.get_date_author(v_dict)
+        versions = data["versions"]
+        v_dict = next((v for v in versions if v["num"] == version), None)
+        if v_dict is None:
+            issued = authors = None
+        else:
+            issued = datetime.fromisoformat(v_dict["created_at"])
+        first_dict = versions[-1] if versions else None
+
+        # fetch whichever authors are still needed concurrently
+        to_fetch = dict()
+        if authors is None and v_dict is not None:
+            to_fetch["authors"] = self.get_authors(v_dict["links"]["authors"])
+        if first_dict is not None and first_dict is not v_dict:
+            to_fetch["original"] = self.get_authors(first_dict["links"]["authors"])
+        fetched = dict(zip(to_fetch, await asyncio.gather(*to_fetch.values())))
+
+        authors = fetched.get("authors", authors)
+        if first_dict is v_dict:
+            original_authors = authors
+        else:
+            original_authors = fetched.get("original")
 
         return CslItem(
             type=CslType.WEBPAGE,
@@ -1,9 +1,20 @@
 from datetime import datetime
+from io import BytesIO
+import json
 import logging
+from typing import Any, Dict, Optional
+
+import httpx
 
 from .common import KNOWN_SITES as common_known, get_publisher, DataFetcher
+from ..cache import JsonLinesIndex
 from ..classes import CslItem, CslType, CslName
 
+try:
+    import ijson
+except ImportError:
+    ijson = None
+
 KNOWN_SITES = common_known.copy()
 KNOWN_SITES.update({"pypi": "The Python Package Index"})
 
@@ -11,9 +22,39 @@ logger = logging.getLogger(__name__)
 
 
 class PypiDataFetcher(DataFetcher):
+    """Fetch package metadata from PyPI.
+
+    If a ``first_releases`` index is given, it records each package's
+    first upload time, so that later runs do not need to scan
+    (or, for pinned versions, fetch) every release of the package.
+    Likewise, an ``upload_times`` index records the upload time of each
+    version.
+
+    If ``local_metadata`` is set, metadata is read from installed distributions
+    where the installed version is the one requested,
+    so that PyPI is only needed for upload times
+    (and not at all if they are already indexed).
+    """
+
+    repo = "pypi"
     base_url = "https://pypi.org/pypi"
 
-    def get_authors(self, info):
+    def __init__(
+        self,
+        client: httpx.AsyncClient,
+        *args,
+        first_releases: Optional[JsonLinesIndex] = None,
+        upload_times: Optional[JsonLinesIndex] = None,
+        local_metadata: bool = False,
+        **kwargs,
+    ):
+        super().__init__(client, *args, **kwargs)
+        self.first_releases = first_releases
+        self.upload_times = upload_times
+        self.local_metadata = local_metadata
+
+    @staticmethod
+    def get_authors(info):
         author_str = info.get("author")
         maintainer_str = info.get("maintainer")
 
@@ -26,49 +67,254 @@ class PypiDataFetcher(DataFetcher):
 
         return authors
 
-    async def get(self, package, version=None, date_accessed=None) -> CslItem:
+    def package_url(self, package, version=None) -> str:
         url = self.base_url + "/" + package
         if version:
             url += "/" + version
-        url += "/" + "json"
+        return url + "/json"
 
+    async def get_summary(self, package, version=None, scan_releases=True):
+        url = self.package_url(package, version)
         logger.debug("Fetching information from %s", url)
+        response = await self.fetch(url)
+        return await self.run_parser(summarise_json, response.content, scan_releases)
+
+    async def get(self, package, version=None, date_accessed=None) -> CslItem:
+        key = package.lower()
+        known_first = None
+        if self.first_releases is not None:
+            known_first = self.first_releases.get(key)
+
+        info = None
+        if self.local_metadata:
+            info = local_info(package, version)
+        upload_time = None
+        if info is not None:
+            version = info["version"]
+            if self.upload_times is not None:
+                upload_time = self.upload_times.get(f"{key}=={version}")
+
+        if upload_time is not None and known_first is not None:
+            logger.debug("Using local metadata for %s", package)
+            summary = {
+                "info": info,
+                "upload_time": upload_time,
+                "first_upload_time": None,
+            }
+        else:
+            summary = await self.get_summary(package, version, known_first is None)
+            if info is not None:
+                summary["info"] = info
+
+        if self.upload_times is not None and summary["upload_time"] is not None:
+            self.upload_times.set(
+                f"{key}=={summary['info']['version']}", summary["upload_time"]
+            )
+
+        first_upload = min_upload(known_first, summary["first_upload_time"])
+
+        if first_upload is None and version:
+            # versioned documents may not list other releases
+            logger.debug("Fetching all releases of %s", package)
+            all_summary = await self.get_summary(package)
+            first_upload = all_summary["first_upload_time"]
+
+        if self.first_releases is not None and first_upload is not None:
+            self.first_releases.set(key, first_upload)
+
+        return await self.run_parser(
+            item_from_summary, summary, package, date_accessed, first_upload
+        )
+
+
+def local_info(package, version=None) -> Optional[Dict[str, Any]]:
+    """Build the ``info`` of a PyPI JSON document from an installed distribution.
+
+    Returns ``None`` if the package is not installed,
+    or if a version is given and a different version is installed.
+    """
+    try:
+        from importlib import metadata
+    except ImportError:  # python < 3.8
+        import importlib_metadata as metadata
+
+    try:
+        dist = metadata.distribution(package)
+    except metadata.PackageNotFoundError:
+        return None
+    if version and dist.version != version:
+        logger.debug(
+            "Installed %s is version %s, not %s", package, dist.version, version
+        )
+        return None
+
+    meta = dist.metadata
+    return {
+        "version": dist.version,
+        "author": meta["Author"],
+        "maintainer": meta["Maintainer"],
+        "home_page": meta["Home-page"],
+        "project_url": f"https://pypi.org/project/{meta['Name']}/",
+        "summary": meta["Summary"],
+        "classifiers": meta.get_all("Classifier") or [],
+    }
+
 
-        response = await self.client.get(url)
-        response.raise_for_status()
-        data = response.json()
-        logger.debug("Successfully parsed data")
-        info = data["info"]
-
-        release = data["releases"][info["version"]][0]
-        dt = datetime.fromisoformat(release["upload_time"])
-
-        first_upload = dt
-        for release in data["releases"].values():
-            for upload in release:
-                first_upload = min(
-                    first_upload, datetime.fromisoformat(upload["upload_time"])
-                )
-
-        item_url = info.get("home_page") or info["project_url"]
-        publisher = get_publisher(item_url, KNOWN_SITES)
-
-        return CslItem(
-            type=CslType.WEBPAGE,
-            id=package,
-            author=self.get_authors(info),
-            URL=item_url,
-            abstract=info["summary"] or None,
-            version=info["version"],
-            issued=dt,
-            # event_date=dt,
-            # container=dt,
-            # submitted=dt,
-            original_date=first_upload,
-            accessed=date_accessed,
-            categories=(
-                ["software", "python", "libraries", "pypi"] + info["classifiers"]
+def min_upload(*upload_times: Optional[str]) -> Optional[str]:
+    """Earliest of some ISO-8601 upload times from PyPI, ignoring Nones.
+
+    PyPI's upload times all have the same format, so compare as strings.
+    """
+    times = [t for t in upload_times if t]
+    return min(times) if times else None
+
+
+# documents at least this large are parsed incrementally, if ijson is installed;
+# smaller ones are parsed faster by json, at the cost of holding them in memory
+STREAM_MIN_SIZE = 8 * 1024**2
+
+
+def summarise_json(
+    content: bytes, scan_releases=True, stream: Optional[bool] = None
+) -> Dict[str, Any]:
+    """Extract what is needed from a package's PyPI JSON document.
+
+    Returns a dict of ``info``, the ``upload_time`` of the document's version,
+    and the ``first_upload_time`` of any release
+    (``None`` if the document does not list releases or ``scan_releases`` is
+    false).
+    If ``stream`` is set (by default, if ijson is installed and the document
+    is at least ``STREAM_MIN_SIZE`` bytes), the document is parsed
+    incrementally in one pass rather than built whole
+    (which for packages with thousands of releases can be many megabytes).
+    """
+    if stream is None:
+        stream = ijson is not None and len(content) >= STREAM_MIN_SIZE
+    if stream:
+        return _summarise_stream(content, scan_releases)
+
+    data = json.loads(content)
+    info = data["info"]
+    releases = data.get("releases") or dict()
+
+    upload_time = None
+    uploads = releases.get(info["version"])
+    if uploads:
+        upload_time = uploads[0]["upload_time"]
+    elif data.get("urls"):
+        # versioned documents may not list releases
+        upload_time = data["urls"][0]["upload_time"]
+
+    first_upload = None
+    if scan_releases:
+        first_upload = min(
+            (
+                upload["upload_time"]
+                for uploads in releases.values()
+                for upload in uploads
             ),
-            publisher=publisher,
-            title=package,
+            default=None,
         )
+
+    return {
+        "info": info,
+        "upload_time": upload_time,
+        "first_upload_time": first_upload,
+    }
+
+
+def _summarise_stream(content: bytes, scan_releases=True) -> Dict[str, Any]:
+    """``summarise_json`` in one incremental pass over the document.
+
+    Stops once it has everything needed:
+    after the document's version if not ``scan_releases``,
+    otherwise after the releases
+    (or the first of the ``urls``, if the version was not among them).
+    """
+    events = ijson.parse(BytesIO(content), use_float=True)
+
+    # info comes first
+    builder = ijson.ObjectBuilder()
+    for prefix, event, value in events:
+        if prefix == "info" or prefix.startswith("info."):
+            builder.event(event, value)
+            if prefix == "info" and event == "end_map":
+                break
+    info = builder.value
+
+    current = "releases." + info["version"] + ".item.upload_time"
+    upload_time = None
+    first_upload = None
+    for prefix, event, value in events:
+        if event != "string":
+            if prefix == "releases" and event == "end_map" and upload_time:
+                break
+            continue
+        if prefix == current:
+            if upload_time is None:
+                upload_time = value
+            if not scan_releases:
+                break
+        if prefix == "urls.item.upload_time":
+            # versioned documents may not list releases
+            upload_time = value
+            break
+        if (
+            scan_releases
+            and prefix.endswith(".item.upload_time")
+            and prefix.startswith("releases.")
+            and (first_upload is None or value < first_upload)
+        ):
+            first_upload = value
+
+    return {
+        "info": info,
+        "upload_time": upload_time,
+        "first_upload_time": first_upload,
+    }
+
+
+def item_from_summary(
+    summary: Dict[str, Any], package, date_accessed=None, first_upload=None
+) -> CslItem:
+    """Build an item from a summary of a package's PyPI JSON document.
+
+    Releases without any files have no upload time, so no issued date.
+    """
+    info = summary["info"]
+    dt = None
+    if summary["upload_time"] is not None:
+        dt = datetime.fromisoformat(summary["upload_time"])
+
+    first_upload = min_upload(
+        first_upload, summary["first_upload_time"], summary["upload_time"]
+    )
+    original_date = None
+    if first_upload is not None:
+        original_date = datetime.fromisoformat(first_upload)
+
+    item_url = info.get("home_page") or info["project_url"]
+    publisher = get_publisher(item_url, KNOWN_SITES)
+
+    return CslItem(
+        type=CslType.WEBPAGE,
+        id=package,
+        author=PypiDataFetcher.get_authors(info),
+        URL=item_url,
+        abstract=info["summary"] or None,
+        version=info["version"],
+        issued=dt,
+        # event_date=dt,
+        # container=dt,
+        # submitted=dt,
+        original_date=original_date,
+        accessed=date_accessed,
+        categories=["software", "python", "libraries", "pypi"] + info["classifiers"],
+        publisher=publisher,
+        title=package,
+    )
+
+
+def item_from_json(content: bytes, package, date_accessed=None) -> CslItem:
+    """Build an item from a package's PyPI JSON document."""
+    return item_from_summary(summarise_json(content), package, date_accessed)
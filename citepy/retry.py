@@ -0,0 +1,123 @@
+"""Retrying failed requests, and recording packages which could not be fetched."""
+
+from __future__ import annotations
+
+import datetime as dt
+import random
+from email.utils import parsedate_to_datetime
+from typing import TYPE_CHECKING, Any, Dict, Optional
+
+if TYPE_CHECKING:
+    import httpx
+
+RETRY_STATUSES = frozenset({408, 425, 429, 500, 502, 503, 504})
+DEFAULT_RETRIES = 3
+DEFAULT_MAX_RETRY_AFTER = 300
+
+
+def parse_retry_after(value: Optional[str]) -> Optional[float]:
+    """Seconds to wait according to a Retry-After header, if it is valid."""
+    if not value:
+        return None
+    try:
+        return max(float(value), 0)
+    except ValueError:
+        pass
+    try:
+        when = parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        return None
+    if when.tzinfo is None:
+        when = when.replace(tzinfo=dt.timezone.utc)
+    return max((when - dt.datetime.now(dt.timezone.utc)).total_seconds(), 0)
+
+
+class RetryPolicy:
+    """Exponential backoff with full jitter, respecting Retry-After.
+
+    Each request is retried up to ``retries`` times;
+    ``budget``, if given, caps the total number of retries across all requests
+    sharing this policy, so that a failing repository cannot stall a whole run.
+    A server's Retry-After is always waited out in full,
+    unless it is longer than ``max_retry_after`` seconds,
+    in which case the request is not retried.
+    """
+
+    def __init__(
+        self,
+        retries: int = DEFAULT_RETRIES,
+        backoff: float = 0.5,
+        max_backoff: float = 30,
+        budget: Optional[int] = None,
+        max_retry_after: float = DEFAULT_MAX_RETRY_AFTER,
+    ) -> None:
+        self.retries = retries
+        self.backoff = backoff
+        self.max_backoff = max_backoff
+        self.budget = budget
+        self.max_retry_after = max_retry_after
+
+    def should_retry(
+        self,
+        attempt: int,
+        response: Optional[httpx.Response] = None,
+        exc: Optional[Exception] = None,
+    ) -> bool:
+        """Whether to retry after the given (zero-indexed) attempt.
+
+        Consumes one unit of the budget if so.
+        """
+        import httpx
+
+        if attempt >= self.retries or self.budget == 0:
+            return False
+        if response is not None:
+            if response.status_code not in RETRY_STATUSES:
+                return False
+            retry_after = parse_retry_after(response.headers.get("retry-after"))
+            if retry_after is not None and retry_after > self.max_retry_after:
+                return False
+        if exc is not None and not isinstance(exc, httpx.TransportError):
+            return False
+        if self.budget is not None:
+            self.budget -= 1
+        return True
+
+    def delay(self, attempt: int, response: Optional[httpx.Response] = None) -> float:
+        if response is not None:
+            retry_after = parse_retry_after(response.headers.get("retry-after"))
+            if retry_after is not None:
+                return retry_after
+        cap = min(self.backoff * 2**attempt, self.max_backoff)
+        return random.uniform(0, cap)
+
+
+class FetchFailure:
+    """A package which could not be fetched."""
+
+    def __init__(
+        self, repo: str, package: str, version: Optional[str], exc: Exception
+    ) -> None:
+        self.repo = repo
+        self.package = package
+        self.version = version
+        self.exc = exc
+
+    def to_jso(self) -> Dict[str, Any]:
+        import httpx
+
+        out: Dict[str, Any] = {
+            "repo": self.repo,
+            "package": self.package,
+            "version": self.version,
+            "error": type(self.exc).__name__,
+            "message": str(self.exc),
+        }
+        if isinstance(self.exc, httpx.HTTPStatusError):
+            out["status"] = self.exc.response.status_code
+        if isinstance(self.exc, httpx.HTTPError):
+            try:
+                out["url"] = str(self.exc.request.url)
+            except RuntimeError:
+                pass
+        return out
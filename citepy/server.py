@@ -0,0 +1,430 @@
+"""
+Serve citation data for packages over HTTP, keeping connections and caches warm.
+
+Endpoints, all returning CSL-JSON:
+
+- ``GET /cite/{repo}/{package}`` and ``GET /cite/{repo}/{package}/{version}``
+  return one item.
+- ``POST /cite`` takes a JSON list of package strings as accepted by the CLI
+  (e.g. ``"crates:serde==1.0.0"``) and returns a list of items in the same
+  order; packages which could not be fetched are left out,
+  and counted in the ``X-Citepy-Failed`` header.
+- ``GET /health`` returns ``{"status": "ok"}``.
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import datetime as dt
+import json
+import logging
+from collections import OrderedDict
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple
+from urllib.parse import unquote, urlsplit
+
+from .api import Citer
+from .cache import ResponseCache, JsonLinesIndex, DEFAULT_MAX_SIZE, default_cache_dir
+from .classes import CslItem
+from .options import setup_logging, parse_size, parse_package_spec, parse_repo_url
+from .store import ResultStore, default_store_path
+from .limits import HostLimiter, DEFAULT_JOBS, DEFAULT_PER_HOST, DEFAULT_HOST_LIMITS
+from .repos import KNOWN_FETCHERS
+from .retry import (
+    RetryPolicy,
+    FetchFailure,
+    DEFAULT_RETRIES,
+    DEFAULT_MAX_RETRY_AFTER,
+)
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_HOST = "127.0.0.1"
+DEFAULT_PORT = 8463
+DEFAULT_LRU_SIZE = 4096
+DEFAULT_MAX_BATCH = 1000
+# request bodies are read whole, so refuse any larger than this
+MAX_BODY_SIZE = 1024**2
+
+REASONS = {
+    200: "OK",
+    400: "Bad Request",
+    404: "Not Found",
+    405: "Method Not Allowed",
+    413: "Payload Too Large",
+    500: "Internal Server Error",
+    502: "Bad Gateway",
+}
+
+# repository, package name, version, date accessed
+ItemKey = Tuple[str, str, Optional[str], dt.date]
+
+
+class ItemLRU:
+    """Least-recently-used store of finished items.
+
+    Items are frozen and serialised when stored, so that they can be shared
+    between requests and written out without serialising them again.
+    """
+
+    def __init__(self, max_items: int = DEFAULT_LRU_SIZE) -> None:
+        self.max_items = max_items
+        self._items: OrderedDict[ItemKey, CslItem] = OrderedDict()
+
+    def get(self, key: ItemKey) -> Optional[CslItem]:
+        try:
+            self._items.move_to_end(key)
+        except KeyError:
+            return None
+        return self._items[key]
+
+    def put(self, key: ItemKey, item: CslItem) -> CslItem:
+        # validates according to the policy, once
+        item.to_jso()
+        item.freeze()
+        if self.max_items <= 0:
+            return item
+        self._items[key] = item
+        self._items.move_to_end(key)
+        while len(self._items) > self.max_items:
+            self._items.popitem(last=False)
+        return item
+
+    def __len__(self) -> int:
+        return len(self._items)
+
+
+class HttpError(Exception):
+    def __init__(self, status: int, message: str, details=None) -> None:
+        super().__init__(message)
+        self.status = status
+        self.details = details
+
+    def to_jso(self) -> Dict[str, Any]:
+        out = {"error": REASONS.get(self.status, ""), "message": str(self)}
+        if self.details is not None:
+            out["details"] = self.details
+        return out
+
+
+def parse_content_length(value: Optional[str], max_size: int = MAX_BODY_SIZE) -> int:
+    """Length of a request body from its Content-Length header, if any.
+
+    Raises ``HttpError`` if the header is not a plain number (400)
+    or is over ``max_size`` (413).
+    """
+    if value is None:
+        return 0
+    if not value or value.strip("0123456789"):
+        raise HttpError(400, f"Invalid Content-Length '{value}'")
+    length = int(value)
+    if length > max_size:
+        raise HttpError(413, f"Request bodies are limited to {max_size} bytes")
+    return length
+
+
+class CitationServer:
+    """Answer citation requests using one long-lived ``Citer``."""
+
+    def __init__(
+        self,
+        citer: Citer,
+        lru: Optional[ItemLRU] = None,
+        max_batch: int = DEFAULT_MAX_BATCH,
+    ) -> None:
+        self.citer = citer
+        if lru is None:
+            lru = ItemLRU()
+        self.lru = lru
+        self.max_batch = max_batch
+
+    async def cite(
+        self, repo: str, package: str, version: Optional[str] = None
+    ) -> CslItem:
+        date_accessed = dt.date.today()
+        key = (repo, package.lower(), version, date_accessed)
+        item = self.lru.get(key)
+        if item is None:
+            item = await self.citer.cite(repo, package, version, date_accessed)
+            item = self.lru.put(key, item)
+        return item
+
+    async def _cite_or_raise(self, repo, package, version=None) -> CslItem:
+        if repo not in KNOWN_FETCHERS:
+            raise HttpError(404, f"Unknown repository '{repo}'")
+        try:
+            return await self.cite(repo, package, version)
+        except Exception as e:
+            failure = FetchFailure(repo, package, version, e).to_jso()
+            status = 404 if failure.get("status") == 404 else 502
+            raise HttpError(status, f"Could not fetch {package}", failure)
+
+    async def cite_batch(self, specs: List[str], default_repo: str = "pypi"):
+        """Items for many package strings, in order, and the number which failed."""
+        parsed = [
+            spec
+            for spec in (parse_package_spec(s, default_repo) for s in specs)
+            if spec is not None
+        ]
+        results = await asyncio.gather(
+            *(self.cite(*spec) for spec in parsed), return_exceptions=True
+        )
+        items = []
+        for spec, result in zip(parsed, results):
+            if isinstance(result, Exception):
+                logger.warning(
+                    "Failed to fetch %s from %s: %r", spec[1], spec[0], result
+                )
+            else:
+                items.append(result)
+        return items, len(specs) - len(items)
+
+    async def dispatch(
+        self, method: str, target: str, body: bytes
+    ) -> Tuple[int, str, Dict[str, str]]:
+        """Status, serialised JSON and extra headers for a request."""
+        url = urlsplit(target)
+        parts = [unquote(p) for p in url.path.strip("/").split("/") if p]
+
+        if parts == ["health"]:
+            return 200, json.dumps({"status": "ok", "cached": len(self.lru)}), {}
+
+        if not parts or parts[0] != "cite":
+            raise HttpError(404, f"No such endpoint '{url.path}'")
+
+        if len(parts) == 1:
+            if method != "POST":
+                raise HttpError(405, "Use POST to cite a batch of packages")
+            try:
+                specs = json.loads(body)
+            except ValueError as e:
+                raise HttpError(400, f"Could not parse body as JSON: {e}")
+            if not isinstance(specs, list) or not all(
+                isinstance(s, str) for s in specs
+            ):
+                raise HttpError(400, "Body must be a JSON list of package strings")
+            if any(s.strip() == "-" for s in specs):
+                raise HttpError(400, "'-' (read from stdin) is not a package")
+            if len(specs) > self.max_batch:
+                raise HttpError(413, f"At most {self.max_batch} packages per batch")
+            items, n_failed = await self.cite_batch(specs)
+            content = "[" + ",".join(item.canonical_key() for item in items) + "]"
+            return 200, content, {"X-Citepy-Failed": str(n_failed)}
+
+        if method != "GET":
+            raise HttpError(405, "Use GET to cite one package")
+        if len(parts) not in (3, 4):
+            raise HttpError(404, "Expected /cite/{repo}/{package}[/{version}]")
+        item = await self._cite_or_raise(*parts[1:])
+        return 200, item.canonical_key(), {}
+
+    async def handle(
+        self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter
+    ) -> None:
+        """Serve HTTP/1.1 requests on one connection until it is closed."""
+        try:
+            while True:
+                request_line = await reader.readline()
+                if not request_line.strip():
+                    break
+                try:
+                    method, target, version = request_line.decode("latin-1").split()
+                except ValueError:
+                    await self._respond(writer, 400, '{"error": "Bad Request"}')
+                    break
+
+                headers = dict()
+                while True:
+                    line = await reader.readline()
+                    if line in (b"\r\n", b"\n", b""):
+                        break
+                    key, _, value = line.decode("latin-1").partition(":")
+                    headers[key.strip().lower()] = value.strip()
+                try:
+                    length = parse_content_length(headers.get("content-length"))
+                except HttpError as e:
+                    # the body cannot be skipped, so the connection is closed
+                    await self._respond(writer, e.status, json.dumps(e.to_jso()))
+                    break
+                body = await reader.readexactly(length) if length else b""
+
+                try:
+                    status, content, extra = await self.dispatch(
+                        method.upper(), target, body
+                    )
+                except HttpError as e:
+                    status, content, extra = e.status, json.dumps(e.to_jso()), {}
+                except Exception:
+                    logger.exception("Error handling %s %s", method, target)
+                    status, content, extra = 500, '{"error": "Server Error"}', {}
+
+                keep_alive = (
+                    version == "HTTP/1.1"
+                    and headers.get("connection", "").lower() != "close"
+                )
+                await self._respond(writer, status, content, extra, keep_alive)
+                if not keep_alive:
+                    break
+        except (ConnectionError, asyncio.IncompleteReadError):
+            pass
+        finally:
+            writer.close()
+
+    async def _respond(
+        self, writer, status, content: str, extra=None, keep_alive=False
+    ) -> None:
+        data = content.encode()
+        head = [
+            f"HTTP/1.1 {status} {REASONS.get(status, '')}",
+            "Content-Type: application/json",
+            f"Content-Length: {len(data)}",
+            "Connection: " + ("keep-alive" if keep_alive else "close"),
+        ]
+        head.extend(f"{k}: {v}" for k, v in (extra or {}).items())
+        writer.write(("\r\n".join(head) + "\r\n\r\n").encode("latin-1") + data)
+        await writer.drain()
+
+    async def serve(self, host: str = DEFAULT_HOST, port: int = DEFAULT_PORT):
+        async with self.citer:
+            server = await asyncio.start_server(self.handle, host, port)
+            logger.warning("Serving citations on http://%s:%s", host, port)
+            async with server:
+                await server.serve_forever()
+
+
+def main(args=None):
+    parser = argparse.ArgumentParser(
+        prog="citepy serve",
+        description=__doc__,
+        formatter_class=argparse.RawDescriptionHelpFormatter,
+    )
+    parser.add_argument("--host", default=DEFAULT_HOST, help="default %(default)s")
+    parser.add_argument(
+        "--port", "-p", type=int, default=DEFAULT_PORT, help="default %(default)s"
+    )
+    parser.add_argument(
+        "--lru-size",
+        type=int,
+        default=DEFAULT_LRU_SIZE,
+        help="number of finished items to keep in memory (default %(default)s)",
+    )
+    parser.add_argument(
+        "--max-batch",
+        type=int,
+        default=DEFAULT_MAX_BATCH,
+        help="maximum number of packages in one batch request (default %(default)s)",
+    )
+    parser.add_argument(
+        "--cran-index",
+        metavar="PATH_OR_URL",
+        help="look up CRAN packages in a DCF index, as for citepy",
+    )
+    parser.add_argument(
+        "--local-metadata",
+        action="store_true",
+        help="read metadata of PyPI packages from installed distributions",
+    )
+    parser.add_argument(
+        "--repo-url",
+        action="append",
+        type=parse_repo_url,
+        default=[],
+        metavar="REPO=URL",
+        help=(
+            "base URL of a repository's API, e.g. for a mirror "
+            "(can be given multiple times)"
+        ),
+    )
+    parser.add_argument(
+        "--jobs",
+        "-j",
+        type=int,
+        default=DEFAULT_JOBS,
+        help="maximum number of concurrent requests (default %(default)s)",
+    )
+    parser.add_argument(
+        "--per-host",
+        type=int,
+        default=DEFAULT_PER_HOST,
+        help="maximum number of concurrent requests to one host (default %(default)s)",
+    )
+    parser.add_argument(
+        "--retries",
+        type=int,
+        default=DEFAULT_RETRIES,
+        help="how many times to retry transient errors (default %(default)s)",
+    )
+    parser.add_argument(
+        "--max-retry-after",
+        type=float,
+        default=DEFAULT_MAX_RETRY_AFTER,
+        metavar="SECONDS",
+        help="longest Retry-After to wait for (default %(default)s)",
+    )
+    parser.add_argument(
+        "--cache-dir",
+        type=Path,
+        default=default_cache_dir(),
+        help="directory in which to cache responses and finished items",
+    )
+    parser.add_argument(
+        "--cache-max-size",
+        type=parse_size,
+        default=DEFAULT_MAX_SIZE,
+        help="maximum size of the response cache (default 256M)",
+    )
+    parser.add_argument(
+        "--no-cache",
+        action="store_true",
+        help="neither read from nor write to the response cache or item store",
+    )
+    parser.add_argument(
+        "--verbose",
+        "-v",
+        action="count",
+        help="Increase verbosity of logging (can be repeated).",
+    )
+    parsed = parser.parse_args(args)
+
+    setup_logging(parsed.verbose)
+
+    if parsed.no_cache:
+        cache = None
+        store = None
+    else:
+        cache = ResponseCache(parsed.cache_dir / "responses", parsed.cache_max_size)
+        store = ResultStore(default_store_path(parsed.cache_dir))
+
+    fetcher_kwargs: Dict[str, Dict[str, Any]] = {
+        repo: dict() for repo in KNOWN_FETCHERS
+    }
+    for repo, url in parsed.repo_url:
+        fetcher_kwargs[repo]["base_url"] = url
+    if parsed.cran_index:
+        fetcher_kwargs["cran"]["index"] = parsed.cran_index
+    fetcher_kwargs["pypi"]["local_metadata"] = parsed.local_metadata
+    if not parsed.no_cache:
+        fetcher_kwargs["pypi"]["first_releases"] = JsonLinesIndex(
+            parsed.cache_dir / "pypi-first-release.jsonl"
+        )
+        fetcher_kwargs["pypi"]["upload_times"] = JsonLinesIndex(
+            parsed.cache_dir / "pypi-upload-times.jsonl"
+        )
+
+    citer = Citer(
+        cache,
+        HostLimiter(parsed.jobs, parsed.per_host, DEFAULT_HOST_LIMITS.copy()),
+        RetryPolicy(parsed.retries, max_retry_after=parsed.max_retry_after),
+        fetcher_kwargs=fetcher_kwargs,
+        store=store,
+    )
+    server = CitationServer(citer, ItemLRU(parsed.lru_size), parsed.max_batch)
+    try:
+        asyncio.run(server.serve(parsed.host, parsed.port))
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,50 @@
+"""Coalescing of concurrent identical calls."""
+
+from __future__ import annotations
+
+import asyncio
+import logging
+from typing import Any, Awaitable, Callable, Dict, Hashable
+
+logger = logging.getLogger(__name__)
+
+
+class SingleFlight:
+    """Share one in-flight call between concurrent callers with the same key.
+
+    The first caller for a key starts the call; callers arriving while it is
+    in flight await the same result (or exception) instead of starting their
+    own. Once it finishes, the next caller for the key starts a new call.
+    Results are shared, not copied, so should not be mutated.
+
+    A caller being cancelled does not cancel the call for the others.
+    """
+
+    def __init__(self) -> None:
+        self._flights: Dict[Hashable, asyncio.Future] = dict()
+        self.coalesced = 0
+
+    async def do(self, key: Hashable, fn: Callable[..., Awaitable[Any]], *args) -> Any:
+        try:
+            future = self._flights[key]
+        except KeyError:
+            future = asyncio.ensure_future(fn(*args))
+            self._flights[key] = future
+            future.add_done_callback(lambda f: self._land(key, f))
+        else:
+            logger.debug("Joining in-flight call for %s", key)
+            self.coalesced += 1
+        return await asyncio.shield(future)
+
+    def _land(self, key: Hashable, future: asyncio.Future) -> None:
+        if self._flights.get(key) is future:
+            del self._flights[key]
+        # mark the exception as retrieved, in case every caller was cancelled
+        if not future.cancelled():
+            future.exception()
+
+    def __contains__(self, key: Hashable) -> bool:
+        return key in self._flights
+
+    def __len__(self) -> int:
+        return len(self._flights)
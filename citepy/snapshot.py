@@ -0,0 +1,316 @@
+"""
+Snapshots of repository responses, for running citepy without a network.
+
+A snapshot is a zip archive of compressed response bodies
+with a JSON index (``index.json``) from each URL to its archive member,
+status and headers.
+
+- ``citepy snapshot export BUNDLE [citepy arguments]`` fetches packages
+  as citepy would (without the response cache),
+  writing the items as usual and every response to BUNDLE.
+- ``citepy snapshot import BUNDLE`` merges BUNDLE into the installed snapshot,
+  which ``citepy --offline`` reads by default.
+- ``citepy snapshot info BUNDLE`` summarises a snapshot.
+
+Responses which should have been retried (e.g. 503s) are not recorded.
+"""
+
+from __future__ import annotations
+
+import argparse
+import datetime as dt
+import hashlib
+import json
+import logging
+import os
+import sys
+import zipfile
+from collections import Counter
+from pathlib import Path
+from typing import Dict, Optional, Tuple, Union
+
+import httpx
+
+from .cache import STORED_HEADERS, default_cache_dir
+from .retry import RETRY_STATUSES
+
+logger = logging.getLogger(__name__)
+
+INDEX_NAME = "index.json"
+FORMAT_VERSION = 1
+# headers describing the encoding on the wire, rather than the body
+WIRE_HEADERS = frozenset({"content-encoding", "content-length", "transfer-encoding"})
+
+
+def default_snapshot_path(cache_dir: Union[str, Path, None] = None) -> Path:
+    """Where ``citepy snapshot import`` installs snapshots."""
+    if cache_dir is None:
+        cache_dir = default_cache_dir()
+    return Path(cache_dir) / "snapshot.zip"
+
+
+def member_name(url: str) -> str:
+    return "responses/" + hashlib.sha256(url.encode()).hexdigest()
+
+
+class NotInSnapshot(httpx.RequestError):
+    """A request for a URL which is not in the snapshot.
+
+    Not a transport error, so it is not retried.
+    """
+
+
+class Snapshot:
+    """A snapshot opened for reading.
+
+    The index is read up front, so finding a response is a dictionary lookup,
+    and only that response's body is decompressed.
+    """
+
+    def __init__(self, path: Union[str, Path]) -> None:
+        self.path = Path(path)
+        self._zip = zipfile.ZipFile(self.path)
+        try:
+            index = json.loads(self._zip.read(INDEX_NAME))
+        except KeyError:
+            self._zip.close()
+            raise ValueError(f"{path} is not a snapshot: it has no {INDEX_NAME}")
+        if index.get("format") != FORMAT_VERSION:
+            self._zip.close()
+            raise ValueError(
+                f"{path} has snapshot format {index.get('format')!r}, "
+                f"expected {FORMAT_VERSION}"
+            )
+        self.created: Optional[str] = index.get("created")
+        self.entries: Dict[str, Dict] = index["entries"]
+
+    def get(self, url: str) -> Optional[Tuple[int, Dict[str, str], bytes]]:
+        """Status, headers and body of the response for a URL, if there is one."""
+        entry = self.entries.get(url)
+        if entry is None:
+            return None
+        return entry["status"], entry["headers"], self._zip.read(entry["member"])
+
+    def __contains__(self, url: str) -> bool:
+        return url in self.entries
+
+    def __len__(self) -> int:
+        return len(self.entries)
+
+    def close(self) -> None:
+        self._zip.close()
+
+    def __enter__(self) -> Snapshot:
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb) -> None:
+        self.close()
+
+
+class SnapshotWriter:
+    """Write a new snapshot, replacing the file only once it is complete.
+
+    The first response added for each URL is kept.
+    """
+
+    def __init__(self, path: Union[str, Path]) -> None:
+        self.path = Path(path)
+        self._tmp_path = self.path.with_name(f".{self.path.name}.{os.getpid()}.tmp")
+        self._zip = zipfile.ZipFile(self._tmp_path, "w", zipfile.ZIP_DEFLATED)
+        self.entries: Dict[str, Dict] = dict()
+
+    def add(self, url: str, status: int, headers: Dict[str, str], content: bytes):
+        if url in self.entries:
+            return
+        member = member_name(url)
+        self._zip.writestr(member, content)
+        self.entries[url] = {"member": member, "status": status, "headers": headers}
+
+    def close(self) -> None:
+        index = {
+            "format": FORMAT_VERSION,
+            "created": dt.datetime.now(dt.timezone.utc).isoformat(),
+            "entries": self.entries,
+        }
+        self._zip.writestr(INDEX_NAME, json.dumps(index))
+        self._zip.close()
+        os.replace(self._tmp_path, self.path)
+
+    def abort(self) -> None:
+        self._zip.close()
+        self._tmp_path.unlink()
+
+
+class RecordingTransport(httpx.AsyncBaseTransport):
+    """Send requests over the network, adding each final response to a snapshot."""
+
+    def __init__(
+        self, writer: SnapshotWriter, inner: Optional[httpx.AsyncBaseTransport] = None
+    ) -> None:
+        self.writer = writer
+        if inner is None:
+            inner = httpx.AsyncHTTPTransport()
+        self.inner = inner
+
+    async def handle_async_request(self, request: httpx.Request) -> httpx.Response:
+        response = await self.inner.handle_async_request(request)
+        if response.status_code in RETRY_STATUSES:
+            return response
+        # reading decodes the body, so the response is rebuilt without its encoding
+        content = await response.aread()
+        await response.aclose()
+        headers = {
+            k: response.headers[k] for k in STORED_HEADERS if k in response.headers
+        }
+        self.writer.add(str(request.url), response.status_code, headers, content)
+        return httpx.Response(
+            response.status_code,
+            headers=[
+                (k, v)
+                for k, v in response.headers.multi_items()
+                if k.lower() not in WIRE_HEADERS
+            ],
+            content=content,
+            request=request,
+        )
+
+    async def aclose(self) -> None:
+        await self.inner.aclose()
+
+
+class SnapshotTransport(httpx.AsyncBaseTransport):
+    """Answer every request from a snapshot, without touching the network.
+
+    Requests for URLs which are not in the snapshot raise ``NotInSnapshot``.
+    """
+
+    def __init__(self, snapshot: Snapshot) -> None:
+        self.snapshot = snapshot
+
+    async def handle_async_request(self, request: httpx.Request) -> httpx.Response:
+        found = self.snapshot.get(str(request.url))
+        if found is None:
+            raise NotInSnapshot(
+                f"{request.url} is not in the snapshot {self.snapshot.path}",
+                request=request,
+            )
+        status, headers, content = found
+        return httpx.Response(status, headers=headers, content=content, request=request)
+
+    async def aclose(self) -> None:
+        self.snapshot.close()
+
+
+def import_snapshot(source: Union[str, Path], target: Union[str, Path]) -> int:
+    """Merge a snapshot into another (which may not exist yet).
+
+    Responses from ``source`` replace those in ``target``.
+    Returns the number of responses in the merged snapshot.
+    """
+    target = Path(target)
+    target.parent.mkdir(parents=True, exist_ok=True)
+    writer = SnapshotWriter(target)
+    try:
+        for path in (source, target):
+            if path == target and not target.exists():
+                continue
+            with Snapshot(path) as snapshot:
+                for url, entry in snapshot.entries.items():
+                    if url not in writer.entries:
+                        writer.add(url, *snapshot.get(url))
+    except BaseException:
+        writer.abort()
+        raise
+    writer.close()
+    return len(writer.entries)
+
+
+def describe(path: Union[str, Path]) -> Dict:
+    with Snapshot(path) as snapshot:
+        hosts: Counter = Counter()
+        for url in snapshot.entries:
+            hosts[httpx.URL(url).host] += 1
+        statuses = Counter(str(e["status"]) for e in snapshot.entries.values())
+        return {
+            "path": str(snapshot.path),
+            "created": snapshot.created,
+            "responses": len(snapshot),
+            "hosts": dict(hosts.most_common()),
+            "statuses": dict(sorted(statuses.items())),
+        }
+
+
+def main(args=None):
+    parser = argparse.ArgumentParser(
+        prog="citepy snapshot",
+        description=__doc__,
+        formatter_class=argparse.RawDescriptionHelpFormatter,
+    )
+    subparsers = parser.add_subparsers(dest="command")
+    subparsers.required = True
+
+    export = subparsers.add_parser(
+        "export",
+        help="fetch packages, recording every response in a snapshot",
+        description=(
+            "Fetch packages as citepy would, recording every response in a "
+            "snapshot. Arguments after BUNDLE are passed to citepy."
+        ),
+    )
+    export.add_argument("bundle", type=Path, help="path of the snapshot to write")
+    export.add_argument(
+        "citepy_args",
+        nargs=argparse.REMAINDER,
+        help="packages and options, as for citepy",
+    )
+
+    import_ = subparsers.add_parser(
+        "import",
+        help="merge a snapshot into the installed one",
+        description=(
+            "Merge a snapshot into the installed one, "
+            "which `citepy --offline` reads by default."
+        ),
+    )
+    import_.add_argument("bundle", type=Path, help="path of the snapshot to import")
+    import_.add_argument(
+        "--cache-dir",
+        type=Path,
+        default=default_cache_dir(),
+        help=(
+            "directory in which to install the snapshot "
+            "(default $XDG_CACHE_HOME/citepy or ~/.cache/citepy)"
+        ),
+    )
+
+    info = subparsers.add_parser("info", help="summarise a snapshot as JSON")
+    info.add_argument(
+        "bundle", type=Path, nargs="?", help="path of a snapshot (default installed)"
+    )
+
+    parsed = parser.parse_args(args)
+
+    if parsed.command == "export":
+        from .cli import main as cli_main
+
+        return cli_main(parsed.citepy_args, export_snapshot=parsed.bundle)
+
+    if parsed.command == "import":
+        target = default_snapshot_path(parsed.cache_dir)
+        try:
+            count = import_snapshot(parsed.bundle, target)
+        except (OSError, ValueError, zipfile.BadZipFile) as e:
+            parser.exit(1, f"citepy snapshot: error: {e}\n")
+        print(f"Installed {count} responses in {target}")
+        return
+
+    try:
+        jso = describe(parsed.bundle or default_snapshot_path())
+    except (OSError, ValueError, zipfile.BadZipFile) as e:
+        parser.exit(1, f"citepy snapshot: error: {e}\n")
+    json.dump(jso, sys.stdout, indent=2)
+    sys.stdout.write("\n")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,162 @@
+"""Instrumentation of fetch runs: request timings, cache use and throughput."""
+
+from __future__ import annotations
+
+import math
+import time
+from collections import Counter, defaultdict
+from typing import Any, DefaultDict, Dict, List, Optional
+
+
+def percentile(values: List[float], q: float) -> Optional[float]:
+    """Nearest-rank percentile of some sorted values."""
+    if not values:
+        return None
+    idx = math.ceil(q / 100 * len(values)) - 1
+    return values[min(len(values) - 1, max(0, idx))]
+
+
+def summarise_times(values: List[float]) -> Dict[str, Any]:
+    values = sorted(values)
+    return {
+        "count": len(values),
+        "total": sum(values),
+        "p50": percentile(values, 50),
+        "p90": percentile(values, 90),
+        "p99": percentile(values, 99),
+        "max": values[-1] if values else None,
+    }
+
+
+class RepoStats:
+    """Counters and timings for one repository."""
+
+    def __init__(self) -> None:
+        self.packages = 0
+        self.failed = 0
+        self.requests = 0
+        self.errors = 0
+        self.bytes = 0
+        self.retries = 0
+        self.coalesced = 0
+        self.reused = 0
+        self.statuses: Counter = Counter()
+        self.cache: Counter = Counter()
+        self.request_seconds: List[float] = []
+        self.package_seconds: List[float] = []
+        self.parse_seconds: List[float] = []
+
+    def to_jso(self) -> Dict[str, Any]:
+        return {
+            "packages": self.packages,
+            "failed": self.failed,
+            "requests": self.requests,
+            "errors": self.errors,
+            "bytes": self.bytes,
+            "retries": self.retries,
+            "coalesced": self.coalesced,
+            "reused": self.reused,
+            "statuses": {str(k): v for k, v in sorted(self.statuses.items())},
+            "cache": dict(self.cache),
+            "request_seconds": summarise_times(self.request_seconds),
+            "package_seconds": summarise_times(self.package_seconds),
+            "parse_seconds": summarise_times(self.parse_seconds),
+        }
+
+
+class RunStats:
+    """Record what a run spent its time on, per repository.
+
+    Timings are wall-clock seconds.
+    A request's time includes any retries and the waits between them;
+    requests answered by a fresh cache entry are recorded as cache hits
+    without a status.
+    """
+
+    def __init__(self) -> None:
+        self.repos: DefaultDict[str, RepoStats] = defaultdict(RepoStats)
+        self.dump_seconds = 0.0
+        self.started = time.perf_counter()
+        self.finished: Optional[float] = None
+
+    def record_request(
+        self,
+        repo: str,
+        seconds: float,
+        status: Optional[int] = None,
+        n_bytes: int = 0,
+        cache: Optional[str] = None,
+        error: bool = False,
+    ) -> None:
+        """Record one (possibly cached) request.
+
+        ``cache`` is ``"hit"``, ``"revalidated"``, ``"miss"``,
+        or ``None`` if there is no cache.
+        """
+        stats = self.repos[repo]
+        stats.requests += 1
+        stats.request_seconds.append(seconds)
+        stats.bytes += n_bytes
+        if status is not None:
+            stats.statuses[status] += 1
+        if cache is not None:
+            stats.cache[cache] += 1
+        if error:
+            stats.errors += 1
+
+    def record_retry(self, repo: str) -> None:
+        self.repos[repo].retries += 1
+
+    def record_reused(self, repo: str) -> None:
+        """Record a package whose item was reused rather than fetched."""
+        self.repos[repo].reused += 1
+
+    def record_coalesced(self, repo: str) -> None:
+        self.repos[repo].coalesced += 1
+
+    def record_parse(self, repo: str, seconds: float) -> None:
+        self.repos[repo].parse_seconds.append(seconds)
+
+    def record_package(self, repo: str, seconds: float, ok: bool = True) -> None:
+        stats = self.repos[repo]
+        stats.packages += 1
+        stats.package_seconds.append(seconds)
+        if not ok:
+            stats.failed += 1
+
+    def record_dump(self, seconds: float) -> None:
+        self.dump_seconds += seconds
+
+    def finish(self) -> None:
+        self.finished = time.perf_counter()
+
+    def to_jso(self) -> Dict[str, Any]:
+        finished = self.finished or time.perf_counter()
+        elapsed = finished - self.started
+        repos = {name: stats.to_jso() for name, stats in sorted(self.repos.items())}
+
+        totals: Dict[str, Any] = dict()
+        for key in (
+            "packages",
+            "failed",
+            "requests",
+            "errors",
+            "bytes",
+            "retries",
+            "coalesced",
+            "reused",
+        ):
+            totals[key] = sum(r[key] for r in repos.values())
+        cache: Counter = Counter()
+        for r in repos.values():
+            cache.update(r["cache"])
+        totals["cache"] = dict(cache)
+
+        return {
+            "elapsed_seconds": elapsed,
+            "packages_per_second": totals["packages"] / elapsed if elapsed else None,
+            "requests_per_second": totals["requests"] / elapsed if elapsed else None,
+            "dump_seconds": self.dump_seconds,
+            "totals": totals,
+            "repos": repos,
+        }
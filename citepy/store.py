@@ -0,0 +1,250 @@
+"""
+Persistent store of finished items for released versions of packages.
+
+Released versions are immutable, so an item built for a pinned version
+can be reused without fetching or parsing anything;
+only its access date is updated.
+Items are kept in an SQLite database keyed by repository, package and version.
+
+- ``citepy store info`` summarises the store as JSON.
+- ``citepy store prune`` removes items which have not been used recently,
+  or the least recently used beyond a maximum number.
+"""
+
+from __future__ import annotations
+
+import argparse
+import datetime as dt
+import json
+import logging
+import sqlite3
+import sys
+import time
+from pathlib import Path
+from typing import Any, Dict, Iterable, Optional, Tuple, Union
+
+from .cache import default_cache_dir
+from .classes import CslDate
+from .lockfiles import PackageSpec
+
+logger = logging.getLogger(__name__)
+
+StoreKey = Tuple[str, str, str]
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS items (
+    repo TEXT NOT NULL,
+    package TEXT NOT NULL,
+    version TEXT NOT NULL,
+    item TEXT NOT NULL,
+    stored REAL NOT NULL,
+    used REAL NOT NULL,
+    PRIMARY KEY (repo, package, version)
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS items_used ON items (used);
+"""
+
+
+def default_store_path(cache_dir: Union[str, Path, None] = None) -> Path:
+    if cache_dir is None:
+        cache_dir = default_cache_dir()
+    return Path(cache_dir) / "results.sqlite"
+
+
+def store_key(repo: str, package: str, version: str) -> StoreKey:
+    return repo, package.lower(), version
+
+
+def with_accessed(jso: Dict[str, Any], date_accessed: Optional[dt.date] = None):
+    """A stored item, accessed on the given date, if any (as fetchers do)."""
+    jso = dict(jso)
+    if date_accessed is not None:
+        jso["accessed"] = CslDate.from_date(date_accessed).to_jso()
+    return jso
+
+
+class ResultStore:
+    """SQLite-backed store of serialised items by repository, package and version.
+
+    Only pinned versions are stored, and stored items are never revalidated,
+    so only items built from the pinned version's metadata should be stored.
+    Items are stored without their access date.
+    Each lookup records when the items were last used, for pruning.
+    """
+
+    def __init__(self, path: Union[str, Path]) -> None:
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        # the event loop calls from one thread, but the server may be
+        # created in another
+        self._db = sqlite3.connect(str(self.path), timeout=30, check_same_thread=False)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute("PRAGMA synchronous=NORMAL")
+        self._db.executescript(SCHEMA)
+
+    def get(self, repo: str, package: str, version: Optional[str] = None):
+        """The stored item for a pinned version, if there is one."""
+        if not version:
+            return None
+        key = store_key(repo, package, version)
+        with self._db:
+            row = self._db.execute(
+                "SELECT item FROM items WHERE repo=? AND package=? AND version=?", key
+            ).fetchone()
+            if row is None:
+                return None
+            self._db.execute(
+                "UPDATE items SET used=? WHERE repo=? AND package=? AND version=?",
+                (time.time(), *key),
+            )
+        return json.loads(row[0])
+
+    def get_many(self, specs: Iterable[PackageSpec]) -> Dict[StoreKey, Dict[str, Any]]:
+        """Stored items for every pinned spec, in one query, by ``store_key``.
+
+        ``specs`` are read up front, so should be batched by the caller.
+        """
+        keys = {store_key(repo, p, v) for repo, p, v in specs if v}
+        if not keys:
+            return dict()
+        with self._db:
+            self._db.execute(
+                "CREATE TEMP TABLE IF NOT EXISTS wanted "
+                "(repo TEXT, package TEXT, version TEXT)"
+            )
+            self._db.execute("DELETE FROM wanted")
+            self._db.executemany("INSERT INTO wanted VALUES (?, ?, ?)", keys)
+            rows = self._db.execute(
+                "SELECT items.repo, items.package, items.version, items.item "
+                "FROM items JOIN wanted USING (repo, package, version)"
+            ).fetchall()
+            self._db.execute(
+                "UPDATE items SET used=? "
+                "WHERE (repo, package, version) IN (SELECT * FROM wanted)",
+                (time.time(),),
+            )
+            self._db.execute("DELETE FROM wanted")
+        logger.debug("Found %s of %s pinned packages in store", len(rows), len(keys))
+        return {(repo, p, v): json.loads(item) for repo, p, v, item in rows}
+
+    def put(self, repo: str, package: str, version: str, jso: Dict[str, Any]):
+        jso = {k: v for k, v in jso.items() if k != "accessed"}
+        now = time.time()
+        with self._db:
+            self._db.execute(
+                "INSERT OR REPLACE INTO items VALUES (?, ?, ?, ?, ?, ?)",
+                (*store_key(repo, package, version), json.dumps(jso), now, now),
+            )
+
+    def prune(
+        self,
+        older_than: Optional[float] = None,
+        max_items: Optional[int] = None,
+        repo: Optional[str] = None,
+    ) -> int:
+        """Remove items unused for ``older_than`` seconds,
+        then the least recently used beyond ``max_items``.
+
+        If ``repo`` is given, only that repository's items are considered.
+        Returns the number of items removed.
+        """
+        where = "" if repo is None else " AND repo = :repo"
+        params: Dict[str, Any] = {"repo": repo}
+        removed = 0
+        with self._db:
+            if older_than is not None:
+                params["cutoff"] = time.time() - older_than
+                removed += self._db.execute(
+                    "DELETE FROM items WHERE used < :cutoff" + where, params
+                ).rowcount
+            if max_items is not None:
+                params["max_items"] = max_items
+                removed += self._db.execute(
+                    "DELETE FROM items WHERE (repo, package, version) IN ("
+                    "SELECT repo, package, version FROM items WHERE 1"
+                    + where
+                    + " ORDER BY used DESC LIMIT -1 OFFSET :max_items)"
+                    + where,
+                    params,
+                ).rowcount
+        self._db.execute("VACUUM")
+        return removed
+
+    def to_jso(self) -> Dict[str, Any]:
+        repos = {
+            repo: count
+            for repo, count in self._db.execute(
+                "SELECT repo, count(*) FROM items GROUP BY repo ORDER BY repo"
+            )
+        }
+        return {
+            "path": str(self.path),
+            "items": sum(repos.values()),
+            "repos": repos,
+            "bytes": self.path.stat().st_size,
+        }
+
+    def __len__(self) -> int:
+        return self._db.execute("SELECT count(*) FROM items").fetchone()[0]
+
+    def close(self) -> None:
+        self._db.close()
+
+
+def main(args=None):
+    parser = argparse.ArgumentParser(
+        prog="citepy store",
+        description=__doc__,
+        formatter_class=argparse.RawDescriptionHelpFormatter,
+    )
+    parser.add_argument(
+        "--cache-dir",
+        type=Path,
+        default=default_cache_dir(),
+        help=(
+            "directory containing the store "
+            "(default $XDG_CACHE_HOME/citepy or ~/.cache/citepy)"
+        ),
+    )
+    subparsers = parser.add_subparsers(dest="command")
+    subparsers.required = True
+
+    subparsers.add_parser("info", help="summarise the store as JSON")
+
+    prune = subparsers.add_parser(
+        "prune", help="remove items which have not been used recently"
+    )
+    prune.add_argument(
+        "--older-than",
+        type=float,
+        metavar="DAYS",
+        help="remove items which have not been used for this many days",
+    )
+    prune.add_argument(
+        "--max-items",
+        type=int,
+        help="then remove the least recently used items beyond this many",
+    )
+    prune.add_argument("--repo", help="only prune items from this repository")
+
+    parsed = parser.parse_args(args)
+
+    store = ResultStore(default_store_path(parsed.cache_dir))
+    try:
+        if parsed.command == "prune":
+            if parsed.older_than is None and parsed.max_items is None:
+                prune.error("give --older-than and/or --max-items")
+            older_than = None
+            if parsed.older_than is not None:
+                older_than = parsed.older_than * 24 * 60 * 60
+            removed = store.prune(older_than, parsed.max_items, parsed.repo)
+            print(f"Removed {removed} items; {len(store)} remain in {store.path}")
+            return
+        json.dump(store.to_jso(), sys.stdout, indent=2)
+        sys.stdout.write("\n")
+    finally:
+        store.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -2,7 +2,9 @@ from __future__ import annotations
 
 import json
 from copy import deepcopy
+from functools import lru_cache
 from pathlib import Path
+from typing import Any, Dict
 import logging
 
 # from jsonschema import Draft3Validator as Validator
@@ -29,25 +31,63 @@ Validator = DummyValidator
 
 here = Path(__file__).absolute().parent
 
-with open(here / "csl-data.json") as f:
-    data_schema = json.load(f)
 
-data_validator = Validator(data_schema)
+# schemas are only loaded when they are first needed
+@lru_cache(None)
+def get_schema(name: str) -> Dict[str, Any]:
+    """Get the CSL-data schema (``"data"``), or a sub-schema of it.
 
-common_elements = {"$schema": data_schema["$schema"]}
+    Sub-schemas are ``"item"``, ``"type"``, ``"name"`` and ``"date"``.
+    """
+    if name == "data":
+        with open(here / "csl-data.json") as f:
+            return json.load(f)
 
-item_schema = deepcopy(data_schema["items"])
-item_schema.update(common_elements)
-item_validator = Validator(item_schema)
+    data_schema = get_schema("data")
+    if name == "item":
+        schema = data_schema["items"]
+    else:
+        item_props = get_schema("item")["properties"]
+        schema = {
+            "type": item_props["type"],
+            "name": item_props["author"]["items"]["type"][0],
+            "date": item_props["accessed"]["type"][0],
+        }[name]
 
-type_schema = deepcopy(item_schema["properties"]["type"])
-type_schema.update(common_elements)
-type_validator = Validator(type_schema)
+    schema = deepcopy(schema)
+    schema["$schema"] = data_schema["$schema"]
+    return schema
 
-name_schema = deepcopy(item_schema["properties"]["author"]["items"]["type"][0])
-name_schema.update(common_elements)
-name_validator = Validator(name_schema)
 
-date_schema = deepcopy(item_schema["properties"]["accessed"]["type"][0])
-date_schema.update(common_elements)
-date_validator = Validator(date_schema)
+class LazyValidator:
+    """Validator for a named schema, created on first use."""
+
+    def __init__(self, schema_name: str):
+        self.schema_name = schema_name
+        self._validator = None
+
+    @property
+    def validator(self):
+        if self._validator is None:
+            self._validator = Validator(get_schema(self.schema_name))
+        return self._validator
+
+    def is_valid(self, *args, **kwargs):
+        return self.validator.is_valid(*args, **kwargs)
+
+    def validate(self, *args, **kwargs):
+        return self.validator.validate(*args, **kwargs)
+
+
+data_validator = LazyValidator("data")
+item_validator = LazyValidator("item")
+type_validator = LazyValidator("type")
+name_validator = LazyValidator("name")
+date_validator = LazyValidator("date")
+
+
+def __getattr__(name):
+    # for backwards compatibility, e.g. ``validate.item_schema``
+    if name.endswith("_schema"):
+        return get_schema(name[: -len("_schema")])
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
@@ -16,7 +16,13 @@ setup(
     author="Chris L. Barnes",
     author_email="cbarnes@mrc-lmb.cam.ac.uk",
     description="Automatically create citations for packages",
-    install_requires=["jsonschema", "httpx", "beautifulsoup4"],
+    install_requires=[
+        "jsonschema",
+        "httpx",
+        "beautifulsoup4",
+        'importlib_metadata; python_version < "3.8"',
+    ],
+    extras_require={"fast": ["ijson"]},
     package_data={"citepy": ["csl-data.json"]},
     long_description=long_description,
     long_description_content_type="text/markdown",
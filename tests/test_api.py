@@ -0,0 +1,72 @@
+import asyncio
+
+import httpx
+
+from citepy.api import Citer
+from citepy.limits import HostLimiter
+
+
+def no_network(request: httpx.Request) -> httpx.Response:
+    raise AssertionError(f"requested {request.url}")
+
+
+def cite_many(n, delay, ordered=False, window=None, jobs=4):
+    """Items from ``cite_many`` over ``n`` packages, with a stand-in ``cite``.
+
+    Package ``i`` takes ``delay(i)`` seconds.
+    Also returns the most packages taken but not yet yielded at once.
+    """
+    state = {"taken": 0, "yielded": 0, "most": 0}
+
+    def specs():
+        for idx in range(n):
+            state["taken"] += 1
+            state["most"] = max(state["most"], state["taken"] - state["yielded"])
+            yield "pypi", f"pkg{idx}", None
+
+    async def cite(repo, package, version=None, check_store=True):
+        await asyncio.sleep(delay(int(package[3:])))
+        return package
+
+    async def run():
+        limiter = HostLimiter(jobs, jobs)
+        async with Citer(
+            limiter=limiter, transport=httpx.MockTransport(no_network)
+        ) as citer:
+            citer.cite = cite
+            out = []
+            async for item in citer.cite_many(specs(), ordered, window):
+                out.append(item)
+                state["yielded"] += 1
+            return out
+
+    return asyncio.run(run()), state["most"]
+
+
+def reverse_delay(n):
+    # later packages finish first
+    return lambda idx: 0.01 * (n - idx)
+
+
+def test_unordered_yields_as_completed():
+    items, _ = cite_many(8, reverse_delay(8), jobs=8)
+    assert sorted(items) == [f"pkg{idx}" for idx in range(8)]
+    assert items == [f"pkg{idx}" for idx in reversed(range(8))]
+
+
+def test_keep_order():
+    items, _ = cite_many(20, reverse_delay(20), ordered=True, jobs=8)
+    assert items == [f"pkg{idx}" for idx in range(20)]
+
+
+def test_window_bounds_packages_in_flight():
+    # the first package is slow, so later ones wait in the reorder buffer
+    def delay(idx):
+        return 0.05 if idx == 0 else 0
+
+    items, most = cite_many(30, delay, ordered=True, window=5, jobs=4)
+    assert items == [f"pkg{idx}" for idx in range(30)]
+    assert most == 5
+
+    _, most = cite_many(30, delay, ordered=False, window=5, jobs=4)
+    assert most <= 5
@@ -0,0 +1,26 @@
+import asyncio
+
+import httpx
+
+from citepy.cache import ResponseCache
+from citepy.repos.cran import CranDataFetcher
+
+
+def test_cran_response_is_cached(tmp_path):
+    requested = []
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        requested.append(str(request.url))
+        return httpx.Response(
+            200, text="<html></html>", headers={"cache-control": "max-age=3600"}
+        )
+
+    async def fetch_twice():
+        async with httpx.AsyncClient(transport=httpx.MockTransport(handler)) as client:
+            for _ in range(2):
+                fetcher = CranDataFetcher(client, ResponseCache(tmp_path))
+                # the base URL has an uppercase host, which httpx lowercases
+                await fetcher.fetch(fetcher.package_url("ggplot2"))
+
+    asyncio.run(fetch_twice())
+    assert requested == ["https://cran.r-project.org/package=ggplot2"]
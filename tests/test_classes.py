@@ -0,0 +1,239 @@
+import copy
+import json
+import pickle
+from datetime import date
+
+import pytest
+
+from citepy.classes import (
+    CslDate,
+    CslItem,
+    CslName,
+    CslType,
+    ValidationPolicy,
+    get_validation_policy,
+    jso_to_py,
+    py_to_jso,
+    validation_policy,
+)
+
+
+def make_item(**kwargs):
+    return CslItem(
+        "webpage",
+        "pkg",
+        title="Package",
+        author=["Some One"],
+        issued=date(2020, 1, 2),
+        **kwargs,
+    )
+
+
+class RecordingValidator:
+    def __init__(self, name, calls):
+        self.name = name
+        self.calls = calls
+
+    def validate(self, jso):
+        self.calls.append(self.name)
+
+
+@pytest.fixture
+def validated(monkeypatch):
+    """Names of the classes of objects validated, in order."""
+    calls = []
+    for cls in [CslItem, CslName, CslDate]:
+        monkeypatch.setattr(cls, "_validator", RecordingValidator(cls.__name__, calls))
+    return calls
+
+
+def test_default_policy():
+    assert get_validation_policy() is ValidationPolicy.OUTPUT
+
+
+def test_policy_off(validated):
+    with validation_policy("off"):
+        item = make_item()
+        item.to_jso()
+        CslItem.from_jso(item.to_jso())
+    assert validated == []
+
+
+def test_policy_output(validated):
+    with validation_policy(ValidationPolicy.OUTPUT):
+        item = make_item()
+        assert validated == []
+        item.to_jso()
+        # once, for the outermost object only
+        assert validated == ["CslItem"]
+
+
+def test_policy_construct(validated):
+    with validation_policy("construct"):
+        item = make_item()
+        # nested objects as they are built, then the item
+        assert sorted(validated) == ["CslDate", "CslItem", "CslName"]
+        validated.clear()
+        item.to_jso()
+        assert validated == ["CslItem"]
+        validated.clear()
+        CslItem.from_jso(item.to_jso(validate=False))
+        # the document, then each object as it is built
+        assert sorted(validated) == ["CslDate", "CslItem", "CslItem", "CslName"]
+
+
+def test_validate_overrides_policy(validated):
+    item = make_item()
+    with validation_policy("off"):
+        item.to_jso(validate=True)
+    item.to_jso(validate=False)
+    assert validated == ["CslItem"]
+
+
+def test_policy_is_restored():
+    with validation_policy("off"):
+        with validation_policy("construct"):
+            assert get_validation_policy() is ValidationPolicy.CONSTRUCT
+        assert get_validation_policy() is ValidationPolicy.OFF
+    assert get_validation_policy() is ValidationPolicy.OUTPUT
+
+
+@pytest.mark.parametrize("cls", [CslItem, CslName, CslDate])
+def test_no_instance_dict(cls):
+    assert not hasattr(cls.__new__(cls), "__dict__")
+
+
+def test_sparse_fields():
+    item = make_item()
+    assert set(item.fields()) == {"type", "id", "title", "author", "issued"}
+    assert item.abstract is None
+    item.title = None
+    del item.issued
+    assert set(item.fields()) == {"type", "id", "author"}
+    assert "title" not in item.to_jso()
+
+
+def test_unknown_attributes_rejected():
+    item = make_item()
+    with pytest.raises(AttributeError):
+        item.no_such_field = 1
+    with pytest.raises(AttributeError):
+        item.no_such_field
+    with pytest.raises(TypeError):
+        CslItem("webpage", "pkg", no_such_field=1)
+    with pytest.raises(ValueError):
+        CslItem.from_jso({"type": "webpage", "id": "pkg", "no-such-field": 1})
+
+
+@pytest.mark.parametrize(
+    "clone",
+    [copy.copy, copy.deepcopy, lambda obj: pickle.loads(pickle.dumps(obj))],
+    ids=["copy", "deepcopy", "pickle"],
+)
+@pytest.mark.parametrize("frozen", [False, True])
+def test_clone(clone, frozen):
+    item = make_item()
+    if frozen:
+        item.freeze()
+    other = clone(item)
+    assert other is not item
+    assert other.to_jso() == item.to_jso()
+    assert other.frozen == frozen
+    if not frozen:
+        # fields are not shared with the original
+        other.title = "Other"
+        assert item.title == "Package"
+
+
+def test_freeze():
+    item = make_item(categories=["software"]).freeze()
+    assert item.frozen
+    assert item.categories == ("software",)
+    assert item.author[0].frozen and item.issued.frozen
+    with pytest.raises(AttributeError):
+        item.title = "Other"
+    with pytest.raises(AttributeError):
+        item.author[0].literal = "Other"
+    # lists come back out as lists
+    assert item.to_jso()["categories"] == ["software"]
+
+
+def test_frozen_hash_and_equality():
+    item = make_item().freeze()
+    same = CslItem.from_jso(make_item().to_jso()).freeze()
+    different = make_item(version="1.0").freeze()
+    assert item == same
+    assert hash(item) == hash(same)
+    assert item != different
+    assert len({item, same, different}) == 2
+    # frozen and unfrozen objects compare by content
+    assert item == make_item()
+    assert hash(item) == hash(make_item())
+    assert item == item.to_jso()
+    assert item == str(item)
+
+
+# one field of each kind, and each key which is not just the name with dashes
+FULL_ITEM_JSO = {
+    "type": "article-journal",
+    "id": 123,
+    "categories": ["software", "python"],
+    "title": "A Title",
+    "edition": 2,
+    "volume": "3",
+    "DOI": "10.1000/xyz",
+    "URL": "https://example.org",
+    "journalAbbreviation": "J. Abbr.",
+    "shortTitle": "Title",
+    "archive_location": "Shelf 3",
+    "container-title": "A Journal",
+    "author": [
+        {"family": "One", "given": "Some", "non-dropping-particle": "van"},
+        {"literal": "Some Organisation"},
+    ],
+    "collection-editor": [{"family": "Two", "comma-suffix": True}],
+    "issued": {"date-parts": [[2020, 1, 2], [2020, 2]]},
+    "original-date": {"season": 2, "circa": "true", "literal": "spring 1999"},
+    "accessed": {"raw": "2021-01-01"},
+}
+
+
+def test_json_roundtrip():
+    item = CslItem.from_jso(json.loads(json.dumps(FULL_ITEM_JSO)))
+    assert item.type is CslType.ARTICLE_JOURNAL
+    assert item.journal_abbreviation == "J. Abbr."
+    assert item.author[0].non_dropping_particle == "van"
+    assert item.issued.date_parts == [[2020, 1, 2], [2020, 2]]
+    assert json.loads(json.dumps(item.to_jso())) == FULL_ITEM_JSO
+    frozen = CslItem.from_jso(FULL_ITEM_JSO).freeze()
+    assert json.loads(json.dumps(frozen.to_jso())) == FULL_ITEM_JSO
+
+
+def test_constructor_normalises():
+    item = CslItem(
+        CslType.WEBPAGE,
+        "pkg",
+        author="Some One",
+        editor=[{"family": "Two"}, CslName(literal="Three")],
+        issued=[date(2020, 1, 2), date(2020, 1, 3)],
+        accessed="yesterday",
+    )
+    assert item.to_jso() == {
+        "type": "webpage",
+        "id": "pkg",
+        "author": [{"literal": "Some One"}],
+        "editor": [{"family": "Two"}, {"literal": "Three"}],
+        "issued": {"date-parts": [[2020, 1, 2], [2020, 1, 3]]},
+        "accessed": {"literal": "yesterday"},
+    }
+
+
+def test_deprecated_helpers():
+    item = CslItem.from_jso(FULL_ITEM_JSO)
+    with pytest.deprecated_call():
+        fields = jso_to_py(FULL_ITEM_JSO)
+    assert CslItem(**fields) == item
+    with pytest.deprecated_call():
+        assert py_to_jso(dict(fields, note=None)) == FULL_ITEM_JSO
+    with pytest.deprecated_call():
+        assert py_to_jso(item) == FULL_ITEM_JSO
@@ -0,0 +1,48 @@
+import json
+
+import pytest
+
+from citepy.cli import main
+from citepy.snapshot import NotInSnapshot, SnapshotWriter
+
+
+@pytest.fixture
+def empty_snapshot(tmp_path):
+    """Run offline against a snapshot with no responses, so every fetch fails."""
+    path = tmp_path / "snapshot.zip"
+    SnapshotWriter(path).close()
+    return ["--offline", "--snapshot", str(path), "--cache-dir", str(tmp_path)]
+
+
+def test_failed_run_writes_nothing(tmp_path, empty_snapshot):
+    out = tmp_path / "refs.json"
+    with pytest.raises(NotInSnapshot):
+        main([*empty_snapshot, "-o", str(out), "numpy==1.16.3"])
+    assert list(tmp_path.iterdir()) == [tmp_path / "snapshot.zip"]
+
+
+def test_failed_run_keeps_previous_outfile(tmp_path, empty_snapshot):
+    refs = tmp_path / "refs.json"
+    items = [
+        {
+            "id": name,
+            "type": "webpage",
+            "version": "1.0.0",
+            "categories": ["software", "python", "pypi"],
+        }
+        for name in ["attrs", "click", "six"]
+    ]
+    refs.write_text(json.dumps(items, indent=2))
+    before = refs.read_bytes()
+    args = ["--previous", str(refs), "-o", str(refs)]
+    packages = [f"{item['id']}==1.0.0" for item in items]
+
+    with pytest.raises(NotInSnapshot):
+        main([*empty_snapshot, *args, *packages, "missing==1.0.0"])
+    assert refs.read_bytes() == before
+
+    # with every package reused, the file is rewritten in place
+    with pytest.raises(SystemExit) as exc_info:
+        main([*empty_snapshot, *args, *packages])
+    assert exc_info.value.code == 0
+    assert json.loads(refs.read_text()) == items
@@ -0,0 +1,56 @@
+import asyncio
+import logging
+
+import httpx
+
+from citepy.repos.cran import CranDataFetcher, CranIndex
+
+FULL_INDEX = """\
+Package: foo
+Version: 1.0
+Title: Does Foo
+Author: Some One
+Published: 2020-01-01
+"""
+
+# like CRAN's own src/contrib/PACKAGES
+VERSIONS_INDEX = """\
+Package: foo
+Version: 1.0
+Depends: R (>= 3.5)
+"""
+
+PAGE = """<html><body><h2>foo: Does Foo</h2><p>Foo things.</p>
+<table summary="Package foo summary">
+<tr><td>Version:</td><td>1.0</td></tr>
+<tr><td>Published:</td><td>2020-01-01</td></tr>
+</table></body></html>"""
+
+
+def cite_with_index(index_text):
+    requested = []
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        requested.append(str(request.url))
+        return httpx.Response(200, text=PAGE)
+
+    async def cite():
+        async with httpx.AsyncClient(transport=httpx.MockTransport(handler)) as client:
+            index = CranIndex.from_lines(index_text.splitlines())
+            fetcher = CranDataFetcher(client, index=index)
+            return await fetcher.get("foo")
+
+    return asyncio.run(cite()), requested
+
+
+def test_full_index_skips_page():
+    item, requested = cite_with_index(FULL_INDEX)
+    assert requested == []
+    assert item.title == "foo: Does Foo"
+
+
+def test_versions_index_warns(caplog):
+    with caplog.at_level(logging.WARNING):
+        item, requested = cite_with_index(VERSIONS_INDEX)
+    assert len(requested) == 1
+    assert "lacks" in caplog.text
@@ -0,0 +1,75 @@
+import json
+from datetime import date
+from io import StringIO
+
+import pytest
+
+from citepy.classes import CslItem
+from citepy.dump import CslJsonPrettyDumper, dumper_classes, dumpers
+
+ITEMS = [
+    CslItem(
+        "webpage",
+        f"pkg{n}",
+        title=f"Package {n}",
+        author=["Some One"],
+        issued=date(2020, 1, n + 1),
+        categories=["software", "python"],
+    )
+    for n in range(3)
+]
+
+# what the formats wrote when items were dumped all at once
+JSON_DUMP_KWARGS = {
+    "csl-json/pretty": {"indent": 2},
+    "csl-json/min": {"separators": (",", ":")},
+}
+
+
+def dumped(fmt, items):
+    f = StringIO()
+    dumpers[fmt](items, f)
+    return f.getvalue()
+
+
+@pytest.mark.parametrize("fmt", sorted(JSON_DUMP_KWARGS))
+@pytest.mark.parametrize("n_items", [0, 1, 3])
+def test_array_matches_json_dump(fmt, n_items):
+    items = ITEMS[:n_items]
+    expected = StringIO()
+    json.dump(
+        [item.to_jso() for item in items],
+        expected,
+        sort_keys=True,
+        **JSON_DUMP_KWARGS[fmt],
+    )
+    expected.write("\n")
+    assert dumped(fmt, items) == expected.getvalue()
+
+
+def test_empty_array():
+    assert dumped("csl-json/pretty", []) == "[]\n"
+    assert dumped("csl-json/min", []) == "[]\n"
+
+
+def test_lines():
+    lines = dumped("csl-json/lines", ITEMS).splitlines()
+    assert [json.loads(line) for line in lines] == [item.to_jso() for item in ITEMS]
+
+
+def test_write_jso_verbatim():
+    f = StringIO()
+    with dumper_classes["csl-json/min"](f) as dumper:
+        dumper.write_jso({"id": "stored"})
+        dumper.write(ITEMS[0])
+    assert json.loads(f.getvalue()) == [{"id": "stored"}, ITEMS[0].to_jso()]
+
+
+def test_abort_leaves_array_unclosed():
+    f = StringIO()
+    with pytest.raises(RuntimeError):
+        with CslJsonPrettyDumper(f) as dumper:
+            dumper.write(ITEMS[0])
+            raise RuntimeError()
+    with pytest.raises(json.JSONDecodeError):
+        json.loads(f.getvalue())
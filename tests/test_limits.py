@@ -0,0 +1,59 @@
+import asyncio
+from collections import Counter
+
+import pytest
+
+from citepy.limits import HostLimiter, parse_host_limit
+
+
+def max_concurrency(limiter, urls):
+    """Highest number of concurrent holders of the limiter, overall and by host."""
+    current: Counter = Counter()
+    highest: Counter = Counter()
+
+    async def hold(url):
+        host = url.split("/")[2]
+        async with limiter.limit(url):
+            current[host] += 1
+            current[None] += 1
+            highest[host] = max(highest[host], current[host])
+            highest[None] = max(highest[None], current[None])
+            await asyncio.sleep(0.01)
+            current[host] -= 1
+            current[None] -= 1
+
+    async def run():
+        await asyncio.gather(*(hold(url) for url in urls))
+
+    asyncio.run(run())
+    return highest
+
+
+def test_per_host_cap():
+    urls = [f"https://a.org/{n}" for n in range(10)]
+    urls += [f"https://b.org/{n}" for n in range(10)]
+    highest = max_concurrency(HostLimiter(jobs=10, per_host=3), urls)
+    assert highest["a.org"] == 3
+    assert highest["b.org"] == 3
+    assert highest[None] == 6
+
+
+def test_jobs_cap():
+    urls = [f"https://host{n}.org/" for n in range(10)]
+    highest = max_concurrency(HostLimiter(jobs=4, per_host=3), urls)
+    assert highest[None] == 4
+
+
+def test_host_limits_apply_to_subdomains():
+    limiter = HostLimiter(jobs=10, per_host=5, host_limits={"crates.io": 2})
+    assert limiter.host_limit("crates.io") == 2
+    assert limiter.host_limit("static.CRATES.io") == 2
+    assert limiter.host_limit("notcrates.io") == 5
+    urls = [f"https://static.crates.io/{n}" for n in range(6)]
+    assert max_concurrency(limiter, urls)["static.crates.io"] == 2
+
+
+def test_parse_host_limit():
+    assert parse_host_limit("Crates.io=2") == ("crates.io", 2)
+    with pytest.raises(ValueError):
+        parse_host_limit("2")
@@ -0,0 +1,195 @@
+import json
+import sys
+from io import StringIO
+from pathlib import Path
+
+import pytest
+
+from citepy.lockfiles import (
+    check_lockfile,
+    detect_format,
+    read_cargo_lock,
+    read_lockfile,
+    read_poetry_lock,
+    read_requirements,
+)
+
+REQUIREMENTS = """\
+# a comment
+--index-url https://example.org/simple
+-e git+https://github.com/someone/editable.git#egg=editable
+attrs==21.2.0 \\
+    --hash=sha256:abc \\
+    --hash=sha256:def
+    # via cattrs
+Click===8.0.1  # trailing comment
+requests[socks] == 2.26.0 ; python_version >= "3.6"
+numpy>=1.20
+pkg @ https://example.org/pkg-1.0.tar.gz
+six
+"""
+
+POETRY_LOCK = """\
+[[package]]
+name = "attrs"
+version = "21.2.0"
+description = "Classes Without Boilerplate"
+category = "main"
+optional = false
+
+[package.extras]
+dev = ["coverage"]
+
+[[package]]
+name = "private"
+version = "1.0.0"
+
+[package.source]
+type = "legacy"
+url = "https://example.org/simple"
+reference = "private"
+
+[[package]]
+name = "from-git"
+version = "0.1.0"
+
+[package.dependencies]
+attrs = ">=20"
+
+[package.source]
+type = "git"
+url = "https://github.com/someone/from-git.git"
+reference = "main"
+
+[metadata]
+lock-version = "1.1"
+python-versions = "^3.7"
+content-hash = "abc"
+
+[metadata.files]
+attrs = []
+"""
+
+CARGO_LOCK = """\
+# This file is automatically @generated by Cargo.
+version = 3
+
+[[package]]
+name = "local"
+version = "0.1.0"
+dependencies = [
+ "serde",
+]
+
+[[package]]
+name = "serde"
+version = "1.0.130"
+source = "registry+https://github.com/rust-lang/crates.io-index"
+checksum = "abc"
+
+[[package]]
+name = "forked"
+version = "0.2.0"
+source = "git+https://github.com/someone/forked#abc"
+"""
+
+PIPFILE_LOCK = {
+    "_meta": {"hash": {"sha256": "abc"}},
+    "default": {
+        "attrs": {"hashes": ["sha256:abc"], "version": "==21.2.0"},
+        "editable": {"editable": True, "git": "https://github.com/someone/e.git"},
+        "unpinned": {"version": "*"},
+    },
+    "develop": {"pytest": {"version": "==6.2.5", "markers": "python_version"}},
+}
+
+RENV_LOCK = {
+    "R": {"Version": "4.1.0"},
+    "Packages": {
+        "ggplot2": {"Package": "ggplot2", "Version": "3.3.5", "Source": "Repository"},
+        "dev": {"Package": "dev", "Version": "0.1", "Source": "GitHub"},
+    },
+}
+
+
+def test_requirements():
+    assert list(read_requirements(StringIO(REQUIREMENTS))) == [
+        ("pypi", "attrs", "21.2.0"),
+        ("pypi", "Click", "8.0.1"),
+        ("pypi", "requests", "2.26.0"),
+        ("pypi", "numpy", None),
+        ("pypi", "six", None),
+    ]
+
+
+def test_requirements_trailing_continuation():
+    assert list(read_requirements(StringIO("attrs==21.2.0 \\"))) == [
+        ("pypi", "attrs", "21.2.0")
+    ]
+
+
+def test_nested_requirements(tmp_path):
+    (tmp_path / "sub").mkdir()
+    (tmp_path / "sub" / "base.txt").write_text("six==1.16.0\n")
+    (tmp_path / "dev.txt").write_text("-r sub/base.txt\n--requirement=sub/base.txt\n")
+    assert list(read_lockfile(tmp_path / "dev.txt")) == [("pypi", "six", "1.16.0")] * 2
+
+
+def test_poetry_lock():
+    assert list(read_poetry_lock(StringIO(POETRY_LOCK))) == [
+        ("pypi", "attrs", "21.2.0"),
+        ("pypi", "private", "1.0.0"),
+    ]
+
+
+def test_cargo_lock():
+    assert list(read_cargo_lock(StringIO(CARGO_LOCK))) == [
+        ("crates", "serde", "1.0.130")
+    ]
+
+
+@pytest.fixture(params=["ijson", "json"])
+def json_backend(request, monkeypatch):
+    if request.param == "json":
+        monkeypatch.setitem(sys.modules, "ijson", None)
+    else:
+        pytest.importorskip("ijson")
+    return request.param
+
+
+def test_pipfile_lock(tmp_path, json_backend):
+    path = tmp_path / "Pipfile.lock"
+    path.write_text(json.dumps(PIPFILE_LOCK))
+    assert list(read_lockfile(path)) == [
+        ("pypi", "attrs", "21.2.0"),
+        ("pypi", "unpinned", None),
+        ("pypi", "pytest", "6.2.5"),
+    ]
+
+
+def test_renv_lock(tmp_path, json_backend):
+    path = tmp_path / "renv.lock"
+    path.write_text(json.dumps(RENV_LOCK))
+    assert list(read_lockfile(path)) == [("cran", "ggplot2", "3.3.5")]
+
+
+@pytest.mark.parametrize(
+    "name,fmt",
+    [
+        ("requirements.txt", "requirements"),
+        ("requirements-dev.in", "requirements"),
+        ("poetry.lock", "poetry.lock"),
+        ("Cargo.lock", "Cargo.lock"),
+    ],
+)
+def test_detect_format(name, fmt):
+    assert detect_format(Path(name)) == fmt
+
+
+def test_check_lockfile(tmp_path):
+    with pytest.raises(ValueError):
+        check_lockfile(tmp_path / "foo.lock")
+    with pytest.raises(OSError):
+        check_lockfile(tmp_path / "Cargo.lock")
+    (tmp_path / "Cargo.lock").write_text(CARGO_LOCK)
+    assert check_lockfile(tmp_path / "Cargo.lock") == "Cargo.lock"
@@ -0,0 +1,32 @@
+import pytest
+
+from citepy.options import parse_package_spec, parse_repo_url, parse_size
+
+
+@pytest.mark.parametrize(
+    "s,spec",
+    [
+        ("numpy", ("pypi", "numpy", None)),
+        (" numpy==1.16.3\n", ("pypi", "numpy", "1.16.3")),
+        ("crates:serde=1.0.0", ("crates", "serde", "1.0.0")),
+        ("numpy>=1.16", ("pypi", "numpy", None)),
+        ("nope:numpy", None),
+        ("-", None),
+    ],
+)
+def test_parse_package_spec(s, spec):
+    assert parse_package_spec(s, "pypi") == spec
+
+
+def test_parse_repo_url():
+    assert parse_repo_url("pypi=https://example.org/pypi") == (
+        "pypi",
+        "https://example.org/pypi",
+    )
+    with pytest.raises(ValueError):
+        parse_repo_url("nope=https://example.org")
+
+
+def test_parse_size():
+    assert parse_size("256M") == 256 * 1024**2
+    assert parse_size("1.5 KiB") == 1536
@@ -0,0 +1,19 @@
+import asyncio
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+
+import pytest
+
+from citepy.classes import ValidationPolicy, get_validation_policy, validation_policy
+from citepy.repos.pypi import PypiDataFetcher
+
+
+@pytest.mark.parametrize("pool", [ThreadPoolExecutor, ProcessPoolExecutor])
+@pytest.mark.parametrize("policy", list(ValidationPolicy))
+def test_worker_policy(pool, policy):
+    async def run():
+        with pool(1) as executor:
+            fetcher = PypiDataFetcher(None, executor=executor)
+            return await fetcher.run_parser(get_validation_policy)
+
+    with validation_policy(policy):
+        assert asyncio.run(run()) is policy
@@ -0,0 +1,26 @@
+import json
+
+from citepy.previous import PreviousItems
+
+ITEM = {
+    "id": "foo",
+    "version": "1.0",
+    "type": "software",
+    "categories": ["software", "python", "libraries", "pypi"],
+}
+
+
+def test_missing_file_is_empty(tmp_path):
+    assert len(PreviousItems.from_path(tmp_path / "refs.json")) == 0
+
+
+def test_formats(tmp_path):
+    array = tmp_path / "refs.json"
+    array.write_text(json.dumps([ITEM], indent=2))
+    lines = tmp_path / "refs.jsonl"
+    lines.write_text(json.dumps(ITEM) + "\n")
+    for path in (array, lines):
+        previous = PreviousItems.from_path(path)
+        assert previous.get("pypi", "Foo", "1.0") == ITEM
+        assert previous.get("pypi", "foo") is None
+        assert previous.get("crates", "foo", "1.0") is None
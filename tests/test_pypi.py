@@ -0,0 +1,80 @@
+import json
+
+import pytest
+
+from citepy.repos.pypi import item_from_summary, summarise_json
+
+
+def upload(time):
+    return {"filename": "pkg.whl", "upload_time": time, "digests": {"md5": "0"}}
+
+
+INFO = {"name": "pkg", "version": "1.1.0", "summary": "A package", "size": 1.5}
+
+DOCUMENT = {
+    "info": INFO,
+    "last_serial": 1,
+    "releases": {
+        "1.0.0": [upload("2019-05-02T00:00:00"), upload("2019-05-01T00:00:00")],
+        "1.0.1": [],
+        "1.1.0": [upload("2020-01-01T00:00:00")],
+    },
+    "urls": [upload("2020-01-01T00:00:00")],
+}
+
+# versioned documents may not list releases
+VERSIONED = {"info": INFO, "releases": {}, "urls": [upload("2020-01-01T00:00:00")]}
+
+
+@pytest.fixture(params=[False, True], ids=["json", "stream"])
+def stream(request):
+    if request.param:
+        pytest.importorskip("ijson")
+    return request.param
+
+
+@pytest.mark.parametrize("scan_releases", [True, False])
+def test_summarise(stream, scan_releases):
+    summary = summarise_json(json.dumps(DOCUMENT).encode(), scan_releases, stream)
+    assert summary == {
+        "info": INFO,
+        "upload_time": "2020-01-01T00:00:00",
+        "first_upload_time": "2019-05-01T00:00:00" if scan_releases else None,
+    }
+
+
+def test_summarise_versioned(stream):
+    summary = summarise_json(json.dumps(VERSIONED).encode(), stream=stream)
+    assert summary == {
+        "info": INFO,
+        "upload_time": "2020-01-01T00:00:00",
+        "first_upload_time": None,
+    }
+
+
+# e.g. a release whose files were all deleted
+NO_FILES = {
+    "info": dict(
+        INFO,
+        version="1.2.0",
+        author="Some One",
+        project_url="https://pypi.org/project/pkg/",
+        classifiers=[],
+    ),
+    "releases": {"1.0.0": [], "1.2.0": []},
+    "urls": [],
+}
+
+
+def test_release_without_files(stream):
+    summary = summarise_json(json.dumps(NO_FILES).encode(), stream=stream)
+    assert summary["upload_time"] is None
+    assert summary["first_upload_time"] is None
+
+    item = item_from_summary(summary, "pkg")
+    assert item.version == "1.2.0"
+    assert item.issued is None and item.original_date is None
+
+    item = item_from_summary(summary, "pkg", first_upload="2019-05-01T00:00:00")
+    assert item.issued is None
+    assert item.original_date.date_parts == [[2019, 5, 1]]
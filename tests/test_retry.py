@@ -0,0 +1,27 @@
+import httpx
+
+from citepy.retry import RetryPolicy
+
+
+def response(status, retry_after=None):
+    headers = {} if retry_after is None else {"Retry-After": retry_after}
+    return httpx.Response(status, headers=headers)
+
+
+def test_retry_after_is_honoured_in_full():
+    policy = RetryPolicy(max_backoff=30)
+    limited = response(429, "120")
+    assert policy.should_retry(0, limited)
+    assert policy.delay(0, limited) == 120
+
+
+def test_long_retry_after_is_not_retried():
+    policy = RetryPolicy(max_retry_after=60, budget=5)
+    assert not policy.should_retry(0, response(503, "120"))
+    assert policy.budget == 5
+
+
+def test_backoff_is_capped():
+    policy = RetryPolicy(backoff=10, max_backoff=1)
+    assert 0 <= policy.delay(5, response(503)) <= 1
+    assert not policy.should_retry(0, response(404))
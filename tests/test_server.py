@@ -0,0 +1,106 @@
+import asyncio
+import json
+
+import httpx
+import pytest
+
+from citepy.api import Citer
+from citepy.server import (
+    MAX_BODY_SIZE,
+    CitationServer,
+    HttpError,
+    ItemLRU,
+    parse_content_length,
+)
+
+
+def pypi_handler(request: httpx.Request) -> httpx.Response:
+    return httpx.Response(
+        200,
+        json={
+            "info": {
+                "version": "1.0",
+                "author": "Some One",
+                "maintainer": None,
+                "home_page": None,
+                "project_url": "https://pypi.org/project/foo/",
+                "summary": "A package",
+                "classifiers": [],
+            },
+            "releases": {"1.0": [{"upload_time": "2020-01-01T00:00:00"}]},
+        },
+    )
+
+
+def dispatch(method, target, body=b""):
+    async def run():
+        client = httpx.AsyncClient(transport=httpx.MockTransport(pypi_handler))
+        async with Citer(client=client) as citer:
+            server = CitationServer(citer, ItemLRU(10))
+            return await server.dispatch(method, target, body)
+
+    return asyncio.run(run())
+
+
+def test_batch():
+    status, content, headers = dispatch(
+        "POST", "/cite", json.dumps(["foo==1.0", "bad spec!"]).encode()
+    )
+    assert status == 200
+    assert [item["id"] for item in json.loads(content)] == ["foo"]
+    assert headers["X-Citepy-Failed"] == "1"
+
+
+def test_batch_rejects_stdin(monkeypatch):
+    def fail():
+        raise AssertionError("read stdin")
+
+    monkeypatch.setattr("sys.stdin.readlines", fail, raising=False)
+    with pytest.raises(HttpError) as e:
+        dispatch("POST", "/cite", b'["foo", "-"]')
+    assert e.value.status == 400
+
+
+@pytest.mark.parametrize(
+    "value,status",
+    [("abc", 400), ("", 400), ("-1", 400), ("1e3", 400), ("99999999999", 413)],
+)
+def test_content_length_rejected(value, status):
+    with pytest.raises(HttpError) as e:
+        parse_content_length(value)
+    assert e.value.status == status
+
+
+def test_content_length():
+    assert parse_content_length(None) == 0
+    assert parse_content_length("0") == 0
+    assert parse_content_length(str(MAX_BODY_SIZE)) == MAX_BODY_SIZE
+
+
+def raw_request(data: bytes) -> bytes:
+    """Send raw bytes to a running server, returning everything it sends back."""
+
+    async def run():
+        client = httpx.AsyncClient(transport=httpx.MockTransport(pypi_handler))
+        async with Citer(client=client) as citer:
+            server = CitationServer(citer, ItemLRU(10))
+            tcp = await asyncio.start_server(server.handle, "127.0.0.1", 0)
+            port = tcp.sockets[0].getsockname()[1]
+            async with tcp:
+                reader, writer = await asyncio.open_connection("127.0.0.1", port)
+                writer.write(data)
+                await writer.drain()
+                response = await asyncio.wait_for(reader.read(), 5)
+                writer.close()
+                return response
+
+    return asyncio.run(run())
+
+
+@pytest.mark.parametrize("length,status", [("abc", b"400"), ("1000000000", b"413")])
+def test_bad_content_length_response(length, status):
+    response = raw_request(
+        f"POST /cite HTTP/1.1\r\nContent-Length: {length}\r\n\r\n[]".encode()
+    )
+    assert response.startswith(b"HTTP/1.1 " + status)
+    assert b"Connection: close" in response
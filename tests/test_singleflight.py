@@ -0,0 +1,111 @@
+import asyncio
+
+import httpx
+import pytest
+
+from citepy.api import Citer, respell
+from citepy.singleflight import SingleFlight
+
+
+def test_concurrent_calls_share_one():
+    calls = []
+
+    async def fetch(x):
+        calls.append(x)
+        await asyncio.sleep(0.01)
+        return [x]
+
+    async def run():
+        flights = SingleFlight()
+        results = await asyncio.gather(
+            flights.do("a", fetch, 1),
+            flights.do("a", fetch, 2),
+            flights.do("b", fetch, 3),
+        )
+        assert flights.coalesced == 1
+        assert len(flights) == 0
+        # landed, so the next call starts afresh
+        results.append(await flights.do("a", fetch, 4))
+        return results
+
+    results = asyncio.run(run())
+    assert results == [[1], [1], [3], [4]]
+    assert results[0] is results[1]
+    assert calls == [1, 3, 4]
+
+
+def test_exceptions_are_shared():
+    async def fail():
+        await asyncio.sleep(0.01)
+        raise ValueError("nope")
+
+    async def run():
+        flights = SingleFlight()
+        return await asyncio.gather(
+            flights.do("a", fail), flights.do("a", fail), return_exceptions=True
+        )
+
+    first, second = asyncio.run(run())
+    assert isinstance(first, ValueError) and first is second
+
+
+def test_cancelled_caller_does_not_cancel_others():
+    async def fetch():
+        await asyncio.sleep(0.02)
+        return "done"
+
+    async def run():
+        flights = SingleFlight()
+        first = asyncio.ensure_future(flights.do("a", fetch))
+        second = asyncio.ensure_future(flights.do("a", fetch))
+        await asyncio.sleep(0)
+        first.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await first
+        return await second
+
+    assert asyncio.run(run()) == "done"
+
+
+def test_respell():
+    jso = {"id": "Foo", "title": "Foo", "publisher": "Foo"}
+    assert respell(jso, "Foo", "foo") == {
+        "id": "foo",
+        "title": "foo",
+        "publisher": "Foo",
+    }
+    assert respell(jso, "Foo", "Foo") is jso
+
+
+def test_differently_spelt_calls_keep_their_spelling():
+    requests = []
+
+    async def handler(request: httpx.Request) -> httpx.Response:
+        requests.append(request.url)
+        await asyncio.sleep(0.01)
+        return httpx.Response(
+            200,
+            json={
+                "info": {
+                    "version": "1.0",
+                    "author": "Some One",
+                    "home_page": None,
+                    "project_url": "https://pypi.org/project/foo/",
+                    "summary": "A package",
+                    "classifiers": [],
+                },
+                "releases": {"1.0": [{"upload_time": "2020-01-01T00:00:00"}]},
+            },
+        )
+
+    async def run():
+        async with Citer(transport=httpx.MockTransport(handler)) as citer:
+            return await asyncio.gather(
+                citer.cite("pypi", "Foo", "1.0"), citer.cite("pypi", "foo", "1.0")
+            )
+
+    first, second = asyncio.run(run())
+    assert len(requests) == 1
+    assert (first.id, first.title) == ("Foo", "Foo")
+    assert (second.id, second.title) == ("foo", "foo")
+    assert first.to_jso(validate=False).keys() == second.to_jso(validate=False).keys()
@@ -0,0 +1,31 @@
+import json
+import os
+import subprocess
+import sys
+from pathlib import Path
+
+import pytest
+
+root = Path(__file__).absolute().parent.parent
+
+# only needed once a repository is actually used, or an item validated
+LAZY_MODULES = ["httpx", "bs4", "jsonschema", "ijson", "pip"]
+
+
+@pytest.mark.parametrize("module", ["citepy.cli", "citepy"])
+def test_heavy_modules_are_imported_lazily(module):
+    env = dict(os.environ)
+    env["PYTHONPATH"] = os.pathsep.join(
+        [str(root)] + [p for p in env.get("PYTHONPATH", "").split(os.pathsep) if p]
+    )
+    code = f"import json, sys, {module}; print(json.dumps(sorted(sys.modules)))"
+    result = subprocess.run(
+        [sys.executable, "-c", code],
+        capture_output=True,
+        text=True,
+        env=env,
+        cwd=root,
+        check=True,
+    )
+    imported = set(json.loads(result.stdout))
+    assert [name for name in LAZY_MODULES if name in imported] == []
@@ -0,0 +1,114 @@
+import asyncio
+import datetime as dt
+from itertools import repeat
+
+import httpx
+
+from citepy.api import Citer
+from citepy.cli import iter_specs
+from citepy.store import ResultStore
+
+
+def no_network(request: httpx.Request) -> httpx.Response:
+    raise AssertionError(f"requested {request.url}")
+
+
+def test_store_roundtrip(tmp_path):
+    store = ResultStore(tmp_path / "results.sqlite")
+    store.put("pypi", "Foo", "1.0", {"id": "foo", "accessed": {"raw": "x"}})
+    assert store.get("pypi", "foo", "1.0") == {"id": "foo"}
+    assert store.get("pypi", "foo") is None
+    found = store.get_many([("pypi", "FOO", "1.0"), ("pypi", "bar", "1.0")])
+    assert found == {("pypi", "foo", "1.0"): {"id": "foo"}}
+    assert store.prune(max_items=0) == 1
+    assert len(store) == 0
+
+
+def test_stored_specs_are_streamed(tmp_path):
+    store = ResultStore(tmp_path / "results.sqlite")
+    store.put("pypi", "foo", "1.0", {"id": "foo", "version": "1.0"})
+    date = dt.date(2020, 1, 2)
+
+    async def first_items(n):
+        items = iter_specs(
+            # never exhausted, so must not be read up front
+            repeat(("pypi", "foo", "1.0")),
+            date,
+            store=store,
+            transport=httpx.MockTransport(no_network),
+        )
+        out = []
+        async for item in items:
+            out.append(item)
+            if len(out) == n:
+                break
+        await items.aclose()
+        return out
+
+    items = asyncio.run(first_items(3))
+    assert (
+        items
+        == [{"id": "foo", "version": "1.0", "accessed": {"date-parts": [[2020, 1, 2]]}}]
+        * 3
+    )
+
+
+CRAN_PAGE = """<html><body>
+<h2>foo: Does Foo</h2>
+<p>Foo things.</p>
+<table summary="Package foo summary">
+<tr><td>Version:</td><td>2.0</td></tr>
+<tr><td>Author:</td><td>Some One</td></tr>
+<tr><td>Published:</td><td>2020-01-01</td></tr>
+</table></body></html>"""
+
+
+def test_cran_items_are_not_stored(tmp_path):
+    store = ResultStore(tmp_path / "results.sqlite")
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        return httpx.Response(200, text=CRAN_PAGE)
+
+    async def cite():
+        transport = httpx.MockTransport(handler)
+        async with Citer(transport=transport, store=store) as citer:
+            # CRAN only has the current version, 2.0
+            return await citer.cite("cran", "foo", "1.0")
+
+    asyncio.run(cite())
+    assert len(store) == 0
+
+
+def test_batch_misses_are_not_looked_up_again(tmp_path, monkeypatch):
+    store = ResultStore(tmp_path / "results.sqlite")
+    gets = []
+    monkeypatch.setattr(store, "get", lambda *args: gets.append(args))
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        return httpx.Response(
+            200,
+            json={
+                "info": {
+                    "version": "1.0",
+                    "author": "Some One",
+                    "home_page": None,
+                    "project_url": "https://pypi.org/project/foo/",
+                    "summary": "A package",
+                    "classifiers": [],
+                },
+                "releases": {"1.0": [{"upload_time": "2020-01-01T00:00:00"}]},
+            },
+        )
+
+    async def fetch():
+        items = iter_specs(
+            [("pypi", "foo", "1.0"), ("pypi", "bar", "1.0")],
+            dt.date(2020, 1, 2),
+            store=store,
+            transport=httpx.MockTransport(handler),
+        )
+        return [item async for item in items]
+
+    assert len(asyncio.run(fetch())) == 2
+    assert gets == []
+    assert len(store) == 2